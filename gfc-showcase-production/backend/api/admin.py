@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Product, Contact, Newsletter
+from django.db import transaction
+from .models import Product, Contact, Newsletter, Review, StockReservation, StockReservationItem
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
@@ -15,7 +16,7 @@ class ProductAdmin(admin.ModelAdmin):
     )
     list_filter = ("category", "is_featured", "is_active", "created_at")
     search_fields = ("name", "model_code")
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = ("rating", "review_count", "weighted_rating", "created_at", "updated_at")
     fieldsets = (
         (
             "Basic Info",
@@ -35,7 +36,16 @@ class ProductAdmin(admin.ModelAdmin):
         ),
         (
             "Reviews",
-            {"fields": ("rating", "review_count")},
+            {
+                "fields": (
+                    "imported_rating",
+                    "imported_review_count",
+                    "rating",
+                    "review_count",
+                    "weighted_rating",
+                ),
+                "description": "rating and review_count combine the imported figures with published reviews.",
+            },
         ),
         (
             "Status",
@@ -62,3 +72,53 @@ class NewsletterAdmin(admin.ModelAdmin):
     list_filter = ("is_active", "subscribed_at")
     search_fields = ("email",)
     readonly_fields = ("subscribed_at",)
+
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ("product", "name", "rating", "is_published", "created_at")
+    list_filter = ("is_published", "rating", "created_at")
+    list_editable = ("is_published",)
+    search_fields = ("name", "title", "product__name")
+    raw_id_fields = ("product",)
+    readonly_fields = ("created_at",)
+    actions = ["publish", "unpublish"]
+
+    def set_published(self, request, queryset, published):
+        # Saved one by one: the Review signals move the rating rollups,
+        # which a queryset update() would skip.
+        with transaction.atomic():
+            reviews = list(queryset.select_for_update().exclude(is_published=published))
+            for review in reviews:
+                review.is_published = published
+                review.save(update_fields=["is_published"])
+        self.message_user(request, f"{len(reviews)} reviews updated")
+
+    @admin.action(description="Publish selected reviews")
+    def publish(self, request, queryset):
+        self.set_published(request, queryset, True)
+
+    @admin.action(description="Unpublish selected reviews")
+    def unpublish(self, request, queryset):
+        self.set_published(request, queryset, False)
+
+
+class StockReservationItemInline(admin.TabularInline):
+    model = StockReservationItem
+    extra = 0
+    raw_id_fields = ("product",)
+    readonly_fields = ("product", "quantity")
+    can_delete = False
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    # Read only: changing a status here would not move any stock.
+    list_display = ("token", "status", "expires_at", "created_at", "closed_at")
+    list_filter = ("status", "created_at")
+    search_fields = ("token",)
+    readonly_fields = ("token", "status", "expires_at", "created_at", "closed_at")
+    inlines = [StockReservationItemInline]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,98 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import MethodNotAllowed
+
+from .db import replica_reads
+from .views import ProductViewSet
+
+
+async def aiterate(iterator):
+    """Yield from a blocking iterator, advancing it in the request's worker thread"""
+    done = object()
+    advance = sync_to_async(next)
+    while True:
+        item = await advance(iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+def async_action(action):
+    """A coroutine handler running the sync ``action`` off the event loop.
+
+    The action, its caching and conditional decorators included, runs in
+    one hop to the request's worker thread: Django 4.2's async ORM makes
+    that hop per query anyway, so the responses are the sync ones at a
+    lower cost. A streamed body is produced the same way chunk by chunk,
+    so the server never collects it into memory first.
+    """
+
+    @wraps(action)
+    async def handler(self, request, *args, **kwargs):
+        response = await sync_to_async(action)(self, request, *args, **kwargs)
+        if response.streaming and not response.is_async:
+            response.streaming_content = aiterate(iter(response.streaming_content))
+        return response
+
+    return handler
+
+
+class AsyncProductViewSet(ProductViewSet):
+    """ProductViewSet's read actions as coroutines, for ASGI servers.
+
+    Every action is generated from its sync counterpart by async_action().
+    DRF 3.14 cannot dispatch coroutines, so ``as_async_view`` stands in for
+    ``as_view``; DRF's authentication, throttling and content negotiation
+    still run, in the request's worker thread.
+    """
+
+    list = async_action(ProductViewSet.list)
+    retrieve = async_action(ProductViewSet.retrieve)
+    featured = async_action(ProductViewSet.featured)
+    by_category = async_action(ProductViewSet.by_category)
+    batch = async_action(ProductViewSet.batch)
+    facets = async_action(ProductViewSet.facets)
+    categories = async_action(ProductViewSet.categories)
+    related = async_action(ProductViewSet.related)
+
+    @classmethod
+    def as_async_view(cls, actions, **initkwargs):
+        """An async Django view for ``actions``, e.g. ``{"get": "list"}``"""
+
+        if "get" in actions and "head" not in actions:
+            actions = {**actions, "head": actions["get"]}
+
+        async def view(request, *args, **kwargs):
+            self = cls(**initkwargs)
+            self.action_map = actions
+            for method, action in actions.items():
+                setattr(self, method, getattr(self, action))
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        # What csrf_exempt() does; its Django 4.2 wrapper is sync only.
+        view.csrf_exempt = True
+        return view
+
+    async def adispatch(self, request, *args, **kwargs):
+        """APIView.dispatch() for coroutine handlers"""
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        with replica_reads():
+            try:
+                # Sessions and Redis throttle buckets are blocking calls.
+                await sync_to_async(self.initial)(request, *args, **kwargs)
+                method = request.method.lower()
+                if method in self.action_map:
+                    response = await getattr(self, method)(request, *args, **kwargs)
+                elif method == "options":
+                    response = self.options(request, *args, **kwargs)
+                else:
+                    raise MethodNotAllowed(request.method)
+            except Exception as exc:
+                response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,94 @@
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import Product
+from .reviews import weighted_rating
+
+SYNTHETIC_PREFIX = "BENCH"
+
+
+def build_products(count, seed=0):
+    """Build unsaved synthetic products shaped like the real catalogue"""
+    rng = random.Random(seed)
+    categories = [key for key, _ in Product.CATEGORY_CHOICES]
+    feature_pool = [
+        "High Air Throw",
+        "Silent Operation",
+        "Energy Efficient",
+        "Remote Control",
+        "Copper Winding",
+        "Durable Motor",
+        "Inverter Compatible",
+        "Auto Swing",
+    ]
+    products = []
+    for i in range(count):
+        price = Decimal(rng.randrange(5000, 150000))
+        products.append(
+            Product(
+                name=f"{SYNTHETIC_PREFIX} Product {i}",
+                model_code=f"{SYNTHETIC_PREFIX}-{i:06d}",
+                category=rng.choice(categories),
+                tagline="Synthetic benchmark product",
+                description="Synthetic product used for benchmarking. " * 4,
+                image_url=f"https://example.com/images/{i}.jpg",
+                price_pkr=price,
+                price_usd=(price / 280).quantize(Decimal("0.01")),
+                specifications={
+                    "RPM": str(rng.randrange(900, 1500)),
+                    "Power": f"{rng.randrange(30, 250)}W",
+                    "Warranty": f"{rng.randrange(1, 5)} Years",
+                },
+                features=rng.sample(feature_pool, 4),
+                imported_rating=round(rng.uniform(3, 5), 1),
+                imported_review_count=rng.randrange(0, 500),
+                is_featured=rng.random() < 0.1,
+                stock=rng.randrange(0, 100),
+            )
+        )
+    for product in products:
+        # What recompute_review_rollups() would set, without its UPDATEs.
+        product.review_count = product.imported_review_count
+        product.rating_sum = product.imported_rating * product.imported_review_count
+        product.rating = product.imported_rating if product.review_count else 0
+        product.weighted_rating = weighted_rating(product.review_count, product.rating_sum)
+    return products
+
+
+def seed_products(count, seed=0, batch_size=1000):
+    return Product.objects.bulk_create(
+        build_products(count, seed=seed), batch_size=batch_size
+    )
+
+
+@contextmanager
+def rolled_back():
+    """Run a block inside a transaction that is always rolled back"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def measure(func, repeat):
+    """Call ``func`` ``repeat`` times and return (timings_ms, last_result)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        "min_ms": round(ordered[0], 3),
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 3),
+    }
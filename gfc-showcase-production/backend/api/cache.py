@@ -0,0 +1,184 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from .db import pin_primary_reads
+
+CATALOGUE_VERSION_KEY = "catalogue:version"
+# The scope of responses that show products from more than one category.
+STOCK_SCOPE = "stock"
+
+
+def get_cache():
+    return caches[settings.CATALOGUE_CACHE_ALIAS]
+
+
+def get_catalogue_version():
+    """Return the current catalogue version, seeding it on first use.
+
+    The seed is time based so that an evicted version key never falls back
+    to a number that older cache entries were written under.
+    """
+    cache = get_cache()
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOGUE_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOGUE_VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    """Invalidate every cached catalogue response in O(1)"""
+    pin_primary_reads()
+    cache = get_cache()
+    try:
+        return cache.incr(CATALOGUE_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOGUE_VERSION_KEY, time.time_ns(), timeout=None)
+        return cache.get(CATALOGUE_VERSION_KEY)
+
+
+def product_scope(pk):
+    return f"product:{pk}"
+
+
+def category_scope(category):
+    return f"category:{category}"
+
+
+def get_scope_versions(scopes):
+    """``{scope: version}``, seeding missing versions as get_catalogue_version() does.
+
+    A scope is the part of the catalogue a cached response shows: one
+    product, one category, or STOCK_SCOPE. Stock writes bump only the
+    scopes they touch, while a catalogue version bump retires them all.
+    Scope versions expire with the entries they guard; a reseeded one is
+    newer than any it replaces.
+    """
+    cache = get_cache()
+    keys = {f"catalogue:scope:{scope}": scope for scope in scopes}
+    versions = cache.get_many(list(keys))
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        seed = time.time_ns()
+        for key in missing:
+            cache.add(key, seed, timeout=settings.CATALOGUE_CACHE_TIMEOUT)
+        versions.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_catalogue_scopes(scopes):
+    """Invalidate the cached responses and fragments of these scopes only"""
+    pin_primary_reads()
+    cache = get_cache()
+    for scope in scopes:
+        try:
+            cache.incr(f"catalogue:scope:{scope}")
+        except ValueError:
+            # Nothing is cached under an unseeded scope.
+            pass
+
+
+def catalogue_cache_key(request, scope=None):
+    """Build a cache key from the catalogue and scope versions and the normalized URL"""
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    raw = f"{request.get_host()}{request.path}?{params!r}"
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    if scope is None:
+        return f"catalogue:{get_catalogue_version()}:{digest}"
+    version = get_scope_versions([scope])[scope]
+    return f"catalogue:{get_catalogue_version()}:{scope}:{version}:{digest}"
+
+
+def view_cache_key(view, request):
+    """catalogue_cache_key() under the view's ``get_cache_scope()``, once per request"""
+    key = getattr(request, "_catalogue_cache_key", None)
+    if key is None:
+        get_scope = getattr(view, "get_cache_scope", None)
+        key = catalogue_cache_key(request, get_scope() if get_scope else None)
+        request._catalogue_cache_key = key
+    return key
+
+
+def product_fragment_keys(request, field, values):
+    """``{cache key: value}`` for the products whose ``field`` is in ``values``"""
+    prefix = f"catalogue:{get_catalogue_version()}:product"
+    host = request.get_host()
+
+    def digest(value):
+        return hashlib.md5(f"{host}|{field}|{value}".encode("utf-8")).hexdigest()
+
+    return {f"{prefix}:{digest(value)}": value for value in values}
+
+
+def get_product_fragments(request, field, values):
+    """``{value: JSON text}`` for the products among ``values`` already serialized.
+
+    Fragments live under the catalogue version like whole responses, so
+    a bump retires them too; each also records its product's scope
+    version, and is ignored once a stock write has bumped it.
+    """
+    if not settings.CATALOGUE_CACHE_ENABLED:
+        return {}
+    keys = product_fragment_keys(request, field, values)
+    cached = get_cache().get_many(list(keys))
+    versions = get_scope_versions({product_scope(pk) for pk, _, _ in cached.values()})
+    return {
+        keys[key]: text
+        for key, (pk, version, text) in cached.items()
+        if versions.get(product_scope(pk)) == version
+    }
+
+
+def set_product_fragments(request, field, fragments):
+    """Store ``{value: (pk, JSON text)}`` for get_product_fragments()"""
+    if not settings.CATALOGUE_CACHE_ENABLED or not fragments:
+        return
+    keys = product_fragment_keys(request, field, fragments)
+    versions = get_scope_versions({product_scope(pk) for pk, _ in fragments.values()})
+    entries = {}
+    for key, value in keys.items():
+        pk, text = fragments[value]
+        entries[key] = (pk, versions[product_scope(pk)], text)
+    get_cache().set_many(entries, settings.CATALOGUE_CACHE_TIMEOUT)
+
+
+def cache_catalogue_response(view_method):
+    """Cache the response data of a read-only catalogue action.
+
+    Only successful DRF responses are stored, not streamed or snapshot
+    ones. Entries are never purged one by one: bumping the catalogue
+    version makes every old key unreachable, and the cache evicts them.
+    Entries are also keyed by the view's ``get_cache_scope()``, if any.
+    """
+
+    def cacheable(response):
+        # Streamed and snapshot responses have no data to store.
+        return response.status_code == status.HTTP_200_OK and isinstance(response, Response)
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if not settings.CATALOGUE_CACHE_ENABLED:
+            return view_method(self, request, *args, **kwargs)
+
+        cache = get_cache()
+        key = view_cache_key(self, request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = view_method(self, request, *args, **kwargs)
+        if cacheable(response):
+            cache.set(key, response.data, settings.CATALOGUE_CACHE_TIMEOUT)
+        return response
+
+    return wrapper
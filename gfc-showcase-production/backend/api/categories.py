@@ -0,0 +1,276 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+from decimal import Decimal
+from operator import ge, le
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.utils import timezone
+
+from .cache import STOCK_SCOPE, bump_catalogue_scopes
+from .models import CategorySummary, Product
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal("0.01")
+# Product fields the summaries depend on; saves limited to other fields
+# leave them alone.
+SUMMARY_FIELDS = {"category", "is_active", "is_featured", "price_pkr", "rating", "stock"}
+SUMMARY_AGGREGATES = {
+    "product_count": Count("pk"),
+    "featured_count": Count("pk", filter=Q(is_featured=True)),
+    "min_price_pkr": Min("price_pkr"),
+    "max_price_pkr": Max("price_pkr"),
+    "total_price_pkr": Sum("price_pkr"),
+    "total_rating": Sum("rating"),
+    "total_stock": Sum("stock"),
+    "in_stock_count": Count("pk", filter=Q(stock__gt=0)),
+}
+# Summary fields a product row adds to by being active in the category.
+SUMMARY_COUNTERS = (
+    "product_count",
+    "featured_count",
+    "total_price_pkr",
+    "total_rating",
+    "total_stock",
+    "in_stock_count",
+)
+
+
+def averages(product_count, total_price, total_rating):
+    """avg_price_pkr and avg_rating for a summary's count and running sums"""
+    if not product_count:
+        return {"avg_price_pkr": None, "avg_rating": None}
+    return {
+        "avg_price_pkr": (Decimal(total_price) / product_count).quantize(CENTS),
+        # Ratings have two decimals: rounding their sum drops the float
+        # error its deltas pile up.
+        "avg_rating": round(round(total_rating, 2) / product_count, 2),
+    }
+
+
+def summary_values(values):
+    """Round an aggregate row into CategorySummary field values"""
+    return {
+        "product_count": values["product_count"],
+        "featured_count": values["featured_count"],
+        "min_price_pkr": values["min_price_pkr"],
+        "max_price_pkr": values["max_price_pkr"],
+        "total_price_pkr": values["total_price_pkr"] or 0,
+        "total_rating": values["total_rating"] or 0,
+        "total_stock": values["total_stock"] or 0,
+        "in_stock_count": values["in_stock_count"],
+        **averages(
+            values["product_count"], values["total_price_pkr"] or 0, values["total_rating"] or 0
+        ),
+    }
+
+
+def refresh_category_summaries(categories, using="default"):
+    """Recompute the summary rows of ``categories`` from their active products.
+
+    Each category is one aggregate over the partial category index. Writes
+    go through apply_summary_changes() instead; this is for a category
+    with no summary row yet.
+    """
+    for category in sorted(set(categories)):
+        values = Product.objects.using(using).filter(
+            is_active=True, category=category
+        ).aggregate(**SUMMARY_AGGREGATES)
+        # Update first: the write takes SQLite's lock up front instead of
+        # upgrading a read lock, which fails at once under concurrent writers.
+        summary = summary_values(values)
+        updated = CategorySummary.objects.using(using).filter(category=category).update(
+            updated_at=timezone.now(), **summary
+        )
+        if not updated:
+            CategorySummary.objects.using(using).create(category=category, **summary)
+
+
+def summary_rows(product_ids, using="default"):
+    """``{pk: row}`` of the products' SUMMARY_FIELDS, for apply_summary_changes()"""
+    return {
+        row["pk"]: row
+        for row in Product.objects.using(using).filter(pk__in=list(product_ids))
+        .values("pk", *SUMMARY_FIELDS)
+    }
+
+
+def summary_deltas(changes):
+    """Net counter changes and price moves per category for ``changes``.
+
+    Returns ``{category: (counters, prices)}``: what each SUMMARY_COUNTERS
+    field gains, and a Counter of prices gained (positive) or lost
+    (negative) by the category's active rows.
+    """
+    deltas = {}
+    for old, new in changes:
+        for row, sign in ((old, -1), (new, 1)):
+            if row is None or not row["is_active"]:
+                continue
+            counters, prices = deltas.setdefault(
+                row["category"], (dict.fromkeys(SUMMARY_COUNTERS, 0), Counter())
+            )
+            counters["product_count"] += sign
+            counters["featured_count"] += sign * bool(row["is_featured"])
+            counters["total_price_pkr"] += sign * row["price_pkr"]
+            counters["total_rating"] += sign * row["rating"]
+            counters["total_stock"] += sign * row["stock"]
+            counters["in_stock_count"] += sign * (row["stock"] > 0)
+            prices[row["price_pkr"]] += sign
+    return deltas
+
+
+def moved_extreme(extreme, moves, nearer):
+    """The min (``nearer`` is ``le``) or max (``ge``) price once ``moves``
+    apply, or ``None`` when only an aggregate can tell"""
+    gained = [price for price, count in moves.items() if count > 0 and nearer(price, extreme)]
+    if gained:
+        # Every other row was at the old extreme or beyond it.
+        return min(gained) if nearer is le else max(gained)
+    if any(count < 0 and nearer(price, extreme) for price, count in moves.items()):
+        return None
+    return extreme
+
+
+def apply_category_delta(category, counters, moves, using="default"):
+    """Add ``counters`` to one summary row and settle its prices and averages"""
+    summaries = CategorySummary.objects.using(using).filter(category=category)
+    with transaction.atomic(using=using):
+        # Update first, as in refresh_category_summaries().
+        updated = summaries.update(
+            updated_at=timezone.now(),
+            **{name: F(name) + value for name, value in counters.items()},
+        )
+        if not updated:
+            refresh_category_summaries([category], using=using)
+            return
+        summary = summaries.get()
+        low = high = None
+        if summary.product_count:
+            low = summary.min_price_pkr
+            high = summary.max_price_pkr
+            if low is not None:
+                low = moved_extreme(low, moves, le)
+            if high is not None:
+                high = moved_extreme(high, moves, ge)
+            if low is None or high is None:
+                extremes = Product.objects.using(using).filter(
+                    is_active=True, category=category
+                ).aggregate(low=Min("price_pkr"), high=Max("price_pkr"))
+                low, high = extremes["low"], extremes["high"]
+        summaries.update(
+            min_price_pkr=low,
+            max_price_pkr=high,
+            **averages(summary.product_count, summary.total_price_pkr, summary.total_rating),
+        )
+
+
+def apply_summary_changes(changes, using="default"):
+    """Move the summaries by product rows going from ``old`` to ``new``.
+
+    ``changes`` holds ``(old, new)`` pairs of summary_rows() dicts, ``None``
+    for a row that did not or no longer exists. Counts, stock and the
+    running price and rating sums move by the rows' differences, so a write
+    costs the same whatever the category's size; min/max price are only
+    re-aggregated when a row holding one of them moves away from it.
+    """
+    for category, (counters, prices) in sorted(summary_deltas(changes).items()):
+        moves = {price: count for price, count in prices.items() if count}
+        if not moves and not any(counters.values()):
+            continue
+        try:
+            apply_category_delta(category, counters, moves, using=using)
+        except IntegrityError:
+            # A count would drop below zero: writes that skipped the
+            # signals (bulk loads, raw SQL) left the row behind the products.
+            refresh_category_summaries([category], using=using)
+
+
+_pending_changes = []
+_refresh_timer = None
+_refresh_lock = threading.Lock()
+
+
+def flush_summary_refresh(using="default"):
+    """Apply the changes schedule_summary_refresh() has queued, if any"""
+    global _refresh_timer
+    with _refresh_lock:
+        changes = list(_pending_changes)
+        _pending_changes.clear()
+        if _refresh_timer is not None:
+            _refresh_timer.cancel()
+        _refresh_timer = None
+    if not changes:
+        return
+    apply_summary_changes(changes, using=using)
+    # Summaries and lists spanning categories show stock, so they follow
+    # stock writes once per refresh rather than on every write.
+    bump_catalogue_scopes([STOCK_SCOPE])
+
+
+def _refresh_in_background(using="default"):
+    close_old_connections()
+    try:
+        flush_summary_refresh(using=using)
+    except Exception:
+        logger.exception("Category summary refresh failed")
+    finally:
+        close_old_connections()
+
+
+# Refreshes still waiting on the timer would be lost with the process.
+atexit.register(_refresh_in_background)
+
+
+def schedule_summary_refresh(changes, using="default"):
+    """Apply ``(old, new)`` product row changes to the summaries soon.
+
+    For hot write paths that bypass model signals (stock reservations,
+    review rollups): one apply_summary_changes() runs every
+    CATEGORY_SUMMARY_REFRESH_DELAY seconds at most, netting all the
+    writes in between into one update per category. The timer is not
+    pushed back by later writes, so a steady stream cannot starve it.
+    """
+    global _refresh_timer
+    delay = settings.CATEGORY_SUMMARY_REFRESH_DELAY
+    with _refresh_lock:
+        _pending_changes.extend(changes)
+        if _refresh_timer is None and delay > 0:
+            _refresh_timer = threading.Timer(delay, _refresh_in_background, args=[using])
+            _refresh_timer.daemon = True
+            _refresh_timer.start()
+    if delay <= 0:
+        flush_summary_refresh(using=using)
+
+
+def rebuild_category_summaries(using="default"):
+    """Recompute every summary row in one grouped query"""
+    rows = {
+        row["category"]: row
+        for row in Product.objects.using(using).filter(is_active=True)
+        .values("category").annotate(**SUMMARY_AGGREGATES).order_by()
+    }
+    empty = {name: None for name in SUMMARY_AGGREGATES}
+    empty.update(product_count=0, featured_count=0, in_stock_count=0)
+    with transaction.atomic(using=using):
+        CategorySummary.objects.using(using).all().delete()
+        CategorySummary.objects.using(using).bulk_create([
+            CategorySummary(category=category, **summary_values(rows.get(category, empty)))
+            for category, _ in Product.CATEGORY_CHOICES
+        ])
+
+
+def summaries_by_choice(summaries):
+    """One summary per CATEGORY_CHOICES entry, in choice order.
+
+    Categories without a stored row get an unsaved, empty summary.
+    """
+    stored = {summary.category: summary for summary in summaries}
+    return [
+        stored.get(key) or CategorySummary(category=key)
+        for key, _ in Product.CATEGORY_CHOICES
+    ]
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_catalogue_cache(app_configs, **kwargs):
+    """The catalogue version must be one counter for every worker process"""
+    if not settings.CATALOGUE_CACHE_ENABLED:
+        return []
+    backend = settings.CACHES[settings.CATALOGUE_CACHE_ALIAS]["BACKEND"]
+    if not backend.endswith(".LocMemCache"):
+        return []
+    return [
+        Warning(
+            "The catalogue cache is process-local, so with more than one "
+            "worker process product changes do not invalidate the other "
+            "workers' cached responses until CATALOGUE_CACHE_TIMEOUT.",
+            hint="Set REDIS_URL, or CATALOGUE_CACHE_ENABLED=False.",
+            obj=settings.CATALOGUE_CACHE_ALIAS,
+            id="api.W001",
+        )
+    ]
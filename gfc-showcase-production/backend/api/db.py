@@ -0,0 +1,92 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+REPLICA_ALIAS = "replica"
+PRIMARY_PIN_KEY = "catalogue:primary_pin"
+
+# Inside replica_reads(): a one-item list holding whether to use the
+# replica, decided on the block's first read.
+_replica_reads = contextvars.ContextVar("replica_reads", default=None)
+
+
+def pin_primary_reads():
+    """Keep replica_reads() on the primary for DB_REPLICA_PIN_SECONDS.
+
+    Called by the catalogue cache bumps before the version changes: a
+    request that sees the new version also sees the pin, so a lagging
+    replica cannot answer it and have the old rows cached under the new
+    version.
+    """
+    if REPLICA_ALIAS in settings.DATABASES and settings.DB_REPLICA_PIN_SECONDS > 0:
+        caches[settings.CATALOGUE_CACHE_ALIAS].set(
+            PRIMARY_PIN_KEY, True, settings.DB_REPLICA_PIN_SECONDS
+        )
+
+
+def primary_pinned():
+    return caches[settings.CATALOGUE_CACHE_ALIAS].get(PRIMARY_PIN_KEY) is not None
+
+
+@contextmanager
+def replica_reads():
+    """Route ORM reads inside the block to the read replica, if configured"""
+    token = _replica_reads.set([None])
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads made inside ``replica_reads()`` to the "replica" alias.
+
+    Only code that opts in reads from the replica, so writes and the
+    read-modify-write paths in signals never see replication lag; and
+    only the catalogue's own tables, so session and user lookups during
+    authentication stay on the primary. While a recent write pins them
+    (pin_primary_reads()) the reads stay on the primary too; that is
+    checked once per block, on its first catalogue read, which comes
+    after the catalogue cache key was built.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _replica_reads.get()
+        if (
+            state is None
+            or model._meta.app_label != "api"
+            or REPLICA_ALIAS not in settings.DATABASES
+        ):
+            return None
+        if state[0] is None:
+            state[0] = not primary_pinned()
+        return REPLICA_ALIAS if state[0] else None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        databases = {"default", REPLICA_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Use WAL journaling so readers do not block on the single writer"""
+    if connection.vendor != "sqlite" or not settings.SQLITE_WAL:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
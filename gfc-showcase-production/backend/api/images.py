@@ -0,0 +1,222 @@
+import io
+import math
+import posixpath
+import secrets
+
+import numpy as np
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import bump_catalogue_version
+from .models import Product
+from .snapshots import schedule_snapshot_rebuild
+
+VARIANT_WIDTHS = (320, 640, 960, 1280, 1920)
+VARIANT_DIR = "products/variants"
+BLURHASH_COMPONENTS = (4, 3)
+# Product fields written by the pipeline.
+IMAGE_FIELDS = [
+    "image_width",
+    "image_height",
+    "image_blurhash",
+    "image_srcset",
+    "image_source",
+    "updated_at",
+]
+
+Image.init()
+# Ordered best compression first; AVIF needs a Pillow built with libavif.
+# Encoders run single threaded because the bulk command already keeps a
+# worker process per core.
+FORMATS = [
+    (name, extension, options)
+    for name, extension, options in (
+        ("AVIF", "avif", {"quality": 55, "speed": 8, "max_threads": 1}),
+        ("WEBP", "webp", {"quality": 78, "method": 4}),
+        ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+    )
+    if name in Image.SAVE
+]
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _base83(value, length):
+    return "".join(_BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def _to_srgb(value):
+    value = min(max(value, 0.0), 1.0)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash(image, components=BLURHASH_COMPONENTS):
+    """Encode ``image`` as a BlurHash placeholder string"""
+    components_x, components_y = components
+    thumbnail = image.convert("RGB")
+    thumbnail.thumbnail((64, 64))
+    srgb = np.asarray(thumbnail, dtype=np.float64) / 255
+    linear = np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+    height, width, _ = linear.shape
+
+    basis_x = np.cos(np.pi * np.outer(np.arange(components_x), np.arange(width)) / width)
+    basis_y = np.cos(np.pi * np.outer(np.arange(components_y), np.arange(height)) / height)
+    factors = np.einsum("jy,ix,yxc->jic", basis_y, basis_x, linear) / (width * height)
+    factors[1:, :] *= 2
+    factors[0, 1:] *= 2
+    factors = factors.reshape(-1, 3)
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((components_x - 1) + (components_y - 1) * 9, 1)
+    if len(ac):
+        quantised_max = int(max(0, min(82, math.floor(np.abs(ac).max() * 166 - 0.5))))
+        maximum = (quantised_max + 1) / 166
+    else:
+        quantised_max, maximum = 0, 1
+    result += _base83(quantised_max, 1)
+    result += _base83((_to_srgb(dc[0]) << 16) + (_to_srgb(dc[1]) << 8) + _to_srgb(dc[2]), 4)
+    for value in ac:
+        quantised = [
+            int(max(0, min(18, math.floor(math.copysign(abs(v / maximum) ** 0.5, v) * 9 + 9.5))))
+            for v in value
+        ]
+        result += _base83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2)
+    return result
+
+
+def render_variants(source):
+    """Resize and re-encode one source image, dropping all metadata.
+
+    Works on bytes only so it can run in a worker process. Returns
+    ``(width, height, blurhash, [(width, extension, bytes), ...])``; widths
+    above the source width are skipped rather than upscaled.
+    """
+    with Image.open(io.BytesIO(source)) as original:
+        # Apply the EXIF orientation before the EXIF block is dropped.
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    width, height = image.size
+    has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    if has_alpha:
+        flat = Image.new("RGB", image.size, "white")
+        flat.paste(image, mask=image.getchannel("A"))
+    else:
+        flat = image
+
+    widths = [w for w in VARIANT_WIDTHS if w < width]
+    if width <= VARIANT_WIDTHS[-1]:
+        widths.append(width)
+    variants = []
+    for target in widths:
+        size = (target, max(1, round(height * target / width)))
+        resized = image.resize(size, Image.LANCZOS) if target != width else image
+        resized_flat = flat.resize(size, Image.LANCZOS) if target != width else flat
+        for name, extension, options in FORMATS:
+            buffer = io.BytesIO()
+            # JPEG has no alpha channel; the others keep it.
+            (resized_flat if name == "JPEG" else resized).save(buffer, name, **options)
+            variants.append((target, extension, buffer.getvalue()))
+    return width, height, blurhash(flat), variants
+
+
+def store_variants(product, rendered):
+    """Save rendered variants and record dimensions, blurhash and srcsets.
+
+    Each render gets a directory of its own, so the previous variants
+    stay in place until the caller has saved IMAGE_FIELDS and deleted
+    them (see variant_files()).
+    """
+    width, height, placeholder, variants = rendered
+    stem = posixpath.splitext(posixpath.basename(product.image_local.name))[0]
+    directory = f"{VARIANT_DIR}/{product.pk}/{secrets.token_hex(4)}"
+    srcset = {}
+    for target, extension, content in variants:
+        name = f"{directory}/{stem}-{target}w.{extension}"
+        name = default_storage.save(name, ContentFile(content))
+        srcset.setdefault(extension, []).append(f"{default_storage.url(name)} {target}w")
+
+    product.image_width = width
+    product.image_height = height
+    product.image_blurhash = placeholder
+    product.image_srcset = {extension: ", ".join(entries) for extension, entries in srcset.items()}
+    product.image_source = product.image_local.name
+    product.updated_at = timezone.now()
+    return product
+
+
+def image_changed(product):
+    """Whether the stored variants were not made from the current upload"""
+    return product.image_source != (product.image_local.name or "")
+
+
+def variant_files(product):
+    """Every stored variant of ``product``, each directory after its files"""
+    directory = f"{VARIANT_DIR}/{product.pk}"
+    try:
+        subdirectories, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return []
+    names = [f"{directory}/{name}" for name in files]
+    for subdirectory in subdirectories:
+        _, files = default_storage.listdir(f"{directory}/{subdirectory}")
+        names += [f"{directory}/{subdirectory}/{name}" for name in files]
+        names.append(f"{directory}/{subdirectory}")
+    return names
+
+
+def delete_variants(names):
+    """Delete variant_files() the product no longer points at"""
+    for name in names:
+        default_storage.delete(name)
+
+
+def clear_image_fields(product):
+    product.image_width = None
+    product.image_height = None
+    product.image_blurhash = ""
+    product.image_srcset = {}
+    product.image_source = ""
+    product.updated_at = timezone.now()
+
+
+def process_product_image(product):
+    """Re-render one product's variants, or drop them if the upload is gone.
+
+    The old variants are only deleted once the new ones are saved, so an
+    upload that fails to render leaves the product's images as they were.
+    Saves with a queryset update, so no model signals fire; callers
+    invalidate cached catalogue responses.
+    """
+    superseded = variant_files(product)
+    if product.image_local:
+        with product.image_local.open("rb") as f:
+            store_variants(product, render_variants(f.read()))
+    else:
+        clear_image_fields(product)
+    type(product).objects.filter(pk=product.pk).update(
+        **{field: getattr(product, field) for field in IMAGE_FIELDS}
+    )
+    delete_variants(superseded)
+    return product
+
+
+def refresh_product_image(product_id, using="default"):
+    """process_product_image() for a saved product, then invalidate the catalogue.
+
+    Runs after the save commits, possibly in a Celery worker; a product
+    saved again meanwhile may already have been rendered, so the upload
+    is compared again first.
+    """
+    product = Product.objects.using(using).filter(pk=product_id).first()
+    if product is None or not image_changed(product):
+        return
+    process_product_image(product)
+    bump_catalogue_version()
+    if settings.CATALOGUE_SNAPSHOT_AUTO:
+        schedule_snapshot_rebuild()
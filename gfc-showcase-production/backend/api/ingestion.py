@@ -0,0 +1,276 @@
+import atexit
+import json
+import logging
+import math
+import queue
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import Contact
+
+logger = logging.getLogger(__name__)
+
+
+def encode_contact(validated_data):
+    data = dict(validated_data)
+    product = data.pop("product", None)
+    data["product_id"] = product.pk if product is not None else None
+    return json.dumps(data)
+
+
+def write_contacts(payloads):
+    """Insert a batch of queued contact payloads in one statement"""
+    contacts = [Contact(**json.loads(payload)) for payload in payloads]
+    with transaction.atomic():
+        Contact.objects.bulk_create(contacts)
+    return len(contacts)
+
+
+class LocalContactQueue:
+    """In-process queue; entries survive failed writes but not a restart"""
+
+    def __init__(self):
+        self.pending = queue.Queue()
+        self.dead = []
+
+    def push(self, payload):
+        self.pending.put(payload)
+
+    def claim(self, batch_size, timeout):
+        try:
+            batch = [self.pending.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < batch_size:
+            try:
+                batch.append(self.pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def ack(self, batch):
+        pass
+
+    def release(self, batch):
+        for payload in batch:
+            self.pending.put(payload)
+
+    def dead_letter(self, batch):
+        self.dead.extend(batch)
+
+    def recover(self):
+        pass
+
+    def size(self):
+        return self.pending.qsize()
+
+
+class RedisContactQueue:
+    """Reliable Redis list queue.
+
+    Each worker moves the entries it claims atomically to its own
+    processing list and removes them once their batch is committed. While
+    claiming it keeps a heartbeat key alive; ``recover()`` re-queues only
+    the lists of workers whose heartbeat has expired, so a crashed
+    worker's entries are delivered again (at-least-once) and a live
+    worker's never are.
+    """
+
+    pending_key = "contacts:pending"
+    dead_key = "contacts:dead"
+    workers_key = "contacts:workers"
+    processing_prefix = "contacts:processing:"
+    heartbeat_prefix = "contacts:heartbeat:"
+    # The list all workers shared before they got one each.
+    legacy_processing_key = "contacts:processing"
+
+    def __init__(self, url, heartbeat_ttl=None):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.worker_id = uuid.uuid4().hex
+        self.processing_key = self.processing_prefix + self.worker_id
+        self.heartbeat_ttl = heartbeat_ttl or settings.CONTACT_INGESTION_HEARTBEAT_TTL
+
+    def heartbeat(self):
+        pipeline = self.client.pipeline()
+        pipeline.set(
+            self.heartbeat_prefix + self.worker_id, 1, ex=math.ceil(self.heartbeat_ttl)
+        )
+        pipeline.sadd(self.workers_key, self.worker_id)
+        pipeline.execute()
+
+    def push(self, payload):
+        self.client.lpush(self.pending_key, payload)
+
+    def claim(self, batch_size, timeout):
+        self.heartbeat()
+        first = self.client.blmove(
+            self.pending_key, self.processing_key, timeout, "RIGHT", "LEFT"
+        )
+        if first is None:
+            return []
+        batch = [first]
+        while len(batch) < batch_size:
+            payload = self.client.lmove(
+                self.pending_key, self.processing_key, "RIGHT", "LEFT"
+            )
+            if payload is None:
+                break
+            batch.append(payload)
+        return batch
+
+    def ack(self, batch):
+        pipeline = self.client.pipeline()
+        for payload in batch:
+            pipeline.lrem(self.processing_key, 1, payload)
+        pipeline.execute()
+
+    def release(self, batch):
+        pipeline = self.client.pipeline()
+        for payload in batch:
+            pipeline.lrem(self.processing_key, 1, payload)
+            pipeline.rpush(self.pending_key, payload)
+        pipeline.execute()
+
+    def dead_letter(self, batch):
+        pipeline = self.client.pipeline()
+        for payload in batch:
+            pipeline.lrem(self.processing_key, 1, payload)
+            pipeline.lpush(self.dead_key, payload)
+        pipeline.execute()
+
+    def requeue(self, processing_key):
+        moved = 0
+        while self.client.lmove(processing_key, self.pending_key, "RIGHT", "RIGHT"):
+            moved += 1
+        return moved
+
+    def recover(self):
+        """Re-queue the entries of workers whose heartbeat has expired"""
+        recovered = self.requeue(self.legacy_processing_key)
+        for worker_id in self.client.smembers(self.workers_key):
+            worker_id = worker_id.decode()
+            if worker_id == self.worker_id or self.client.exists(self.heartbeat_prefix + worker_id):
+                continue
+            # LMOVE hands each entry to one caller only, so concurrent
+            # recoveries of the same list cannot duplicate it.
+            recovered += self.requeue(self.processing_prefix + worker_id)
+            self.client.srem(self.workers_key, worker_id)
+        if recovered:
+            logger.warning("Re-queued %d contact entries from stopped workers", recovered)
+        return recovered
+
+    def size(self):
+        return self.client.llen(self.pending_key)
+
+
+class ContactBatchWriter:
+    """Drain a contact queue into the database in bulk_create batches.
+
+    A failed batch is retried row by row, so one bad entry cannot hold
+    back the rest; entries that fail ``max_attempts`` times in a row are
+    moved to the queue's dead letters.
+    """
+
+    def __init__(self, contact_queue, batch_size=None, interval=None, max_attempts=None):
+        self.queue = contact_queue
+        self.batch_size = batch_size or settings.CONTACT_INGESTION_BATCH_SIZE
+        self.interval = interval or settings.CONTACT_INGESTION_FLUSH_INTERVAL
+        self.max_attempts = max_attempts or settings.CONTACT_INGESTION_MAX_ATTEMPTS
+        self.failures = {}
+        self.recovery_interval = settings.CONTACT_INGESTION_HEARTBEAT_TTL
+        self.stopping = threading.Event()
+
+    def flush_once(self, timeout=None):
+        batch = self.queue.claim(self.batch_size, timeout or self.interval)
+        if not batch:
+            return 0
+        try:
+            written = write_contacts(batch)
+        except Exception:
+            logger.warning("Contact batch write failed, retrying %d entries one by one", len(batch))
+            return self.write_each(batch)
+        self.queue.ack(batch)
+        return written
+
+    def write_each(self, batch):
+        written, retry, dead, error = 0, [], [], None
+        for payload in batch:
+            try:
+                write_contacts([payload])
+            except Exception as exc:
+                error = exc
+                attempts = self.failures.pop(payload, 0) + 1
+                if attempts < self.max_attempts:
+                    self.failures[payload] = attempts
+                    retry.append(payload)
+                else:
+                    dead.append(payload)
+            else:
+                self.failures.pop(payload, None)
+                self.queue.ack([payload])
+                written += 1
+        if error is not None:
+            logger.error(
+                "%d contact entries failed to write, %d dead-lettered",
+                len(retry) + len(dead), len(dead), exc_info=error,
+            )
+        if dead:
+            self.queue.dead_letter(dead)
+        if retry:
+            self.queue.release(retry)
+            time.sleep(self.interval)
+        return written
+
+    def drain(self):
+        """Flush until the queue is empty, e.g. at shutdown"""
+        while self.flush_once(timeout=0.01):
+            pass
+
+    def run(self):
+        next_recovery = 0
+        while not self.stopping.is_set():
+            if time.monotonic() >= next_recovery:
+                self.queue.recover()
+                next_recovery = time.monotonic() + self.recovery_interval
+            close_old_connections()
+            self.flush_once()
+        self.drain()
+
+    def stop(self):
+        self.stopping.set()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_contact_queue():
+    """Return the process-wide contact queue, starting its writer thread.
+
+    With ``CONTACT_INGESTION_BACKEND = "redis"`` the writer can also run
+    as a separate process via ``manage.py contact_worker``.
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            if settings.CONTACT_INGESTION_BACKEND == "redis":
+                _queue = RedisContactQueue(settings.REDIS_URL)
+            else:
+                _queue = LocalContactQueue()
+            if settings.CONTACT_INGESTION_START_WORKER:
+                writer = ContactBatchWriter(_queue)
+                threading.Thread(
+                    target=writer.run, name="contact-writer", daemon=True
+                ).start()
+                atexit.register(writer.drain)
+        return _queue
+
+
+def enqueue_contact(validated_data):
+    get_contact_queue().push(encode_contact(validated_data))
@@ -0,0 +1,247 @@
+import bisect
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger("api.requests")
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class RequestMetrics:
+    """Timings collected while one request is handled"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.phases = {}
+        self.active = set()
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_seconds += time.perf_counter() - start
+            self.query_count += 1
+
+
+@contextmanager
+def timed(phase):
+    """Add the block's wall time to ``phase`` of the current request.
+
+    Nested blocks of the same phase are counted once, so serializers that
+    call other serializers are not double counted. Outside a request, or
+    with instrumentation off, this does nothing.
+    """
+    metrics = _current.get()
+    if metrics is None or phase in metrics.active:
+        yield
+        return
+    metrics.active.add(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.active.discard(phase)
+        metrics.phases[phase] = metrics.phases.get(phase, 0.0) + time.perf_counter() - start
+
+
+class TimedSerializerMixin:
+    """Count a serializer's ``to_representation`` as serializer time"""
+
+    def to_representation(self, instance):
+        with timed("serializer"):
+            return super().to_representation(instance)
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        counts, total = self.series.get(labels, ([0] * (len(self.buckets) + 1), 0.0))
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.series[labels] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self.series.items()):
+            label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Per-route request histograms for this process.
+
+    Each worker process keeps its own registry; Prometheus scrapes every
+    worker and sums the series.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {
+            "duration": Histogram(
+                "http_request_duration_seconds", "Wall time to handle the request", DURATION_BUCKETS
+            ),
+            "queries": Histogram(
+                "http_request_db_queries", "SQL queries issued by the request", QUERY_BUCKETS
+            ),
+            "db": Histogram(
+                "http_request_db_duration_seconds", "Time spent in SQL queries", DURATION_BUCKETS
+            ),
+            "serializer": Histogram(
+                "http_request_serializer_duration_seconds",
+                "Time spent serializing response data",
+                DURATION_BUCKETS,
+            ),
+            "size": Histogram(
+                "http_response_size_bytes", "Response body size", SIZE_BUCKETS
+            ),
+        }
+
+    def observe(self, route, method, status_code, values):
+        labels = (("method", method), ("route", route), ("status", str(status_code)))
+        with self.lock:
+            for key, value in values.items():
+                self.histograms[key].observe(labels, value)
+
+    def render(self):
+        with self.lock:
+            lines = []
+            for histogram in self.histograms.values():
+                lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetricsMiddleware:
+    """Time each request and report it as Server-Timing, a log line and metrics.
+
+    Keep it first in MIDDLEWARE so the total covers the other middleware.
+    Works in both sync and async chains, so it never forces ASGI requests
+    through a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.REQUEST_METRICS_ENABLED:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                self.record_queries(stack, metrics)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not settings.REQUEST_METRICS_ENABLED:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        # Connections are per thread. The async ORM and sync code of this
+        # request run in its thread-sensitive worker thread, so the query
+        # wrappers are installed, and removed, on that thread's connections.
+        stack = ExitStack()
+        try:
+            await sync_to_async(self.record_queries)(stack, metrics)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        return self.report(request, response, metrics)
+
+    def record_queries(self, stack, metrics):
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(metrics.record_query))
+
+    def report(self, request, response, metrics):
+        total = time.perf_counter() - metrics.start
+        serializer = metrics.phases.get("serializer", 0.0)
+        size = None if response.streaming else len(response.content)
+        response["Server-Timing"] = ", ".join([
+            f"total;dur={total * 1000:.2f}",
+            f'db;dur={metrics.query_seconds * 1000:.2f};desc="{metrics.query_count} queries"',
+            f"serializer;dur={serializer * 1000:.2f}",
+        ])
+
+        match = request.resolver_match
+        route = match.view_name if match else "unmatched"
+        values = {
+            "duration": total,
+            "queries": metrics.query_count,
+            "db": metrics.query_seconds,
+            "serializer": serializer,
+        }
+        if size is not None:
+            values["size"] = size
+        registry.observe(route, request.method, response.status_code, values)
+
+        logger.info(json.dumps({
+            "event": "request",
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": response.status_code,
+            "duration_ms": round(total * 1000, 2),
+            "db_queries": metrics.query_count,
+            "db_ms": round(metrics.query_seconds * 1000, 2),
+            "serializer_ms": round(serializer * 1000, 2),
+            "response_bytes": size,
+        }))
+        return response
+
+
+def metrics_view(request):
+    """Prometheus text exposition of the request histograms.
+
+    Closed unless METRICS_TOKEN is set, and then only to that bearer token;
+    with DEBUG on and no token it is open for local use.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not constant_time_compare(request.headers.get("Authorization", ""), expected):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4")
@@ -0,0 +1,274 @@
+import json
+import logging
+import platform
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from api.cache import bump_catalogue_version
+from api.categories import rebuild_category_summaries
+from api.benchmarks import measure, rolled_back, seed_products, summarize
+from api.models import Contact, Product
+from api.related import rebuild_related_products
+from api.reservations import reserve_stock
+from api.search import rebuild_search_index
+from api.specs import rebuild_spec_index
+from api.urls import router
+
+def contact_payload(i, context=None):
+    return {
+        "name": f"Benchmark {i}",
+        "email": f"bench{i}@example.com",
+        "phone": "0300-0000000",
+        "subject": "bench-api",
+        "message": "Benchmark submission",
+    }
+
+
+def newsletter_payload(i, context=None):
+    return {"email": f"bench-{i}@example.com"}
+
+
+def newsletter_bulk_payload(i, context=None):
+    return {"emails": [f"bench-{i}-{j}@example.com" for j in range(100)]}
+
+
+def empty_payload(i, context=None):
+    return {}
+
+
+def reservation_payload(i, context):
+    return {"items": [{"product": pk, "quantity": 1} for pk in context["reservable"]]}
+
+
+def review_payload(i, context):
+    return {
+        "product": context["product"],
+        "name": f"Benchmark {i}",
+        "rating": i % 5 + 1,
+        "title": "Benchmark review",
+        "body": "Benchmark submission",
+    }
+
+
+def review_params(i, context):
+    return {"product": context["product"]}
+
+
+def batch_params(i, context):
+    return {"ids": ",".join(str(pk) for pk in context["batch"])}
+
+
+def batch_code_params(i, context):
+    return {"model_codes": ",".join(context["batch_codes"])}
+
+
+# (route name, label, method, query params or payload factory, query
+# budget). GET params may also be a factory, called like a payload one.
+# Budgets are the exact query counts of the uncached request, so any
+# extra per-row query (an N+1) fails the run. Every route in api/urls.py
+# must appear here at least once.
+SCENARIOS = [
+    ("api-root", "root", "get", {}, 0),
+    ("product-list", "products list", "get", {}, 3),
+    ("product-list", "products list, category", "get", {"category": "ceiling_fan"}, 3),
+    ("product-list", "products list, by price", "get", {"ordering": "price_pkr"}, 3),
+    ("product-list", "products list, by weighting", "get", {"ordering": "-weighted_rating"}, 3),
+    ("product-list", "products list, deep page", "get", {"page": 50}, 3),
+    ("product-list", "products list, keyset", "get", {"pagination": "cursor"}, 2),
+    ("product-list", "products search", "get", {"search": "product 1"}, 3),
+    ("product-list", "products list, spec range", "get", {"power_w__lte": 70}, 3),
+    ("product-detail", "product detail", "get", {}, 2),
+    ("product-batch", "batch, 20 ids", "get", batch_params, 2),
+    ("product-batch", "batch, 20 model codes", "get", batch_code_params, 2),
+    ("product-featured", "featured", "get", {}, 2),
+    ("product-by-category", "by category", "get", {}, 2),
+    ("product-facets", "facets", "get", {}, 2),
+    ("product-facets", "facets, category", "get", {"category": "ceiling_fan"}, 2),
+    ("product-categories", "categories", "get", {}, 1),
+    ("product-related", "related", "get", {}, 2),
+    ("contact-list", "contact list", "get", {}, 2),
+    ("contact-list", "contact create", "post", contact_payload, 1),
+    ("contact-detail", "contact detail", "get", {}, 1),
+    ("newsletter-list", "newsletter subscribe", "post", newsletter_payload, 1),
+    ("newsletter-bulk", "newsletter bulk, 100 emails", "post", newsletter_bulk_payload, 1),
+    ("review-list", "review create", "post", review_payload, 5),
+    ("review-list", "reviews of a product", "get", review_params, 3),
+    ("reservation-list", "reserve, 3 items", "post", reservation_payload, 8),
+    ("reservation-detail", "reservation detail", "get", {}, 2),
+    ("reservation-confirm", "reservation confirm", "post", empty_payload, 3),
+]
+
+
+class Command(BaseCommand):
+    help = "Benchmark latency and query counts for every API route, with query budgets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+            help="Catalogue sizes to seed, one run each",
+        )
+        parser.add_argument("--repeat", type=int, default=30)
+        parser.add_argument("--output", help="Write results as JSON to this file instead of stdout")
+        parser.add_argument("--baseline", help="JSON file from an earlier run to compare p50 against")
+        parser.add_argument(
+            "--cached", action="store_true",
+            help="Serve catalogue reads from the response cache (budgets are not enforced)",
+        )
+
+    def handle(self, *args, **options):
+        self.check_coverage()
+        # One log line per benchmark request would drown the report.
+        logging.getLogger("api.requests").setLevel(logging.WARNING)
+        results = []
+        with override_settings(
+            ALLOWED_HOSTS=["testserver"],
+            CATALOGUE_CACHE_ENABLED=options["cached"],
+            CONTACT_INGESTION_MODE="sync",
+            THROTTLE_ENABLED=False,
+            # Still counted per request, but never reached by the benchmark.
+            STOCK_RESERVATION_MAX_OPEN=10**6,
+        ):
+            for size in options["sizes"]:
+                results.extend(self.run_size(size, options["repeat"], options["cached"]))
+
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "repeat": options["repeat"],
+            "cached": options["cached"],
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if options["baseline"]:
+            self.compare(options["baseline"], results)
+
+        failures = [result for result in results if result["failures"]]
+        if failures:
+            raise CommandError(
+                f"{len(failures)} benchmarks failed: "
+                + "; ".join(
+                    f"{result['label']} @ {result['size']} ({', '.join(result['failures'])})"
+                    for result in failures
+                )
+            )
+        self.stderr.write(self.style.SUCCESS("✓ Every route is within its query budget"))
+
+    def check_coverage(self):
+        routes = {router.root_view_name}
+        for _, viewset, basename in router.registry:
+            for route in router.get_routes(viewset):
+                if set(router.get_method_map(viewset, route.mapping)) & set(viewset.http_method_names):
+                    routes.add(route.name.format(basename=basename))
+        missing = routes - {scenario[0] for scenario in SCENARIOS}
+        if missing:
+            raise CommandError(f"Routes without a benchmark: {', '.join(sorted(missing))}")
+
+    def run_size(self, size, repeat, cached):
+        results = []
+        with rolled_back():
+            seed_products(size)
+            rebuild_search_index()
+            rebuild_spec_index()
+            rebuild_category_summaries()
+            rebuild_related_products()
+            # Seeding skips signals; a new version keeps --cached runs
+            # from serving the previous size's responses.
+            bump_catalogue_version()
+            contact = Contact.objects.create(**contact_payload(0))
+            product = Product.objects.filter(is_active=True).order_by("id").first()
+            reservable = list(
+                Product.objects.filter(is_active=True).order_by("id").values_list("pk", flat=True)[:3]
+            )
+            Product.objects.filter(pk__in=reservable).update(stock=10 ** 6)
+            # Confirming closes a reservation, so each request gets its own.
+            held = [reserve_stock([(reservable[0], 1)]) for _ in range(repeat + 1)]
+            batch = list(
+                Product.objects.filter(is_active=True).order_by("id").values_list("pk", "model_code")[:20]
+            )
+            context = {
+                "product": product.pk,
+                "reservable": reservable,
+                "batch": [pk for pk, _ in batch],
+                "batch_codes": [code for _, code in batch],
+            }
+            # Route kwargs for the i-th request of a scenario.
+            route_kwargs = {
+                "product-detail": lambda i: {"pk": product.pk},
+                "product-related": lambda i: {"pk": product.pk},
+                "contact-detail": lambda i: {"pk": contact.pk},
+                "reservation-detail": lambda i: {"token": held[0].token},
+                "reservation-confirm": lambda i: {"token": held[i].token},
+            }
+
+            client = Client()
+            for name, label, method, params, budget in SCENARIOS:
+                kwargs = route_kwargs.get(name, lambda i: {})
+                urls = [reverse(name, kwargs=kwargs(i)) for i in range(repeat + 1)]
+                url = urls[0]
+                calls = iter(range(repeat + 1))
+
+                def call():
+                    i = next(calls)
+                    if method == "get":
+                        return client.get(urls[i], params(i, context) if callable(params) else params)
+                    return client.post(
+                        urls[i], params(i, context), content_type="application/json"
+                    )
+
+                # The first request is a warm-up; it also fills the cache
+                # under --cached.
+                call()
+                with CaptureQueriesContext(connection) as queries:
+                    timings, response = measure(call, repeat)
+
+                query_count = -(-len(queries) // repeat)
+                failures = []
+                if response.status_code >= 400:
+                    failures.append(f"status {response.status_code}")
+                if not cached and query_count > budget:
+                    failures.append(f"{query_count} queries, budget {budget}")
+                results.append({
+                    "size": size,
+                    "label": label,
+                    "route": name,
+                    "method": method.upper(),
+                    "url": url,
+                    "params": (params(0, context) if callable(params) else params) if method == "get" else None,
+                    "status": response.status_code,
+                    "queries": query_count,
+                    "budget": budget,
+                    **summarize(timings),
+                    "failures": failures,
+                })
+                self.stderr.write(
+                    f"{size:>7} {label:<30} {query_count:>2} queries  "
+                    f"p50 {results[-1]['p50_ms']:>8.2f}ms  p99 {results[-1]['p99_ms']:>8.2f}ms"
+                )
+        return results
+
+    def compare(self, path, results):
+        with open(path) as f:
+            baseline = {
+                (result["size"], result["label"]): result for result in json.load(f)["results"]
+            }
+        for result in results:
+            before = baseline.get((result["size"], result["label"]))
+            if before is None:
+                continue
+            change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100
+            self.stderr.write(
+                f"{result['size']:>7} {result['label']:<30} p50 {before['p50_ms']:.2f} -> "
+                f"{result['p50_ms']:.2f}ms ({change:+.0f}%), queries "
+                f"{before['queries']} -> {result['queries']}"
+            )
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from api.benchmarks import summarize
+from api.models import Product
+
+class Command(BaseCommand):
+    help = "Compare connection-per-request (CONN_MAX_AGE=0) with persistent connections under concurrent load"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=200, help="Requests per thread")
+        parser.add_argument("--max-age", type=int, default=60, help="CONN_MAX_AGE for the pooled run")
+
+    def handle(self, *args, **options):
+        pk = Product.objects.filter(is_active=True).values_list("pk", flat=True).first()
+        if pk is None:
+            raise CommandError("No active products; run `manage.py load_products` first")
+        connections.close_all()
+
+        self.stdout.write(f"{connection.vendor}, {options['threads']} threads x {options['requests']} requests")
+        with override_settings(
+            ALLOWED_HOSTS=["testserver"],
+            CATALOGUE_CACHE_ENABLED=False,
+            REQUEST_METRICS_ENABLED=False,
+            THROTTLE_ENABLED=False,
+        ):
+            for label, max_age in (("per-request", 0), ("pooled", options["max_age"])):
+                self.run(label, max_age, f"/api/products/{pk}/", options["threads"], options["requests"])
+
+    def run(self, label, max_age, path, threads, per_thread):
+        # Every connection opened from now on reads these settings.
+        for alias in connections:
+            connections.settings[alias]["CONN_MAX_AGE"] = max_age
+
+        handler = WSGIHandler()
+        environ = RequestFactory()._base_environ(PATH_INFO=path, REQUEST_METHOD="GET")
+        opened = []
+        timings = []
+        errors = []
+        lock = threading.Lock()
+
+        def count_connection(sender, connection, **kwargs):
+            with lock:
+                opened.append(connection.alias)
+
+        def worker():
+            local = []
+            try:
+                for _ in range(per_thread):
+                    start = time.perf_counter()
+                    # Goes through the real request_started/request_finished
+                    # signals, which is where Django closes or keeps the
+                    # connection according to CONN_MAX_AGE.
+                    response = handler(dict(environ), lambda status, headers: None)
+                    b"".join(response)
+                    response.close()
+                    local.append((time.perf_counter() - start) * 1000)
+                    if response.status_code != 200:
+                        errors.append(response.status_code)
+            finally:
+                connections.close_all()
+                with lock:
+                    timings.extend(local)
+
+        connection_created.connect(count_connection)
+        try:
+            workers = [threading.Thread(target=worker) for _ in range(threads)]
+            start = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            connection_created.disconnect(count_connection)
+
+        if errors:
+            raise CommandError(f"{label}: {len(errors)} failed requests, e.g. status {errors[0]}")
+        self.stdout.write(
+            f"{label:<12} {len(timings) / elapsed:>8,.0f} req/s  "
+            f"{len(opened):>5} connections opened  {summarize(timings)}"
+        )
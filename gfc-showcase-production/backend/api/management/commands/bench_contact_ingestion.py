@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+from api.models import Contact
+from api.views import ContactViewSet
+
+BENCH_SUBJECT = "bench-contact-ingestion"
+
+class Command(BaseCommand):
+    help = "Load test contact POSTs with synchronous writes vs the ingestion queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=16)
+
+    def handle(self, *args, **options):
+        for mode in ("sync", "queue"):
+            with override_settings(CONTACT_INGESTION_MODE=mode, ALLOWED_HOSTS=["testserver"]):
+                self.run_mode(mode, options["requests"], options["concurrency"])
+            Contact.objects.filter(subject=BENCH_SUBJECT).delete()
+
+    def run_mode(self, mode, total, concurrency):
+        factory = APIRequestFactory()
+        view = ContactViewSet.as_view({"post": "create"}, throttle_classes=[])
+
+        def post(i):
+            request = factory.post(
+                "/api/contact/",
+                {
+                    "name": f"Load Test {i}",
+                    "email": f"load{i}@example.com",
+                    "phone": "0300-0000000",
+                    "subject": BENCH_SUBJECT,
+                    "message": "Load test submission",
+                },
+                format="json",
+            )
+            try:
+                return view(request).status_code
+            except Exception:
+                return 500
+            finally:
+                close_old_connections()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            statuses = list(pool.map(post, range(total)))
+        acknowledged = time.perf_counter() - start
+
+        accepted = sum(1 for status in statuses if status in (201, 202))
+        while Contact.objects.filter(subject=BENCH_SUBJECT).count() < accepted:
+            time.sleep(0.05)
+        persisted = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{mode:<6} {accepted}/{total} accepted, "
+            f"{total / acknowledged:,.0f} req/s acknowledged, "
+            f"all rows persisted after {persisted:.2f}s"
+        )
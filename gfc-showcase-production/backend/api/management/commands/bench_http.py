@@ -0,0 +1,111 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from api.benchmarks import summarize
+
+class Command(BaseCommand):
+    help = (
+        "Load test a running server over HTTP with many concurrent keep-alive "
+        "connections, e.g. sync gunicorn (config.wsgi) against uvicorn (config.asgi)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "urls", nargs="+",
+            help="URLs to request; connections cycle through them",
+        )
+        parser.add_argument("--connections", type=int, default=500)
+        parser.add_argument("--duration", type=float, default=20.0, help="Seconds to keep sending")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Seconds before a request counts as failed")
+        parser.add_argument("--label", default="", help="Name for this run in the JSON report")
+
+    def handle(self, *args, **options):
+        targets = []
+        for url in options["urls"]:
+            parts = urlsplit(url)
+            if parts.scheme != "http" or not parts.hostname:
+                raise CommandError(f"Only plain http:// URLs are supported: {url}")
+            path = parts.path or "/"
+            if parts.query:
+                path += f"?{parts.query}"
+            targets.append((parts.hostname, parts.port or 80, path))
+
+        report = asyncio.run(self.run(targets, options))
+        report["label"] = options["label"]
+        self.stdout.write(json.dumps(report, indent=2))
+
+    async def run(self, targets, options):
+        timings = []
+        statuses = {}
+        errors = []
+        deadline = time.perf_counter() + options["duration"]
+
+        async def connection(index):
+            host, port, path = targets[index % len(targets)]
+            reader = writer = None
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.wait_for(
+                            asyncio.open_connection(host, port), options["timeout"]
+                        )
+                    status, keep_alive = await asyncio.wait_for(
+                        self.request(reader, writer, host, path), options["timeout"]
+                    )
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as exc:
+                    errors.append(type(exc).__name__)
+                    keep_alive = False
+                else:
+                    timings.append((time.perf_counter() - start) * 1000)
+                    statuses[status] = statuses.get(status, 0) + 1
+                if not keep_alive and writer is not None:
+                    writer.close()
+                    reader = writer = None
+            if writer is not None:
+                writer.close()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(connection(i) for i in range(options["connections"])))
+        elapsed = time.perf_counter() - start
+        report = {
+            "connections": options["connections"],
+            "seconds": round(elapsed, 2),
+            "requests": len(timings),
+            "requests_per_second": round(len(timings) / elapsed, 1),
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            "errors": {name: errors.count(name) for name in sorted(set(errors))},
+        }
+        if timings:
+            report.update(summarize(timings))
+        return report
+
+    async def request(self, reader, writer, host, path):
+        """Send one GET and read the whole response; returns (status, keep_alive)"""
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif "content-length" in headers:
+            await reader.readexactly(int(headers["content-length"]))
+        else:
+            await reader.read()
+            return status, False
+        return status, headers.get("connection", "").lower() != "close"
@@ -0,0 +1,72 @@
+import json
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from api.benchmarks import measure, rolled_back, seed_products, summarize
+from api.models import Product
+from api.renderers import RawJSONRenderer
+from api.serializers import ProductRowSerializer
+from api.views import sparse_fields
+
+HEAVY_FIELDS = "description,specifications,features"
+
+class Command(BaseCommand):
+    help = (
+        "Measure time and memory per row of rendering a large product list "
+        "in each field mode, against decoding every JSON column"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            seed_products(options["count"])
+            queryset = Product.objects.filter(is_active=True)
+
+            def decoded():
+                # Plain values_list(): the model field decodes every JSON column.
+                row_serializer = ProductRowSerializer()
+                row_serializer.converters = [
+                    (index, convert) for index, convert in row_serializer.converters
+                    if row_serializer.fields[index] not in row_serializer.json_columns
+                ]
+                rows = queryset.values_list(*row_serializer.fields)
+                return JSONRenderer().render(row_serializer.to_representation(rows))
+
+            def mode(fields):
+                def render():
+                    row_serializer = ProductRowSerializer(fields)
+                    rows = row_serializer.rows(queryset)
+                    return RawJSONRenderer().render(row_serializer.to_representation(rows))
+                return render
+
+            scenarios = [
+                ("all fields, decoded JSON", decoded),
+                ("all fields, raw JSON", mode(None)),
+                (f"?omit={HEAVY_FIELDS}", mode(sparse_fields(None, HEAVY_FIELDS))),
+                ("?fields=id,name,price_pkr", mode(sparse_fields("id,name,price_pkr"))),
+            ]
+            rows = queryset.count()
+            baseline = None
+            for label, render in scenarios:
+                timings, content = measure(render, options["repeat"])
+                tracemalloc.start()
+                render()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                if baseline is None:
+                    baseline = content
+                elif label.startswith("all fields") and json.loads(content) != json.loads(baseline):
+                    raise CommandError(f"{label}: output differs from the decoded rows")
+                report = summarize(timings)
+                self.stdout.write(
+                    f"{label:<52} p50 {report['p50_ms']:>8.1f}ms "
+                    f"{report['p50_ms'] * 1000 / rows:>6.1f}us/row  "
+                    f"peak {peak / 2 ** 20:>6.1f}MiB {peak / rows:>6.0f}B/row  "
+                    f"body {len(content) / rows:>5.0f}B/row"
+                )
+        self.stdout.write(self.style.SUCCESS(f"✓ {rows} rows per render, raw JSON output matches"))
@@ -0,0 +1,62 @@
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from api.benchmarks import measure, rolled_back, seed_products, summarize
+from api.models import Product
+from api.pagination import KeysetPagination
+from api.serializers import ProductRowSerializer
+from api.views import ProductViewSet
+
+class Command(BaseCommand):
+    help = "Compare page-number and keyset pagination latency at page 1 and a deep page"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=15000)
+        parser.add_argument("--page", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+
+        def run_page(params):
+            request = Request(factory.get("/api/products/", params))
+            view = ProductViewSet(request=request, args=(), kwargs={}, action="list", format_kwarg=None)
+            row_serializer = ProductRowSerializer()
+            rows = row_serializer.rows(view.filter_queryset(view.get_queryset()))
+            page = view.paginate_queryset(rows)
+            return view.get_paginated_response(row_serializer.to_representation(page))
+
+        with rolled_back(), override_settings(ALLOWED_HOSTS=["testserver"]):
+            seed_products(options["count"])
+            page_size = KeysetPagination().page_size
+            deep_cursor = self.cursor_for_offset(
+                (options["page"] - 1) * page_size, factory
+            )
+            scenarios = [
+                ("page-number, page 1", {"page": 1}),
+                (f"page-number, page {options['page']}", {"page": options["page"]}),
+                ("keyset, page 1", {"pagination": "cursor"}),
+                (
+                    f"keyset, page {options['page']}",
+                    {"pagination": "cursor", "cursor": deep_cursor},
+                ),
+            ]
+            for label, params in scenarios:
+                timings, _ = measure(lambda: run_page(params), options["repeat"])
+                self.stdout.write(f"{label:<28} {summarize(timings)}")
+
+    def cursor_for_offset(self, offset, factory):
+        """Build the keyset cursor a client would hold after ``offset`` rows"""
+        paginator = KeysetPagination()
+        paginator.ordering = ("-is_featured", "-created_at", "-id")
+        paginator.base_url = "/api/products/?pagination=cursor"
+        anchor = (
+            Product.objects.filter(is_active=True)
+            .order_by(*paginator.ordering)
+            .values_list("is_featured", "created_at", "id")[offset - 1]
+        )
+        link = paginator._link(anchor, reverse=False)
+        return parse_qs(urlparse(link).query)["cursor"][0]
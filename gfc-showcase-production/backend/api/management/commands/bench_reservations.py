@@ -0,0 +1,191 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.db.models import Sum
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from api.benchmarks import build_products, summarize
+from api.categories import flush_summary_refresh, rebuild_category_summaries
+from api.models import Product, StockReservation, StockReservationItem
+from api.reservations import release_expired
+from api.views import StockReservationViewSet
+
+BENCH_PREFIX = "BENCH-RESERVE"
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a few products with concurrent multi-item checkouts and check "
+        "that no stock is oversold, against a naive read-modify-write baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=4)
+        parser.add_argument("--stock", type=int, default=300, help="Starting stock of every product")
+        parser.add_argument("--requests", type=int, default=3000)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--max-items", type=int, default=3, help="Most products in one checkout")
+        parser.add_argument(
+            "--release-rate", type=float, default=0.2,
+            help="Share of held reservations released instead of confirmed",
+        )
+
+    def handle(self, *args, **options):
+        if options["products"] < options["max_items"]:
+            raise CommandError("--products must be at least --max-items")
+        failed = False
+        for mode in ("naive", "reservations"):
+            products = self.seed(options["products"], options["stock"])
+            try:
+                # Every simulated shopper shares one address, so no per-client cap.
+                with override_settings(
+                    THROTTLE_ENABLED=False,
+                    ALLOWED_HOSTS=["testserver"],
+                    STOCK_RESERVATION_MAX_OPEN=0,
+                ):
+                    failed |= self.run_mode(mode, products, options)
+            finally:
+                self.cleanup(products)
+        if failed:
+            raise CommandError("Stock was oversold or lost with the reservation engine")
+
+    def seed(self, count, stock):
+        products = build_products(count, seed=22)
+        for i, product in enumerate(products):
+            product.name = f"{BENCH_PREFIX} Product {i}"
+            product.model_code = f"{BENCH_PREFIX}-{i:03d}"
+            product.is_active = True
+            product.stock = stock
+        products = Product.objects.bulk_create(products)
+        # bulk_create skips the signals that keep the summaries.
+        rebuild_category_summaries()
+        return products
+
+    def cleanup(self, products):
+        ids = [product.pk for product in products]
+        flush_summary_refresh()
+        StockReservation.objects.filter(items__product_id__in=ids).delete()
+        Product.objects.filter(pk__in=ids).delete()
+        # The naive mode writes stock past the summaries.
+        rebuild_category_summaries()
+
+    def baskets(self, products, options):
+        rng = random.Random(options["requests"])
+        for _ in range(options["requests"]):
+            chosen = rng.sample(products, rng.randint(1, options["max_items"]))
+            yield [(product.pk, rng.randint(1, 3)) for product in chosen], rng.random()
+
+    def naive_checkout(self, items, roll):
+        """What an unguarded checkout does: read stock, check it, write it back"""
+        for product_id, quantity in items:
+            stock = Product.objects.values_list("stock", flat=True).get(pk=product_id)
+            if stock < quantity:
+                return False
+        for product_id, quantity in items:
+            stock = Product.objects.values_list("stock", flat=True).get(pk=product_id)
+            Product.objects.filter(pk=product_id).update(stock=stock - quantity)
+        return True
+
+    def run_mode(self, mode, products, options):
+        factory = APIRequestFactory()
+        reserve = StockReservationViewSet.as_view({"post": "create"}, throttle_classes=[])
+        release = StockReservationViewSet.as_view({"delete": "destroy"}, throttle_classes=[])
+        confirm = StockReservationViewSet.as_view({"post": "confirm"}, throttle_classes=[])
+        timings = []
+        sold = {product.pk: 0 for product in products}
+        sold_lock = threading.Lock()
+        statuses = {}
+
+        def checkout(job):
+            items, roll = job
+            start = time.perf_counter()
+            try:
+                if mode == "naive":
+                    held = self.naive_checkout(items, roll)
+                    status = 200 if held else 409
+                else:
+                    request = factory.post(
+                        "/api/reservations/",
+                        {"items": [{"product": pk, "quantity": q} for pk, q in items]},
+                        format="json",
+                    )
+                    response = reserve(request)
+                    status = response.status_code
+                    held = status == 201
+                    if held:
+                        token = response.data["token"]
+                        if roll < options["release_rate"]:
+                            release(factory.delete(f"/api/reservations/{token}/"), token=token)
+                            held = False
+                        else:
+                            # May lose to the sweeper below; then it is not sold.
+                            held = confirm(
+                                factory.post(f"/api/reservations/{token}/confirm/"), token=token
+                            ).status_code == 200
+            except Exception as exc:
+                status = type(exc).__name__
+                held = False
+            finally:
+                close_old_connections()
+            timings.append((time.perf_counter() - start) * 1000)
+            with sold_lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if held:
+                    for product_id, quantity in items:
+                        sold[product_id] += quantity
+
+        done = threading.Event()
+
+        def sweeper():
+            # Treat every hold as lapsed so confirms race the expiry sweep.
+            while not done.is_set():
+                release_expired(now=timezone.now() + timedelta(days=1))
+                close_old_connections()
+                time.sleep(0.05)
+
+        start = time.perf_counter()
+        sweep = threading.Thread(target=sweeper, daemon=True)
+        if mode == "reservations":
+            sweep.start()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            list(pool.map(checkout, self.baskets(products, options)))
+        done.set()
+        if sweep.is_alive():
+            sweep.join()
+        elapsed = time.perf_counter() - start
+
+        ids = [product.pk for product in products]
+        release_expired(now=timezone.now() + timedelta(days=1))
+        final = dict(Product.objects.filter(pk__in=ids).values_list("pk", "stock"))
+        kept = dict(
+            StockReservationItem.objects.filter(
+                product_id__in=ids, reservation__status=StockReservation.CONFIRMED
+            ).values("product_id").annotate(total=Sum("quantity")).order_by()
+            .values_list("product_id", "total")
+        )
+        initial = options["stock"]
+        oversold = sum(max(0, sold[pk] - initial) for pk in ids)
+        # Units that left stock without a recorded sale, or the reverse.
+        drift = sum(abs(initial - final[pk] - sold[pk]) for pk in ids)
+        if mode == "reservations":
+            drift += sum(abs(kept.get(pk, 0) - sold[pk]) for pk in ids)
+        report = summarize(timings)
+        self.stdout.write(
+            f"{mode:<12} {options['requests'] / elapsed:,.0f} checkouts/s  "
+            f"p50 {report['p50_ms']:.1f}ms  p99 {report['p99_ms']:.1f}ms  "
+            f"statuses {dict(sorted(statuses.items(), key=str))}"
+        )
+        self.stdout.write(
+            f"{'':<12} sold {sum(sold.values())} of {initial * len(ids)} units, "
+            f"{oversold} oversold, {drift} lost or phantom, "
+            f"lowest stock {min(final.values())}"
+        )
+        failed = mode == "reservations" and (oversold or drift or min(final.values()) < 0)
+        if mode == "reservations" and not failed:
+            self.stdout.write(self.style.SUCCESS("✓ No stock oversold or lost"))
+        return failed
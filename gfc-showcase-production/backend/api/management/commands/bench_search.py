@@ -0,0 +1,43 @@
+from django.db.models import Q
+from django.core.management.base import BaseCommand
+from api.benchmarks import measure, rolled_back, seed_products, summarize
+from api.models import Product
+from api.search import SEARCH_FIELDS, rebuild_search_index, search_products
+
+class Command(BaseCommand):
+    help = "Compare icontains search with the full-text search index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=100000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--terms", nargs="+", default=["silent", "cop", "bench product 42", "inverter"]
+        )
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            seed_products(options["count"])
+            rebuild_search_index()
+            active = Product.objects.filter(is_active=True)
+
+            for term in options["terms"]:
+                def icontains():
+                    condition = Q()
+                    for word in term.split():
+                        word_condition = Q()
+                        for field in SEARCH_FIELDS:
+                            word_condition |= Q(**{f"{field}__icontains": word})
+                        condition &= word_condition
+                    queryset = active.filter(condition)
+                    return queryset.count(), list(queryset.values_list("id", flat=True)[:12])
+
+                def full_text():
+                    queryset = search_products(active, term)
+                    ranked = queryset.order_by("-search_rank")
+                    return queryset.count(), list(ranked.values_list("id", flat=True)[:12])
+
+                baseline, (baseline_count, _) = measure(icontains, options["repeat"])
+                indexed, (indexed_count, _) = measure(full_text, options["repeat"])
+                self.stdout.write(f"{term!r}")
+                self.stdout.write(f"  icontains  ({baseline_count} hits) {summarize(baseline)}")
+                self.stdout.write(f"  full-text  ({indexed_count} hits) {summarize(indexed)}")
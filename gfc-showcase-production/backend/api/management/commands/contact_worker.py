@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.ingestion import ContactBatchWriter, RedisContactQueue
+
+class Command(BaseCommand):
+    help = "Flush queued contact submissions from Redis in batches"
+
+    def handle(self, *args, **options):
+        if settings.CONTACT_INGESTION_BACKEND != "redis":
+            raise CommandError(
+                "contact_worker needs CONTACT_INGESTION_BACKEND=redis; "
+                "the local backend is drained by the web process itself"
+            )
+        writer = ContactBatchWriter(RedisContactQueue(settings.REDIS_URL))
+        self.stdout.write(self.style.SUCCESS("✓ Contact worker started"))
+        try:
+            writer.run()
+        except KeyboardInterrupt:
+            writer.drain()
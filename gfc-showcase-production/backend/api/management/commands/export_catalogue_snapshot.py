@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from api.snapshots import build_snapshot
+
+class Command(BaseCommand):
+    help = "Write the catalogue GET responses as content-hashed, pre-compressed JSON files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", help="Output directory (default: CATALOGUE_SNAPSHOT_DIR)")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        manifest = build_snapshot(options["dir"])
+        files = manifest["files"].values()
+        raw = sum(entry["bytes"] for entry in files)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Snapshot of {len(manifest['files'])} responses ({raw / 1e6:.1f}MB raw) "
+                f"written in {time.perf_counter() - start:.1f}s"
+            )
+        )
@@ -0,0 +1,96 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import F, Q
+from api.cache import bump_catalogue_version
+from api.images import (
+    IMAGE_FIELDS,
+    delete_variants,
+    render_variants,
+    store_variants,
+    variant_files,
+)
+from api.models import Product
+from api.snapshots import build_snapshot
+
+
+def batched(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = "Generate responsive WebP/AVIF/JPEG variants for product images across all cores"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Re-render every product image, not just new or changed ones",
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(Q(image_local="") | Q(image_local__isnull=True))
+        if not options["all"]:
+            products = products.exclude(image_source=F("image_local"))
+        products = list(products.order_by("pk"))
+        if not products:
+            self.stdout.write("No product images to process")
+            return
+
+        start = time.perf_counter()
+        source_bytes = variant_bytes = 0
+        failed = []
+        # Worker processes only get image bytes; closing connections first
+        # keeps forked children from sharing the parent's sockets.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            for batch in batched(products, options["workers"] * 4):
+                jobs = []
+                for product in batch:
+                    try:
+                        with product.image_local.open("rb") as f:
+                            source = f.read()
+                    except OSError as exc:
+                        failed.append(f"{product.model_code}: {exc}")
+                        continue
+                    jobs.append((product, source, pool.submit(render_variants, source)))
+                done = []
+                superseded = []
+                for product, source, future in jobs:
+                    try:
+                        rendered = future.result()
+                    except Exception as exc:
+                        failed.append(f"{product.model_code}: {exc}")
+                        continue
+                    superseded += variant_files(product)
+                    store_variants(product, rendered)
+                    source_bytes += len(source)
+                    variant_bytes += sum(
+                        len(content) for width, extension, content in rendered[3]
+                        if width == 640 and extension == "webp"
+                    ) or len(source)
+                    done.append(product)
+                Product.objects.bulk_update(done, IMAGE_FIELDS)
+                # Only now that no product points at them.
+                delete_variants(superseded)
+
+        # bulk_update skips model signals.
+        bump_catalogue_version()
+        if settings.CATALOGUE_SNAPSHOT_AUTO:
+            build_snapshot()
+
+        for message in failed:
+            self.stderr.write(self.style.ERROR(f"✗ {message}"))
+        processed = len(products) - len(failed)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {processed} images processed in {time.perf_counter() - start:.1f}s "
+                f"with {options['workers']} workers; 640w WebP is "
+                f"{variant_bytes / max(source_bytes, 1):.0%} of the source bytes"
+            )
+        )
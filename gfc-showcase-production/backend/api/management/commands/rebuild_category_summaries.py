@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from api.cache import bump_catalogue_version
+from api.categories import rebuild_category_summaries
+
+class Command(BaseCommand):
+    help = "Rebuild the per-category product summaries served by /api/products/categories/"
+
+    def handle(self, *args, **options):
+        rebuild_category_summaries()
+        bump_catalogue_version()
+        self.stdout.write(self.style.SUCCESS("✓ Category summaries rebuilt"))
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+from api.related import rebuild_related_products
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed related-products table"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = rebuild_related_products()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Related products rebuilt for {count} products "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+        )
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from api.search import rebuild_search_index
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index"
+
+    def handle(self, *args, **options):
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS("✓ Search index rebuilt"))
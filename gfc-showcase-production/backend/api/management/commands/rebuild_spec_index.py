@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from api.cache import bump_catalogue_version
+from api.models import ProductSpec
+from api.specs import rebuild_spec_index
+
+class Command(BaseCommand):
+    help = "Rebuild the normalized product specification table used for filters and facets"
+
+    def handle(self, *args, **options):
+        rebuild_spec_index()
+        bump_catalogue_version()
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ Spec index rebuilt with {ProductSpec.objects.count()} values")
+        )
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.cache import bump_catalogue_version
+from api.categories import rebuild_category_summaries
+from api.reviews import recompute_review_rollups
+from api.snapshots import build_snapshot
+
+class Command(BaseCommand):
+    help = "Recompute every product's rating rollups from imported figures and published reviews"
+
+    def handle(self, *args, **options):
+        updated = recompute_review_rollups()
+        rebuild_category_summaries()
+        bump_catalogue_version()
+        if settings.CATALOGUE_SNAPSHOT_AUTO:
+            build_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"✓ Rating rollups recomputed for {updated} products"))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.reservations import release_expired
+
+class Command(BaseCommand):
+    help = "Return the stock of expired reservations, once or every --interval seconds"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Keep sweeping with this many seconds between runs",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            expired = release_expired()
+            self.stdout.write(self.style.SUCCESS(f"✓ {expired} expired reservations released"))
+            if not options["interval"]:
+                return
+            close_old_connections()
+            time.sleep(options["interval"])
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+SQLITE_TABLE = "api_product_search"
+POSTGRES_INDEX = "api_product_search_idx"
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(\"api_product\".\"name\", '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(\"api_product\".\"model_code\", '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(\"api_product\".\"description\", '')), 'B')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SQLITE_TABLE} USING fts5("
+            "name, model_code, description, tokenize = 'unicode61')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SQLITE_TABLE} (rowid, name, model_code, description) "
+            "SELECT id, name, model_code, description FROM api_product"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX {POSTGRES_INDEX} ON api_product USING GIN (({POSTGRES_DOCUMENT}))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {POSTGRES_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_related_products'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='api_product_is_acti_b97ca3_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='api_product_is_feat_fda764_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-is_featured', '-created_at', '-id'], name='product_active_category_order'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['updated_at'], name='product_active_updated'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from api.specs import parse_spec
+
+
+def populate_specs(apps, schema_editor):
+    Product = apps.get_model("api", "Product")
+    ProductSpec = apps.get_model("api", "ProductSpec")
+    rows = []
+    for product_id, specifications in Product.objects.values_list("pk", "specifications").iterator():
+        seen = set()
+        for key, value in (specifications or {}).items():
+            attribute, number, text, unit = parse_spec(key, value)
+            if not attribute or attribute in seen:
+                continue
+            seen.add(attribute)
+            rows.append(ProductSpec(
+                product_id=product_id,
+                attribute=attribute[:64],
+                label=str(key)[:100],
+                value_number=number,
+                value_text=text,
+                unit=unit,
+            ))
+    ProductSpec.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSpec',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attribute', models.SlugField(max_length=64)),
+                ('label', models.CharField(max_length=100)),
+                ('value_number', models.FloatField(blank=True, null=True)),
+                ('value_text', models.CharField(blank=True, max_length=255)),
+                ('unit', models.CharField(blank=True, max_length=16)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spec_values', to='api.product')),
+            ],
+            options={
+                'ordering': ['product', 'attribute'],
+                'indexes': [models.Index(fields=['attribute', 'value_number', 'value_text', 'product'], name='productspec_attribute_number'), models.Index(fields=['attribute', 'value_text', 'product'], name='productspec_attribute_text')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='productspec',
+            constraint=models.UniqueConstraint(fields=('product', 'attribute'), name='unique_product_spec_attribute'),
+        ),
+        migrations.RunPython(populate_specs, migrations.RunPython.noop),
+    ]
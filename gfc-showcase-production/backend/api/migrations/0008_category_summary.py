@@ -0,0 +1,53 @@
+# Generated by Django 4.2.11 on 2026-10-18 02:07
+
+from django.db import migrations, models
+
+from api.categories import SUMMARY_AGGREGATES, summary_values
+
+
+def populate_summaries(apps, schema_editor):
+    Product = apps.get_model("api", "Product")
+    CategorySummary = apps.get_model("api", "CategorySummary")
+    rows = Product.objects.filter(is_active=True).values("category").annotate(
+        **SUMMARY_AGGREGATES
+    ).order_by()
+    # summary_values() also covers fields added by later migrations.
+    fields = {field.name for field in CategorySummary._meta.fields}
+    CategorySummary.objects.bulk_create([
+        CategorySummary(
+            category=row["category"],
+            **{name: value for name, value in summary_values(row).items() if name in fields},
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_product_spec'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('ceiling_fan', 'Ceiling Fan'), ('pedestal_fan', 'Pedestal Fan'), ('bracket_fan', 'Bracket Fan'), ('exhaust_fan', 'Exhaust Fan'), ('air_cooler', 'Air Cooler'), ('washing_machine', 'Washing Machine'), ('dryer', 'Dryer'), ('air_purifier', 'Air Purifier'), ('geyser', 'Geyser')], max_length=20, unique=True)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('featured_count', models.PositiveIntegerField(default=0)),
+                ('min_price_pkr', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_price_pkr', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('avg_price_pkr', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('avg_rating', models.FloatField(blank=True, null=True)),
+                ('total_stock', models.IntegerField(default=0)),
+                ('in_stock_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'category summaries',
+                'ordering': ['category'],
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 4.2.11 on 2026-10-18 02:34
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from api.reviews import rating_expressions
+
+
+def populate_rollups(apps, schema_editor):
+    # The hand-entered figures become the imported baseline of the rollups.
+    Product = apps.get_model("api", "Product")
+    Product.objects.update(
+        imported_rating=F("rating"),
+        imported_review_count=Greatest("review_count", 0),
+    )
+    Product.objects.update(
+        review_count=F("imported_review_count"),
+        rating_sum=F("imported_rating") * F("imported_review_count"),
+    )
+    Product.objects.update(**rating_expressions(F("review_count"), F("rating_sum")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_stock_reservations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Review',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('rating', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)])),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('is_published', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='imported_rating',
+            field=models.FloatField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='imported_review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='weighted_rating',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='rating',
+            field=models.FloatField(default=0, editable=False, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='review_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['weighted_rating', 'id'], name='product_active_weighted'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='api.product'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['product', '-created_at'], name='review_published_product'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.CheckConstraint(check=models.Q(('rating__gte', 1), ('rating__lte', 5)), name='review_rating_range'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.11 on 2026-10-18 03:03
+
+from itertools import groupby
+
+from django.db import migrations, models
+import django.db.models.functions.text
+from django.db.models import F
+from django.db.models.functions import Lower, Trim
+
+
+def normalize_emails(apps, schema_editor):
+    # Lowercase stored addresses, folding case-variant duplicates into the
+    # earliest subscription (active if any of them was).
+    Newsletter = apps.get_model("api", "Newsletter")
+    subscribers = Newsletter.objects.annotate(normalized=Lower(Trim("email")))
+    changed = subscribers.exclude(email=F("normalized")).values("normalized")
+    rows = (
+        subscribers.filter(normalized__in=changed)
+        .order_by("normalized", "subscribed_at", "pk")
+        .values_list("normalized", "pk", "is_active")
+    )
+    for email, group in groupby(rows.iterator(), key=lambda row: row[0]):
+        group = list(group)
+        keep = group[0][1]
+        Newsletter.objects.filter(pk__in=[pk for _, pk, _ in group[1:]]).delete()
+        Newsletter.objects.filter(pk=keep).update(
+            email=email, is_active=any(is_active for _, _, is_active in group)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_product_reviews'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='newsletter',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='newsletter_email_lower_unique'),
+        ),
+    ]
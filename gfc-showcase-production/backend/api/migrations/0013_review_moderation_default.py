@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 03:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_stockreservation_client'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='review',
+            name='is_published',
+            field=models.BooleanField(default=False),
+        ),
+    ]
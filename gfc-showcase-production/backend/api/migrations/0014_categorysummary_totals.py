@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-18 04:12
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def populate_totals(apps, schema_editor):
+    Product = apps.get_model("api", "Product")
+    CategorySummary = apps.get_model("api", "CategorySummary")
+    rows = Product.objects.filter(is_active=True).values("category").annotate(
+        total_price_pkr=Sum("price_pkr"), total_rating=Sum("rating")
+    ).order_by()
+    for row in rows:
+        CategorySummary.objects.filter(category=row["category"]).update(
+            total_price_pkr=row["total_price_pkr"], total_rating=row["total_rating"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_review_moderation_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categorysummary',
+            name='total_price_pkr',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='categorysummary',
+            name='total_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(populate_totals, migrations.RunPython.noop),
+    ]
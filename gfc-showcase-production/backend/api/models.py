@@ -1,5 +1,8 @@
+import uuid
+
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.functions import Lower
 
 class Product(models.Model):
     CATEGORY_CHOICES = [
@@ -22,6 +25,13 @@ class Product(models.Model):
     description = models.TextField()
     image_url = models.URLField()
     image_local = models.ImageField(upload_to="products/", null=True, blank=True)
+    # Filled from image_local by api.images; image_source is the upload
+    # the variants were made from.
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_blurhash = models.CharField(max_length=64, blank=True, editable=False)
+    image_srcset = models.JSONField(default=dict, blank=True, editable=False)
+    image_source = models.CharField(max_length=255, blank=True, editable=False)
     price_pkr = models.DecimalField(max_digits=10, decimal_places=2)
     price_usd = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     
@@ -29,12 +39,22 @@ class Product(models.Model):
     specifications = models.JSONField(default=dict)
     features = models.JSONField(default=list)
     
-    # Rating & Reviews
+    # Rating & Reviews. rating, review_count, rating_sum and
+    # weighted_rating are rollups kept by api.reviews: the imported figures
+    # (entered before reviews were collected) plus every published Review.
     rating = models.FloatField(
         default=0, 
+        validators=[MinValueValidator(0), MaxValueValidator(5)],
+        editable=False
+    )
+    review_count = models.IntegerField(default=0, editable=False)
+    rating_sum = models.FloatField(default=0, editable=False)
+    weighted_rating = models.FloatField(default=0, editable=False)
+    imported_rating = models.FloatField(
+        default=0,
         validators=[MinValueValidator(0), MaxValueValidator(5)]
     )
-    review_count = models.IntegerField(default=0)
+    imported_review_count = models.PositiveIntegerField(default=0)
     
     # Status
     is_active = models.BooleanField(default=True)
@@ -47,12 +67,76 @@ class Product(models.Model):
     
     class Meta:
         ordering = ["-is_featured", "-created_at"]
+        constraints = [
+            # Last line of defence against oversells; api.reservations
+            # never issues a decrement that could break it.
+            models.CheckConstraint(
+                check=models.Q(stock__gte=0),
+                name="product_stock_non_negative"
+            ),
+        ]
         indexes = [
             models.Index(fields=["category"]),
-            models.Index(fields=["is_active"]),
-            models.Index(fields=["is_featured"]),
+            # ProductViewSet only reads active rows, so its indexes are
+            # partial on is_active (SQLite cannot use an is_active prefix
+            # for filter(is_active=True)). `manage.py explain_queries`
+            # fails if an action's query stops being index backed.
+            #
+            # Default ordering; with a leading category for category
+            # filters and the by_category window partition.
+            models.Index(
+                fields=["category", "-is_featured", "-created_at", "-id"],
+                condition=models.Q(is_active=True),
+                name="product_active_category_order",
+            ),
+            # Max(updated_at)/Count validators for conditional GETs.
+            models.Index(
+                fields=["updated_at"],
+                condition=models.Q(is_active=True),
+                name="product_active_updated",
+            ),
+            # One index per ordering, each ending in the id tiebreaker
+            # used by keyset pagination.
+            models.Index(
+                fields=["-is_featured", "-created_at", "-id"],
+                condition=models.Q(is_active=True),
+                name="product_active_default_order",
+            ),
+            models.Index(
+                fields=["price_pkr", "id"],
+                condition=models.Q(is_active=True),
+                name="product_active_price",
+            ),
+            models.Index(
+                fields=["rating", "id"],
+                condition=models.Q(is_active=True),
+                name="product_active_rating",
+            ),
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(is_active=True),
+                name="product_active_created",
+            ),
+            models.Index(
+                fields=["weighted_rating", "id"],
+                condition=models.Q(is_active=True),
+                name="product_active_weighted",
+            ),
         ]
     
+    # Written only by the atomic UPDATEs in api.reviews.
+    ROLLUP_FIELDS = ("rating", "review_count", "rating_sum", "weighted_rating")
+    
+    def save(self, *args, **kwargs):
+        # Leave the rollups out of saves of existing rows, so an edit made
+        # from a stale instance cannot undo reviews posted in the meantime.
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.ROLLUP_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return f"{self.name} ({self.model_code})"
 
@@ -83,6 +167,220 @@ class Newsletter(models.Model):
     email = models.EmailField(unique=True)
     subscribed_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
-    
+
+    class Meta:
+        constraints = [
+            # Addresses are stored lowercased (api.subscriptions); this also
+            # keeps rows written some other way from duplicating by case.
+            models.UniqueConstraint(Lower("email"), name="newsletter_email_lower_unique"),
+        ]
+
     def __str__(self):
         return self.email
+
+
+class RelatedProduct(models.Model):
+    """Precomputed top-N similar products, rebuilt by ``api.related``"""
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="related_links"
+    )
+    related = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="related_from"
+    )
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        ordering = ["product", "rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "rank"],
+                name="unique_related_product_rank"
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class ProductSpec(models.Model):
+    """One typed value from ``Product.specifications``, rebuilt by ``api.specs``"""
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="spec_values"
+    )
+    attribute = models.SlugField(max_length=64)
+    label = models.CharField(max_length=100)
+    value_number = models.FloatField(null=True, blank=True)
+    value_text = models.CharField(max_length=255, blank=True)
+    unit = models.CharField(max_length=16, blank=True)
+    
+    class Meta:
+        ordering = ["product", "attribute"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "attribute"],
+                name="unique_product_spec_attribute"
+            ),
+        ]
+        indexes = [
+            # Range filters seek on (attribute, value_number); facet counts
+            # group by all three value columns straight off the index.
+            models.Index(
+                fields=["attribute", "value_number", "value_text", "product"],
+                name="productspec_attribute_number"
+            ),
+            models.Index(
+                fields=["attribute", "value_text", "product"],
+                name="productspec_attribute_text"
+            ),
+        ]
+    
+    def __str__(self):
+        value = self.value_text if self.value_number is None else f"{self.value_number:g}{self.unit}"
+        return f"{self.product_id} {self.attribute}={value}"
+
+
+class CategorySummary(models.Model):
+    """Aggregates over each category's active products, kept by ``api.categories``"""
+
+    category = models.CharField(
+        max_length=20,
+        choices=Product.CATEGORY_CHOICES,
+        unique=True
+    )
+    product_count = models.PositiveIntegerField(default=0)
+    featured_count = models.PositiveIntegerField(default=0)
+    min_price_pkr = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price_pkr = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    avg_price_pkr = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    avg_rating = models.FloatField(null=True, blank=True)
+    total_stock = models.IntegerField(default=0)
+    in_stock_count = models.PositiveIntegerField(default=0)
+    # Running sums behind the averages, so writes can apply their deltas.
+    total_price_pkr = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_rating = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ["category"]
+        verbose_name_plural = "category summaries"
+    
+    def __str__(self):
+        return f"{self.category}: {self.product_count} products"
+
+
+class StockReservation(models.Model):
+    """Stock held for one checkout, managed by ``api.reservations``"""
+
+    HELD = "held"
+    CONFIRMED = "confirmed"
+    RELEASED = "released"
+    EXPIRED = "expired"
+    STATUS_CHOICES = [
+        (HELD, "Held"),
+        (CONFIRMED, "Confirmed"),
+        (RELEASED, "Released"),
+        (EXPIRED, "Expired"),
+    ]
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    # Hash of who asked for the hold, for the per-client limit on open holds.
+    client = models.CharField(max_length=32, blank=True, editable=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # The expiry sweep only ever looks at held reservations.
+            models.Index(
+                fields=["expires_at"],
+                condition=models.Q(status="held"),
+                name="reservation_held_expiry"
+            ),
+            models.Index(
+                fields=["client", "expires_at"],
+                condition=models.Q(status="held"),
+                name="reservation_held_client"
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.token} ({self.status})"
+
+
+class StockReservationItem(models.Model):
+    reservation = models.ForeignKey(
+        StockReservation,
+        on_delete=models.CASCADE,
+        related_name="items"
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="reservation_items"
+    )
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    
+    class Meta:
+        ordering = ["reservation", "product"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["reservation", "product"],
+                name="unique_reservation_product"
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.reservation_id}: {self.quantity} x {self.product_id}"
+
+
+class Review(models.Model):
+    """One customer review; Product rating rollups follow it via ``api.reviews``"""
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="reviews"
+    )
+    name = models.CharField(max_length=100)
+    rating = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(5)]
+    )
+    title = models.CharField(max_length=200, blank=True)
+    body = models.TextField(blank=True)
+    # New reviews wait for moderation and are not counted until published;
+    # publishing or unpublishing one moves the rating rollups (api.reviews).
+    is_published = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(rating__gte=1, rating__lte=5),
+                name="review_rating_range"
+            ),
+        ]
+        indexes = [
+            # A product's published reviews, newest first; also covers the
+            # per-product aggregates of the rollup repair.
+            models.Index(
+                fields=["product", "-created_at"],
+                condition=models.Q(is_published=True),
+                name="review_published_product"
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id}: {self.rating}/5 by {self.name}"
@@ -0,0 +1,164 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from django.db.models import F, Field, Func, Q, Value
+from django.db.models.lookups import GreaterThan, LessThan
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import SearchFilter
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class RowValue(Func):
+    """A SQL row value, ``(a, b, c)``, for lexicographic comparisons"""
+
+    function = ""
+    template = "(%(expressions)s)"
+    output_field = Field()
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination over a composite keyset with a unique tiebreaker.
+
+    DRF's CursorPagination only keys on the first ordering column and falls
+    back to offsets for ties. Here the cursor stores the value of every
+    ordering column plus ``tiebreaker``, and the next page is selected with
+    ``(a, b, id) < (x, y, z)`` expanded into OR-ed prefix comparisons, so
+    each page is an index range scan with no COUNT(*) and no OFFSET.
+
+    Pages may be model instances or ``values_list()`` tuples; missing
+    ordering columns are appended to the tuple and stripped again.
+
+    Search results are ranked by relevance, which no cursor can key on, so
+    a search with cursor pagination is refused rather than paged out of
+    rank order.
+    """
+
+    tiebreaker = "id"
+    invalid_cursor_message = "Invalid cursor"
+    search_param = SearchFilter.search_param
+    search_message = "Cursor pagination cannot be combined with search; use page numbers."
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(
+            field
+            for field in super().get_ordering(request, queryset, view)
+            if field.lstrip("-") != self.tiebreaker
+        )
+        direction = "-" if ordering and ordering[-1].startswith("-") else ""
+        return ordering + (direction + self.tiebreaker,)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.search_param, "").strip():
+            raise ValidationError({"pagination": [self.search_message]})
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+
+        queryset, width, indexes = self._with_position_fields(queryset)
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self._keyset_filter(ordering, self._decode_position(self.cursor))
+            )
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if indexes is None:
+            self.positions = [self._instance_position(row) for row in rows]
+            self.page = rows
+        else:
+            self.positions = [tuple(row[i] for i in indexes) for row in rows]
+            self.page = [row[:width] for row in rows]
+
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.positions:
+            return None
+        return self._link(self.positions[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.positions:
+            return None
+        return self._link(self.positions[0], reverse=True)
+
+    def _link(self, position, reverse):
+        cursor = Cursor(offset=0, reverse=reverse, position=self._encode_position(position))
+        return self.encode_cursor(cursor)
+
+    def _field_names(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def _with_position_fields(self, queryset):
+        # _fields also names the annotations a values_list() selects.
+        selected = list(queryset._fields or ())
+        if not selected:
+            return queryset, None, None
+        missing = [name for name in self._field_names() if name not in selected]
+        fields = selected + missing
+        indexes = [fields.index(name) for name in self._field_names()]
+        return queryset.values_list(*fields), len(selected), indexes
+
+    def _instance_position(self, instance):
+        return tuple(getattr(instance, name) for name in self._field_names())
+
+    def _keyset_filter(self, ordering, position):
+        descending = {field.startswith("-") for field in ordering}
+        if len(descending) == 1:
+            # Uniform direction: compare row values so the database can
+            # seek straight to the cursor in the matching composite index.
+            fields = [self.model._meta.get_field(f.lstrip("-")) for f in ordering]
+            lhs = RowValue(*[F(field.name) for field in fields])
+            rhs = RowValue(
+                *[Value(value, output_field=field) for field, value in zip(fields, position)]
+            )
+            lookup = LessThan if descending.pop() else GreaterThan
+            return lookup(lhs, rhs)
+
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def _encode_position(self, position):
+        values = []
+        for value in position:
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            values.append(value)
+        return json.dumps([self._field_names(), values], separators=(",", ":"))
+
+    def _decode_position(self, cursor):
+        try:
+            names, values = json.loads(cursor.position)
+            if names != self._field_names() or len(values) != len(names):
+                raise ValueError
+            return [
+                self.model._meta.get_field(name).to_python(value)
+                for name, value in zip(names, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,300 @@
+import atexit
+import logging
+import math
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count
+
+from .cache import bump_catalogue_version
+from .models import Product, RelatedProduct
+
+logger = logging.getLogger(__name__)
+
+RELATED_LIMIT = 4
+BLOCK_SIZE = 256
+# Category outweighs every other signal combined, so products from the
+# same category always rank first and, whenever a category has enough
+# members, only that category needs scoring.
+WEIGHTS = {
+    "category": 0.55,
+    "price": 0.2,
+    "features": 0.2,
+    "specifications": 0.1,
+}
+
+
+def _jaccard(matrix, sizes, rows, columns):
+    intersection = matrix[rows] @ matrix[columns].T
+    union = sizes[rows][:, None] + sizes[columns][None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+class CatalogueVectors:
+    """Active products encoded as arrays for vectorized similarity.
+
+    Similarity is a weighted sum of: same category, price band closeness
+    (1 at equal price, 0 at a 2x difference or more), Jaccard overlap of
+    ``features`` and Jaccard overlap of ``specifications`` keys.
+    """
+
+    def __init__(self, rows):
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.position = {product_id: i for i, product_id in enumerate(self.ids.tolist())}
+
+        category_codes = {}
+        self.categories = np.array(
+            [category_codes.setdefault(row[1], len(category_codes)) for row in rows],
+            dtype=np.int32,
+        )
+        self.members = {
+            code: np.flatnonzero(self.categories == code) for code in category_codes.values()
+        }
+        self.log_prices = np.log(
+            np.maximum(np.array([float(row[2]) for row in rows], dtype=np.float32), 1.0)
+        )
+        self.features, self.feature_sizes = self._encode([row[3] or [] for row in rows])
+        self.spec_keys, self.spec_sizes = self._encode([row[4] or {} for row in rows])
+
+    @staticmethod
+    def _encode(values):
+        vocabulary = {}
+        encoded = [
+            {vocabulary.setdefault(str(item), len(vocabulary)) for item in value}
+            for value in values
+        ]
+        matrix = np.zeros((len(values), max(len(vocabulary), 1)), dtype=np.float32)
+        for i, columns in enumerate(encoded):
+            matrix[i, list(columns)] = 1.0
+        return matrix, matrix.sum(axis=1)
+
+    @classmethod
+    def load(cls, categories=None):
+        """Active products, or only those in ``categories``"""
+        queryset = Product.objects.filter(is_active=True)
+        if categories is not None:
+            queryset = queryset.filter(category__in=categories)
+        rows = list(
+            queryset.order_by("id")
+            .values_list("id", "category", "price_pkr", "features", "specifications")
+        )
+        return cls(rows)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def candidates(self, category, limit=RELATED_LIMIT):
+        """Positions worth scoring for rows of ``category``"""
+        members = self.members[category]
+        if len(members) > limit:
+            return members
+        return np.arange(len(self))
+
+    def similarity(self, rows, columns=None):
+        """Score ``rows`` against ``columns`` (positions), self excluded"""
+        rows = np.asarray(rows, dtype=np.intp)
+        columns = np.arange(len(self)) if columns is None else np.asarray(columns)
+        same_category = self.categories[rows][:, None] == self.categories[columns][None, :]
+        scores = same_category.astype(np.float32) * WEIGHTS["category"]
+        price_gap = np.abs(self.log_prices[rows][:, None] - self.log_prices[columns][None, :])
+        scores += WEIGHTS["price"] * np.clip(1.0 - price_gap / math.log(2.0), 0.0, 1.0)
+        scores += WEIGHTS["features"] * _jaccard(self.features, self.feature_sizes, rows, columns)
+        scores += WEIGHTS["specifications"] * _jaccard(
+            self.spec_keys, self.spec_sizes, rows, columns
+        )
+        scores[rows[:, None] == columns[None, :]] = -np.inf
+        return scores
+
+    def top_related(self, rows, limit=RELATED_LIMIT):
+        """Yield (product_id, [(related_id, score), ...]) best first"""
+        rows = np.asarray(rows, dtype=np.intp)
+        limit = min(limit, len(self) - 1)
+        for category in np.unique(self.categories[rows]):
+            group = rows[self.categories[rows] == category]
+            if limit <= 0:
+                for row in group:
+                    yield int(self.ids[row]), []
+                continue
+            columns = self.candidates(category)
+            for start in range(0, len(group), BLOCK_SIZE):
+                block = group[start:start + BLOCK_SIZE]
+                scores = self.similarity(block, columns)
+                best = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+                for i, row in enumerate(block):
+                    ordered = best[i][np.argsort(-scores[i, best[i]], kind="stable")]
+                    yield int(self.ids[row]), [
+                        (int(self.ids[columns[j]]), float(scores[i, j])) for j in ordered
+                    ]
+
+
+def _links(product_id, related):
+    return [
+        RelatedProduct(product_id=product_id, related_id=related_id, score=score, rank=rank)
+        for rank, (related_id, score) in enumerate(related)
+    ]
+
+
+def rebuild_related_products():
+    """Recompute the whole related-products table"""
+    vectors = CatalogueVectors.load()
+    with transaction.atomic():
+        RelatedProduct.objects.all().delete()
+        links = []
+        for product_id, related in vectors.top_related(np.arange(len(vectors))):
+            links.extend(_links(product_id, related))
+            if len(links) >= 5000:
+                RelatedProduct.objects.bulk_create(links, batch_size=1000)
+                links = []
+        RelatedProduct.objects.bulk_create(links, batch_size=1000)
+    return len(vectors)
+
+
+def linked_owners(product_id):
+    """Ids of products whose related list currently includes ``product_id``"""
+    return set(
+        RelatedProduct.objects.filter(related_id=product_id).values_list("product_id", flat=True)
+    )
+
+
+def _small_positions(vectors):
+    small = [m for m in vectors.members.values() if len(m) <= RELATED_LIMIT]
+    return np.concatenate(small) if small else np.array([], dtype=np.intp)
+
+
+def refresh_related_products(product_id, owners=None):
+    """Incrementally update the table after ``product_id`` changed.
+
+    Pass ``owners`` when the product row is already deleted; see
+    refresh_related_batch().
+    """
+    return refresh_related_batch({product_id: owners or set()})
+
+
+def refresh_related_batch(changes):
+    """Incrementally update the table after the products in ``changes`` changed.
+
+    ``changes`` maps each product id to the owners its deleted links no
+    longer report. Recomputes the products' own lists plus the lists of
+    every product that linked to one of them or that one would now
+    displace. Similarity is symmetric, so one row of scores against a
+    product's candidates tells which lists it now belongs in.
+
+    Lists in a category with more than RELATED_LIMIT members only ever
+    hold products of that category, so only the affected categories and
+    the small ones are loaded, once for the whole batch. The whole
+    catalogue is loaded only when a small category's list, which can hold
+    any product, is recomputed.
+    """
+    changed = set(changes)
+    affected = changed.union(*changes.values()) | set(
+        RelatedProduct.objects.filter(related_id__in=changed).values_list("product_id", flat=True)
+    )
+    sizes = dict(
+        Product.objects.filter(is_active=True).values("category")
+        .annotate(size=Count("pk")).order_by().values_list("category", "size")
+    )
+    small = {category for category, size in sizes.items() if size <= RELATED_LIMIT}
+    categories = set(
+        Product.objects.filter(pk__in=affected, is_active=True)
+        .values_list("category", flat=True)
+    )
+    scoped = not categories & small
+    vectors = CatalogueVectors.load(categories | small) if scoped else CatalogueVectors.load()
+
+    positions = np.array(
+        [vectors.position[pk] for pk in sorted(changed) if pk in vectors.position], dtype=np.intp
+    )
+    if len(positions):
+        weakest = RelatedProduct.objects.filter(rank=RELATED_LIMIT - 1)
+        if scoped:
+            weakest = weakest.filter(product__category__in=categories | small)
+        weakest = dict(weakest.values_list("product_id", "score"))
+    for category in np.unique(vectors.categories[positions]):
+        group = positions[vectors.categories[positions] == category]
+        if len(vectors.members[category]) > RELATED_LIMIT:
+            # Only same-category lists can be entered, and only those
+            # whose categories are small can hold outsiders.
+            columns = np.concatenate([vectors.members[category], _small_positions(vectors)])
+        else:
+            columns = np.arange(len(vectors))
+        others = vectors.ids[columns].tolist()
+        for position, scores in zip(group, vectors.similarity(group, columns).tolist()):
+            product_id = int(vectors.ids[position])
+            for other_id, score in zip(others, scores):
+                if other_id != product_id and (other_id not in weakest or score > weakest[other_id]):
+                    affected.add(other_id)
+
+    if len(affected) > sum(sizes.values()) // 2:
+        return rebuild_related_products()
+    if scoped and affected & set(vectors.ids[_small_positions(vectors)].tolist()):
+        vectors = CatalogueVectors.load()
+
+    rows = [vectors.position[pk] for pk in affected if pk in vectors.position]
+    affected = sorted(affected)
+    with transaction.atomic():
+        for start in range(0, len(affected), 500):
+            RelatedProduct.objects.filter(product_id__in=affected[start:start + 500]).delete()
+        links = []
+        for owner_id, related in vectors.top_related(rows):
+            links.extend(_links(owner_id, related))
+        RelatedProduct.objects.bulk_create(links, batch_size=1000)
+    return len(rows)
+
+
+# Product id -> owners its deleted links no longer report.
+_pending_refreshes = {}
+_refresh_timer = None
+_refresh_lock = threading.Lock()
+_flush_lock = threading.Lock()
+
+
+def flush_related_refresh():
+    """Run the refreshes schedule_related_refresh() has queued, if any"""
+    global _refresh_timer
+    # One flush at a time: two would rewrite the same lists concurrently.
+    with _flush_lock:
+        with _refresh_lock:
+            pending = dict(_pending_refreshes)
+            _pending_refreshes.clear()
+            if _refresh_timer is not None:
+                _refresh_timer.cancel()
+            _refresh_timer = None
+        if not pending:
+            return
+        refresh_related_batch(pending)
+        bump_catalogue_version()
+
+
+def _refresh_in_background():
+    close_old_connections()
+    try:
+        flush_related_refresh()
+    except Exception:
+        logger.exception("Related products refresh failed")
+    finally:
+        close_old_connections()
+
+
+def schedule_related_refresh(product_id, owners=None):
+    """Refresh the related lists touched by ``product_id`` soon.
+
+    Called once the saving transaction commits. One refresh runs every
+    RELATED_REFRESH_DELAY seconds at most, covering every product changed
+    in between, so saves no longer wait for the similarity scoring.
+    """
+    global _refresh_timer
+    delay = settings.RELATED_REFRESH_DELAY
+    with _refresh_lock:
+        _pending_refreshes.setdefault(product_id, set()).update(owners or ())
+        if _refresh_timer is None and delay > 0:
+            _refresh_timer = threading.Timer(delay, _refresh_in_background)
+            _refresh_timer.daemon = True
+            _refresh_timer.start()
+    if delay <= 0:
+        flush_related_refresh()
+
+
+# Refreshes still waiting on the timer would be lost with the process.
+atexit.register(_refresh_in_background)
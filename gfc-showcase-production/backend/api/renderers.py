@@ -0,0 +1,67 @@
+import json
+from itertools import chain
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# What a RawJSON is encoded as until its text is spliced in. Only the
+# string "\x00raw-json" encodes the same way, and encode() checks for it.
+RAW_JSON_PLACEHOLDER = "\x00raw-json"
+ENCODED_PLACEHOLDER = json.dumps(RAW_JSON_PLACEHOLDER)
+
+
+class RawJSON:
+    """The text of a JSON column, to be emitted without decoding it.
+
+    Decoding happens only if an encoder other than RawJSONEncoder meets
+    the value; RawJSONEncoder splices the text into its output as is.
+    """
+
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __eq__(self, other):
+        return isinstance(other, RawJSON) and other.text == self.text
+
+    def __repr__(self):
+        return f"RawJSON({self.text!r})"
+
+    def decode(self):
+        return json.loads(self.text)
+
+
+class RawJSONEncoder(JSONEncoder):
+    """DRF's JSONEncoder, copying RawJSON values into the output verbatim"""
+
+    fragments = None
+
+    def default(self, obj):
+        if isinstance(obj, RawJSON):
+            if self.fragments is None:
+                return obj.decode()
+            self.fragments.append(obj.text)
+            return RAW_JSON_PLACEHOLDER
+        return super().default(obj)
+
+    def encode(self, obj):
+        self.fragments = []
+        try:
+            # Only the split parts are kept, so a large response is not
+            # held three times over while the fragments are joined in.
+            parts = super().encode(obj).split(ENCODED_PLACEHOLDER)
+            fragments = self.fragments
+        finally:
+            self.fragments = None
+        if len(parts) != len(fragments) + 1:
+            # A string in ``obj`` encodes like the placeholder: decode instead.
+            return super().encode(obj)
+        fragments.append("")
+        return "".join(chain.from_iterable(zip(parts, fragments)))
+
+
+class RawJSONRenderer(JSONRenderer):
+    """JSONRenderer for responses holding RawJSON values"""
+
+    encoder_class = RawJSONEncoder
@@ -0,0 +1,255 @@
+import time
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.utils import timezone
+
+from .cache import bump_catalogue_scopes, category_scope, product_scope
+from .categories import flush_summary_refresh, schedule_summary_refresh, summary_rows
+from .models import Product, StockReservation, StockReservationItem
+from .snapshots import schedule_stock_snapshot_rebuild
+
+# Deadlocks between multi-row stock updates (Postgres) and lock timeouts
+# (SQLite) abort the whole transaction, so it is simply re-run.
+WRITE_ATTEMPTS = 3
+SWEEP_BATCH_SIZE = 500
+
+
+class InsufficientStock(Exception):
+    """Raised by reserve_stock() with one ``{"product", "requested", "available"}``
+    dict per item that could not be held"""
+
+    def __init__(self, shortages):
+        super().__init__("Insufficient stock")
+        self.shortages = shortages
+
+
+class TooManyReservations(Exception):
+    """Raised by reserve_stock() when the client already has
+    STOCK_RESERVATION_MAX_OPEN unexpired holds"""
+
+
+def retry_on_conflict(func):
+    for attempt in range(WRITE_ATTEMPTS):
+        try:
+            return func()
+        except OperationalError:
+            if attempt == WRITE_ATTEMPTS - 1:
+                raise
+            time.sleep(0.01 * 2 ** attempt)
+
+
+def merge_items(items):
+    """``[(product_id, quantity), ...]`` to ``{product_id: quantity}``"""
+    quantities = {}
+    for product_id, quantity in items:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def take_stock(quantities, now, using="default"):
+    """Decrement every product in ``{product_id: quantity}`` in one UPDATE.
+
+    Each row is only touched if it still has enough stock when the database
+    applies the write, so concurrent callers can never oversell; the caller
+    compares the returned row count with ``len(quantities)``.
+    """
+    if len(quantities) == 1:
+        [(product_id, needed)] = quantities.items()
+        rows = Product.objects.using(using).filter(pk=product_id)
+    else:
+        needed = Case(
+            *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+            output_field=IntegerField(),
+        )
+        rows = Product.objects.using(using).filter(pk__in=list(quantities))
+    return rows.filter(is_active=True, stock__gte=needed).update(
+        stock=F("stock") - needed, updated_at=now
+    )
+
+
+def return_stock(reservation_ids, now, using="default"):
+    """Add the items of ``reservation_ids`` back to stock in one UPDATE"""
+    items = StockReservationItem.objects.using(using).filter(
+        reservation_id__in=reservation_ids
+    ).order_by()
+    returned = (
+        items.filter(product_id=OuterRef("pk"))
+        .values("product_id").annotate(total=Sum("quantity")).values("total")
+    )
+    return Product.objects.using(using).filter(
+        pk__in=items.values("product_id")
+    ).update(stock=F("stock") + Subquery(returned), updated_at=now)
+
+
+def find_shortages(quantities, using="default"):
+    available = dict(
+        Product.objects.using(using).filter(pk__in=list(quantities), is_active=True)
+        .values_list("pk", "stock")
+    )
+    return [
+        {"product": product_id, "requested": quantity, "available": available.get(product_id, 0)}
+        for product_id, quantity in sorted(quantities.items())
+        if available.get(product_id, 0) < quantity
+    ]
+
+
+def stock_changes(moved, using="default"):
+    """``(old, new)`` summary rows of products whose stock just moved by
+    ``{product_id: delta}``; read inside the writing transaction"""
+    return [
+        ({**row, "stock": row["stock"] - moved[pk]}, row)
+        for pk, row in summary_rows(moved, using=using).items()
+    ]
+
+
+def stock_changed(changes, using="default"):
+    """Invalidate what is derived from stock once a reservation write commits.
+
+    Stock is part of product responses and category summaries; the
+    reservation writes are queryset updates, so no model signals fire.
+    Only the cache scopes of these products and their categories are
+    bumped here; the summaries and cross-category lists follow with the
+    batched summary refresh, and the snapshot with a periodic rebuild.
+    ``changes`` comes from stock_changes().
+    """
+    bump_catalogue_scopes(
+        [product_scope(new["pk"]) for _, new in changes]
+        + [category_scope(category) for category in {new["category"] for _, new in changes}]
+    )
+    if settings.CATALOGUE_SNAPSHOT_AUTO:
+        schedule_stock_snapshot_rebuild()
+    schedule_summary_refresh(changes, using=using)
+
+
+def count_open_holds(client, now, using="default"):
+    return StockReservation.objects.using(using).filter(
+        client=client, status=StockReservation.HELD, expires_at__gt=now
+    ).count()
+
+
+def reserve_stock(items, ttl=None, client="", using="default"):
+    """Hold stock for ``[(product_id, quantity), ...]`` as one reservation.
+
+    All items are held or none are: on a shortfall the decrement is rolled
+    back and InsufficientStock lists the items that could not be met.
+    A ``client`` already holding STOCK_RESERVATION_MAX_OPEN unexpired
+    reservations gets TooManyReservations before any stock is taken.
+    """
+    quantities = merge_items(items)
+    ttl = settings.STOCK_RESERVATION_TTL if ttl is None else ttl
+    max_open = settings.STOCK_RESERVATION_MAX_OPEN
+
+    def attempt():
+        now = timezone.now()
+        if client and max_open and count_open_holds(client, now, using=using) >= max_open:
+            raise TooManyReservations()
+        with transaction.atomic(using=using):
+            if take_stock(quantities, now, using=using) == len(quantities):
+                reservation = StockReservation.objects.using(using).create(
+                    client=client, expires_at=now + timedelta(seconds=ttl)
+                )
+                StockReservationItem.objects.using(using).bulk_create([
+                    StockReservationItem(reservation=reservation, product_id=product_id, quantity=quantity)
+                    for product_id, quantity in quantities.items()
+                ])
+                moved = {product_id: -quantity for product_id, quantity in quantities.items()}
+                transaction.on_commit(
+                    partial(stock_changed, stock_changes(moved, using), using),
+                    using=using,
+                    robust=True,
+                )
+                return reservation
+            # Undo the rows that were decremented before the shortfall.
+            transaction.set_rollback(True, using=using)
+        return None
+
+    reservation = retry_on_conflict(attempt)
+    if reservation is None:
+        raise InsufficientStock(find_shortages(quantities, using=using))
+    return reservation
+
+
+def confirm_reservation(token, using="default"):
+    """Turn a held, unexpired reservation into a sale; False if it is not one.
+
+    The stock was taken by reserve_stock(), so confirming only changes the status.
+    A confirm racing the expiry sweep or a release waits on the row and
+    then sees it is no longer held.
+    """
+    now = timezone.now()
+    return retry_on_conflict(
+        lambda: StockReservation.objects.using(using).filter(
+            token=token, status=StockReservation.HELD, expires_at__gt=now
+        ).update(status=StockReservation.CONFIRMED, closed_at=now)
+    ) == 1
+
+
+def close_reservations(reservation_ids, status, using="default"):
+    """Close the held ones among ``reservation_ids`` and return their stock.
+
+    Each reservation is claimed with a conditional UPDATE, so it is closed,
+    and its stock returned, exactly once even when a confirm, a release and
+    the sweep race for it. Claiming first also makes the first statement a
+    write, which SQLite waits on instead of failing a read-to-write upgrade.
+    """
+
+    def attempt():
+        now = timezone.now()
+        with transaction.atomic(using=using):
+            claimed = [
+                pk for pk in reservation_ids
+                if StockReservation.objects.using(using).filter(
+                    pk=pk, status=StockReservation.HELD
+                ).update(status=status, closed_at=now)
+            ]
+            if not claimed:
+                return 0
+            moved = dict(
+                StockReservationItem.objects.using(using).filter(reservation_id__in=claimed)
+                .order_by().values("product_id").annotate(total=Sum("quantity"))
+                .values_list("product_id", "total")
+            )
+            return_stock(claimed, now, using=using)
+            transaction.on_commit(
+                partial(stock_changed, stock_changes(moved, using), using),
+                using=using,
+                robust=True,
+            )
+        return len(claimed)
+
+    return retry_on_conflict(attempt)
+
+
+def release_reservation(token, using="default"):
+    """Give a held reservation's stock back early; False if it is not held"""
+    ids = list(
+        StockReservation.objects.using(using).filter(token=token).values_list("pk", flat=True)
+    )
+    return close_reservations(ids, StockReservation.RELEASED, using=using) == 1
+
+
+def release_expired(now=None, batch_size=SWEEP_BATCH_SIZE, using="default"):
+    """Return the stock of every lapsed reservation, ``batch_size`` at a time.
+
+    Run periodically (api.tasks or ``manage.py release_expired_reservations``);
+    returns how many reservations expired.
+    """
+    now = now or timezone.now()
+    expired = 0
+    while True:
+        ids = list(
+            StockReservation.objects.using(using).filter(
+                status=StockReservation.HELD, expires_at__lte=now
+            ).order_by("expires_at").values_list("pk", flat=True)[:batch_size]
+        )
+        if ids:
+            expired += close_reservations(ids, StockReservation.EXPIRED, using=using)
+        if len(ids) < batch_size:
+            break
+    # The sweep may run in a process that exits before a timer would fire.
+    flush_summary_refresh(using=using)
+    return expired
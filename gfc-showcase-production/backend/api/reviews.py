@@ -0,0 +1,111 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, NullIf, Round
+from django.utils import timezone
+
+from .cache import bump_catalogue_version
+from .categories import SUMMARY_FIELDS, schedule_summary_refresh
+from .models import Product, Review
+from .snapshots import schedule_snapshot_rebuild
+
+
+def rating_expressions(review_count, rating_sum):
+    """``rating`` and ``weighted_rating`` for the given count and sum.
+
+    weighted_rating is a Bayesian average: REVIEW_PRIOR_WEIGHT virtual
+    ratings of REVIEW_PRIOR_RATING are added to the real ones, so a product
+    with one 5-star review does not outrank one with hundreds of 4.8s.
+    With a prior weight of 0, unrated products get 0 like ``rating``.
+    """
+    prior_weight = settings.REVIEW_PRIOR_WEIGHT
+    return {
+        "rating": Coalesce(Round(rating_sum / NullIf(review_count, 0), 2), 0.0),
+        "weighted_rating": Coalesce(
+            (rating_sum + prior_weight * settings.REVIEW_PRIOR_RATING)
+            / NullIf(review_count + prior_weight, 0),
+            0.0,
+        ),
+    }
+
+
+def weighted_rating(review_count, rating_sum):
+    """rating_expressions()' weighted_rating for plain numbers"""
+    prior_weight = settings.REVIEW_PRIOR_WEIGHT
+    if review_count + prior_weight == 0:
+        return 0.0
+    return (rating_sum + prior_weight * settings.REVIEW_PRIOR_RATING) / (review_count + prior_weight)
+
+
+def ratings_changed(changes, using="default"):
+    """Invalidate what is derived from ratings once a rollup write commits.
+
+    ``changes`` are the ``(old, new)`` summary rows of the rated products.
+    """
+    bump_catalogue_version()
+    if settings.CATALOGUE_SNAPSHOT_AUTO:
+        schedule_snapshot_rebuild()
+    schedule_summary_refresh(changes, using=using)
+
+
+def apply_rating_delta(product_id, count, total, using="default"):
+    """Add ``count`` ratings summing to ``total`` to a product's rollups.
+
+    One UPDATE on the product row, whatever its number of reviews: every
+    SET expression reads the row's values from before the update, so
+    concurrent reviews cannot lose each other's increments. Negative
+    deltas remove ratings.
+    """
+    review_count = F("review_count") + count
+    rating_sum = F("rating_sum") + total
+    products = Product.objects.using(using).filter(pk=product_id)
+    with transaction.atomic(using=using):
+        products.update(
+            review_count=review_count,
+            rating_sum=rating_sum,
+            updated_at=timezone.now(),
+            **rating_expressions(review_count, rating_sum),
+        )
+        # Read back under the write's lock; the rating before it is the
+        # same expression over the counts before it.
+        previous = rating_expressions(F("review_count") - count, F("rating_sum") - total)
+        rows = list(
+            products.annotate(previous_rating=previous["rating"])
+            .values("pk", "previous_rating", *SUMMARY_FIELDS)
+        )
+    changes = []
+    for row in rows:
+        rating = row.pop("previous_rating")
+        changes.append(({**row, "rating": rating}, row))
+    transaction.on_commit(
+        partial(ratings_changed, changes, using), using=using, robust=True
+    )
+
+
+def recompute_review_rollups(product_ids=None, using="default"):
+    """Rebuild rollups from the imported figures and published reviews.
+
+    For repair after writes that skip signals (bulk loads, raw SQL) and
+    after changing the REVIEW_PRIOR_* settings. Two UPDATEs over
+    ``product_ids``, or every product; returns how many rows changed.
+    """
+    published = Review.objects.using(using).filter(
+        product_id=OuterRef("pk"), is_published=True
+    ).order_by().values("product_id")
+    counted = Subquery(published.annotate(count=Count("pk")).values("count"))
+    summed = Subquery(published.annotate(total=Sum("rating")).values("total"))
+
+    products = Product.objects.using(using).all()
+    if product_ids is not None:
+        products = products.filter(pk__in=list(product_ids))
+    with transaction.atomic(using=using):
+        products.update(
+            review_count=F("imported_review_count") + Coalesce(counted, 0),
+            rating_sum=F("imported_rating") * F("imported_review_count") + Coalesce(summed, 0),
+        )
+        return products.update(
+            updated_at=timezone.now(),
+            **rating_expressions(F("review_count"), F("rating_sum")),
+        )
@@ -0,0 +1,134 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+
+from .models import Product
+
+SQLITE_TABLE = "api_product_search"
+SEARCH_FIELDS = ["name", "model_code", "description"]
+
+# Matches on name or model code outrank matches in the description.
+SQLITE_RANK = f"-bm25({SQLITE_TABLE}, 10.0, 10.0, 1.0)"
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(\"api_product\".\"name\", '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(\"api_product\".\"model_code\", '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(\"api_product\".\"description\", '')), 'B')"
+)
+
+
+def search_terms(text):
+    """Split free text into lowercase word tokens"""
+    return re.findall(r"\w+", text.lower())
+
+
+def search_products(queryset, text):
+    """Filter ``queryset`` to rows matching ``text`` and annotate ``search_rank``.
+
+    Every token is matched as a prefix so partial input works for
+    type-ahead. Higher ranks are better on every backend. Databases without
+    a full-text index fall back to ``icontains`` with a constant rank.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+
+    vendor = connections[queryset.db].vendor
+    if vendor == "sqlite":
+        # Join the FTS table once; a correlated bm25() subquery would re-run
+        # the MATCH for every candidate row.
+        match = " AND ".join(f'"{term}"*' for term in terms)
+        return queryset.extra(
+            select={"search_rank": SQLITE_RANK},
+            tables=[SQLITE_TABLE],
+            where=[
+                f"{SQLITE_TABLE}.rowid = \"api_product\".\"id\"",
+                f"{SQLITE_TABLE} MATCH %s",
+            ],
+            params=[match],
+        )
+
+    if vendor == "postgresql":
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        return queryset.filter(
+            RawSQL(
+                f"({POSTGRES_DOCUMENT}) @@ to_tsquery('simple', %s)",
+                [tsquery],
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({POSTGRES_DOCUMENT}, to_tsquery('simple', %s))",
+                [tsquery],
+                output_field=FloatField(),
+            )
+        )
+
+    condition = Q()
+    for term in terms:
+        term_condition = Q()
+        for field in SEARCH_FIELDS:
+            term_condition |= Q(**{f"{field}__icontains": term})
+        condition &= term_condition
+    return queryset.filter(condition).annotate(
+        search_rank=RawSQL("0", [], output_field=FloatField())
+    )
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """Ranked full-text search on the ``search`` query parameter.
+
+    Place after OrderingFilter: results are ordered by rank unless the
+    client asked for an explicit ``ordering``.
+    """
+
+    search_param = SearchFilter.search_param
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        if not text:
+            return queryset
+        if not search_terms(text):
+            return queryset.none()
+        queryset = search_products(queryset, text)
+        if "ordering" not in request.query_params:
+            queryset = queryset.order_by("-search_rank", *queryset.query.order_by)
+        return queryset
+
+
+def index_product(product, using="default"):
+    """Write one product's searchable text to the SQLite FTS table"""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT OR REPLACE INTO {SQLITE_TABLE} (rowid, name, model_code, description) "
+            "VALUES (%s, %s, %s, %s)",
+            [product.pk, product.name, product.model_code, product.description],
+        )
+
+
+def unindex_product(product_id, using="default"):
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", [product_id])
+
+
+def rebuild_search_index(using="default"):
+    """Repopulate the SQLite FTS table, e.g. after bulk writes skip signals"""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    table = Product._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SQLITE_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {SQLITE_TABLE} (rowid, name, model_code, description) "
+            f"SELECT id, name, model_code, description FROM {table}"
+        )
+
@@ -1,7 +1,21 @@
+from django.conf import settings
+from django.db import models
+from django.db.models.functions import Cast
 from rest_framework import serializers
-from .models import Product, Contact, Newsletter
+from rest_framework.settings import api_settings
+from .instrumentation import TimedSerializerMixin, timed
+from .models import (
+    Product,
+    Contact,
+    Newsletter,
+    CategorySummary,
+    Review,
+    StockReservation,
+    StockReservationItem,
+)
+from .renderers import RawJSON
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = [
@@ -12,6 +26,10 @@ class ProductSerializer(serializers.ModelSerializer):
             "tagline",
             "description",
             "image_url",
+            "image_width",
+            "image_height",
+            "image_blurhash",
+            "image_srcset",
             "price_pkr",
             "price_usd",
             "specifications",
@@ -23,13 +41,100 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+def _decimal_to_representation(value):
+    # DecimalField columns come back from the database already quantized
+    # to ``decimal_places``, so formatting matches DRF's DecimalField.
+    if value is None:
+        return "" if api_settings.COERCE_DECIMAL_TO_STRING else None
+    if api_settings.COERCE_DECIMAL_TO_STRING:
+        return "{:f}".format(value)
+    return value
+
+
+def _json_to_representation(text):
+    return None if text is None else RawJSON(text)
+
+
+class ProductRowSerializer:
+    """Fast path producing ProductSerializer's output from values_list() rows.
+
+    Field converters are resolved once per field list instead of walking
+    DRF's per-field ``to_representation`` for every row. JSON columns are
+    selected as text and never decoded: RawJSONRenderer copies them into
+    the response, so only the requested fields cost anything per row.
+    """
+
+    def __init__(self, fields=None):
+        self.fields = list(fields or ProductSerializer.Meta.fields)
+        self.converters = []
+        self.json_columns = {}
+        for index, name in enumerate(self.fields):
+            field = Product._meta.get_field(name)
+            if isinstance(field, models.DecimalField):
+                self.converters.append((index, _decimal_to_representation))
+            elif isinstance(field, models.JSONField):
+                self.converters.append((index, _json_to_representation))
+                self.json_columns[name] = f"{name}_json"
+
+    def rows(self, queryset):
+        """Return a lazy queryset of tuples matching ``self.fields``"""
+        if self.json_columns:
+            queryset = queryset.annotate(**{
+                alias: Cast(name, models.TextField())
+                for name, alias in self.json_columns.items()
+            })
+        return queryset.values_list(*[self.json_columns.get(name, name) for name in self.fields])
+
+    def iter_representation(self, rows):
+        """Yield one dict per row, e.g. while streaming a response"""
+        fields = self.fields
+        converters = self.converters
+        for row in rows:
+            if converters:
+                row = list(row)
+                for index, convert in converters:
+                    row[index] = convert(row[index])
+            yield dict(zip(fields, row))
+
+    def to_representation(self, rows):
+        with timed("serializer"):
+            return list(self.iter_representation(rows))
+
+
+class ProductDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
-        fields = "__all__"
+        # Not "__all__": the rating rollup inputs and the image pipeline's
+        # source and original upload are internal.
+        fields = ProductSerializer.Meta.fields + [
+            "weighted_rating",
+            "is_active",
+            "created_at",
+            "updated_at",
+        ]
+
+
+class CategorySummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    id = serializers.CharField(source="category")
+    name = serializers.CharField(source="get_category_display")
+
+    class Meta:
+        model = CategorySummary
+        fields = [
+            "id",
+            "name",
+            "product_count",
+            "featured_count",
+            "min_price_pkr",
+            "max_price_pkr",
+            "avg_price_pkr",
+            "avg_rating",
+            "total_stock",
+            "in_stock_count",
+        ]
 
 
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Contact
         fields = [
@@ -45,8 +150,64 @@ class ContactSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at"]
 
 
-class NewsletterSerializer(serializers.ModelSerializer):
+class NewsletterSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Newsletter
         fields = ["email", "subscribed_at"]
         read_only_fields = ["subscribed_at"]
+
+
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.filter(is_active=True))
+
+    class Meta:
+        model = Review
+        fields = ["id", "product", "name", "rating", "title", "body", "created_at"]
+        read_only_fields = ["id", "created_at"]
+
+
+class ReservationItemRequestSerializer(serializers.Serializer):
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class ReservationRequestSerializer(serializers.Serializer):
+    """Body of a reservation POST; products are checked by the stock update"""
+
+    items = ReservationItemRequestSerializer(many=True, allow_empty=False, max_length=50)
+    # Seconds to hold the stock; STOCK_RESERVATION_TTL if omitted.
+    ttl = serializers.IntegerField(min_value=60, required=False)
+
+    def validate_items(self, items):
+        limit = settings.STOCK_RESERVATION_MAX_QUANTITY
+        quantities = {}
+        for item in items:
+            quantities[item["product"]] = quantities.get(item["product"], 0) + item["quantity"]
+        over = sorted(product for product, quantity in quantities.items() if quantity > limit)
+        if over:
+            raise serializers.ValidationError(
+                f"At most {limit} of each product per reservation (products {over})"
+            )
+        return items
+
+    def validate_ttl(self, value):
+        if value > settings.STOCK_RESERVATION_MAX_TTL:
+            raise serializers.ValidationError(
+                f"Ensure this value is less than or equal to {settings.STOCK_RESERVATION_MAX_TTL}."
+            )
+        return value
+
+
+class StockReservationItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockReservationItem
+        fields = ["product", "quantity"]
+
+
+class StockReservationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    items = StockReservationItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = StockReservation
+        fields = ["token", "status", "expires_at", "created_at", "closed_at", "items"]
+        read_only_fields = fields
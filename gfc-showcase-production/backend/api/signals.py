@@ -0,0 +1,141 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_catalogue_version
+from .categories import SUMMARY_FIELDS, apply_summary_changes, summary_rows
+from .images import image_changed, refresh_product_image
+from .models import Product, Review
+from .related import linked_owners, schedule_related_refresh
+from .reviews import apply_rating_delta, recompute_review_rollups
+from .search import index_product, unindex_product
+from .snapshots import schedule_snapshot_rebuild
+from .specs import index_product_specs
+
+
+# Registered before the cache invalidation below so that responses cached
+# under the new catalogue version already see the refreshed related and
+# spec tables, rating rollups and category summaries.
+@receiver(post_save, sender=Product)
+def update_rating_rollup(sender, instance, using, created, update_fields=None, **kwargs):
+    imported = {"imported_rating", "imported_review_count"}
+    if created or update_fields is None or imported & set(update_fields):
+        recompute_review_rollups([instance.pk], using=using)
+
+
+@receiver(post_save, sender=Product)
+def update_related_products(sender, instance, using, **kwargs):
+    transaction.on_commit(
+        partial(schedule_related_refresh, instance.pk), using=using, robust=True
+    )
+
+
+@receiver(pre_delete, sender=Product)
+def remember_related_owners(sender, instance, **kwargs):
+    instance._related_owners = linked_owners(instance.pk)
+
+
+@receiver(post_delete, sender=Product)
+def remove_related_products(sender, instance, using, **kwargs):
+    owners = getattr(instance, "_related_owners", ())
+    transaction.on_commit(
+        partial(schedule_related_refresh, instance.pk, owners), using=using, robust=True
+    )
+
+
+@receiver(post_save, sender=Product)
+def update_spec_index(sender, instance, using, update_fields=None, **kwargs):
+    # Deleted products lose their rows through the foreign key cascade.
+    if update_fields is None or "specifications" in update_fields:
+        index_product_specs(instance, using=using)
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_delete, sender=Product)
+def remember_summary_row(sender, instance, using, update_fields=None, **kwargs):
+    instance._summary_row = None
+    if instance.pk is not None and (update_fields is None or SUMMARY_FIELDS & set(update_fields)):
+        instance._summary_row = summary_rows([instance.pk], using=using).get(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+def update_category_summary(sender, instance, using, update_fields=None, **kwargs):
+    if update_fields is not None and not SUMMARY_FIELDS & set(update_fields):
+        return
+    # Read back: the rating rollup above is written with a queryset update.
+    current = summary_rows([instance.pk], using=using).get(instance.pk)
+    apply_summary_changes([(getattr(instance, "_summary_row", None), current)], using=using)
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_category_summary(sender, instance, using, **kwargs):
+    apply_summary_changes([(getattr(instance, "_summary_row", None), None)], using=using)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_catalogue_cache(sender, using, **kwargs):
+    # After commit: a bump inside the transaction lets a concurrent request
+    # cache the pre-change rows under the new version.
+    transaction.on_commit(bump_catalogue_version, using=using, robust=True)
+
+
+@receiver(post_save, sender=Product)
+def update_search_index(sender, instance, using, **kwargs):
+    index_product(instance, using=using)
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_search_index(sender, instance, using, **kwargs):
+    unindex_product(instance.pk, using=using)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def rebuild_catalogue_snapshot(sender, using, **kwargs):
+    if settings.CATALOGUE_SNAPSHOT_AUTO:
+        transaction.on_commit(schedule_snapshot_rebuild, using=using, robust=True)
+
+
+@receiver(post_save, sender=Product)
+def update_image_variants(sender, instance, using, **kwargs):
+    if not image_changed(instance):
+        return
+    render = refresh_product_image
+    if settings.IMAGE_PROCESSING_MODE == "celery":
+        # Celery is only needed in this mode.
+        from .tasks import render_product_image
+
+        render = render_product_image.delay
+    transaction.on_commit(partial(render, instance.pk, using), using=using, robust=True)
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, using, **kwargs):
+    instance._previous_rating = None
+    if instance.pk is not None:
+        instance._previous_rating = (
+            Review.objects.using(using).filter(pk=instance.pk, is_published=True)
+            .values_list("product_id", "rating").first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def update_product_rating(sender, instance, using, **kwargs):
+    previous = getattr(instance, "_previous_rating", None)
+    current = (instance.product_id, instance.rating) if instance.is_published else None
+    if previous == current:
+        return
+    if previous is not None:
+        apply_rating_delta(previous[0], -1, -previous[1], using=using)
+    if current is not None:
+        apply_rating_delta(current[0], 1, current[1], using=using)
+
+
+@receiver(post_delete, sender=Review)
+def remove_product_rating(sender, instance, using, **kwargs):
+    if instance.is_published:
+        apply_rating_delta(instance.product_id, -1, -instance.rating, using=using)
@@ -0,0 +1,330 @@
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.test import APIRequestFactory
+
+from .cache import get_catalogue_version
+from .models import Product
+from .streaming import brotli, negotiate_encoding
+
+try:
+    import fcntl
+except ImportError:  # Windows; builds then only serialize within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".build.lock"
+
+_build_lock = threading.Lock()
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _write_variants(directory, name, content):
+    """Write ``content`` with its gzip/brotli variants under hashed names"""
+    digest = hashlib.sha256(content).hexdigest()
+    base = f"{name}.{digest[:16]}.json"
+    entry = {"path": base, "sha256": digest, "bytes": len(content)}
+    variants = [("gzip", ".gz", lambda: gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(("br", ".br", lambda: brotli.compress(content, quality=11)))
+    # Unchanged outputs keep their names, so they are not rewritten.
+    if not (directory / base).exists():
+        _write_atomic(directory / base, content)
+    for encoding, suffix, compress in variants:
+        if not (directory / (base + suffix)).exists():
+            _write_atomic(directory / (base + suffix), compress())
+        entry[encoding] = base + suffix
+    return entry
+
+
+def _snapshot_requests():
+    """(file name, path, action, detail, pk) for every snapshot output"""
+    yield "products.featured", "/api/products/featured/", "featured", False, None
+    yield "products.by_category", "/api/products/by_category/", "by_category", False, None
+    yield "products.categories", "/api/products/categories/", "categories", False, None
+    pks = Product.objects.filter(is_active=True).order_by("pk").values_list("pk", flat=True)
+    for pk in pks.iterator():
+        yield f"products.{pk}", f"/api/products/{pk}/", "retrieve", True, pk
+
+
+@contextmanager
+def build_lock(directory):
+    """Serialize snapshot builds into ``directory``, across threads and processes.
+
+    An overlapping build would delete the files of the other's manifest.
+    """
+    with _build_lock, open(directory / LOCK_NAME, "a") as lock_file:
+        if fcntl is not None:
+            # Released when the file is closed.
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def build_snapshot(directory=None):
+    """Render the catalogue endpoints to content-hashed files plus a manifest.
+
+    Each output comes from the real ProductViewSet action, so a snapshot
+    is byte-identical to the API response for the same catalogue. List
+    pages are rendered until ``next`` runs out. Files older than the
+    previous manifest and referenced by neither it nor this one are removed.
+
+    The manifest records the catalogue version the build started from;
+    the snapshot is served until the next version bump.
+    """
+    directory = Path(directory or settings.CATALOGUE_SNAPSHOT_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    with build_lock(directory):
+        return _build_snapshot(directory)
+
+
+def _build_snapshot(directory):
+    from .views import ProductViewSet
+
+    base_url = urlsplit(settings.CATALOGUE_SNAPSHOT_BASE_URL)
+    factory = APIRequestFactory()
+    version = get_catalogue_version()
+
+    def render(path, action, detail, pk):
+        view = ProductViewSet.as_view(
+            {"get": action}, detail=detail, throttle_classes=[]
+        )
+        request = factory.get(
+            path, HTTP_HOST=base_url.netloc, secure=base_url.scheme == "https"
+        )
+        response = view(request, **({"pk": str(pk)} if detail else {}))
+        if hasattr(response, "render"):
+            response.render()
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}")
+        return response.content
+
+    files = {}
+    page = 1
+    while True:
+        path = "/api/products/" if page == 1 else f"/api/products/?page={page}"
+        content = render(path, "list", False, None)
+        files[path] = _write_variants(directory, f"products.list.{page}", content)
+        if json.loads(content)["next"] is None:
+            break
+        page += 1
+    for name, path, action, detail, pk in _snapshot_requests():
+        files[path] = _write_variants(directory, name, render(path, action, detail, pk))
+
+    manifest = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "version": version,
+        "base_url": settings.CATALOGUE_SNAPSHOT_BASE_URL,
+        "files": files,
+    }
+    previous = read_manifest(directory)
+    try:
+        previous_mtime = (directory / MANIFEST_NAME).stat().st_mtime_ns
+    except FileNotFoundError:
+        previous_mtime = None
+    _write_atomic(
+        directory / MANIFEST_NAME, json.dumps(manifest, indent=2).encode("utf-8")
+    )
+    if previous_mtime is None:
+        return manifest
+
+    keep = {MANIFEST_NAME}
+    for snapshot in (manifest, previous):
+        for entry in (snapshot or {}).get("files", {}).values():
+            keep.update(entry[key] for key in ("path", "gzip", "br") if key in entry)
+    for path in directory.iterdir():
+        if path.name in keep or path.name.startswith(".") or not path.is_file():
+            continue
+        # Anything newer belongs to a build this lock cannot see, e.g.
+        # one writing into a directory shared between hosts.
+        if path.stat().st_mtime_ns < previous_mtime:
+            path.unlink(missing_ok=True)
+    return manifest
+
+
+def read_manifest(directory=None):
+    path = Path(directory or settings.CATALOGUE_SNAPSHOT_DIR) / MANIFEST_NAME
+    try:
+        with open(path, "rb") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class SnapshotReader:
+    """Serve snapshot files, re-reading the manifest only when it changes.
+
+    Snapshot files are named by content hash and never change, so their
+    bytes can be kept in memory once read.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.manifest = None
+        self.manifest_mtime = None
+        self.contents = {}
+
+    def get_manifest(self):
+        path = Path(settings.CATALOGUE_SNAPSHOT_DIR) / MANIFEST_NAME
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self.lock:
+            if mtime != self.manifest_mtime:
+                self.manifest = read_manifest()
+                self.manifest_mtime = mtime
+                self.contents = {}
+            return self.manifest
+
+    def read(self, name):
+        with self.lock:
+            content = self.contents.get(name)
+        if content is None:
+            content = (Path(settings.CATALOGUE_SNAPSHOT_DIR) / name).read_bytes()
+            with self.lock:
+                self.contents[name] = content
+        return content
+
+
+reader = SnapshotReader()
+
+
+def snapshot_path(request):
+    """The manifest key for ``request``, or None if no snapshot can match"""
+    params = dict(request.query_params.lists())
+    if not params:
+        return request.path
+    if request.path == "/api/products/" and list(params) == ["page"] and len(params["page"]) == 1:
+        page = params["page"][0]
+        return request.path if page == "1" else f"{request.path}?page={page}"
+    return None
+
+
+def snapshot_response(request):
+    """The snapshot response for ``request``, or None to serve it live"""
+    manifest = reader.get_manifest()
+    path = snapshot_path(request)
+    entry = manifest and path and manifest["files"].get(path)
+    if (
+        not entry
+        or request.build_absolute_uri("/").rstrip("/")
+        != manifest["base_url"].rstrip("/")
+        or manifest.get("version") != get_catalogue_version()
+    ):
+        return None
+
+    encoding = negotiate_encoding(request)
+    name = entry.get(encoding) if encoding else None
+    try:
+        content = reader.read(name or entry["path"])
+    except OSError:
+        # A file removed under a manifest being replaced; serve live.
+        return None
+    response = HttpResponse(content, content_type="application/json")
+    if name:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+def serve_catalogue_snapshot(view_method):
+    """Answer from the catalogue snapshot when it matches the live catalogue.
+
+    Place below cache_catalogue_response: snapshot responses carry bytes,
+    not data, and are never cached.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if settings.CATALOGUE_SNAPSHOT_SERVE:
+            response = snapshot_response(request)
+            if response is not None:
+                return response
+        return view_method(self, request, *args, **kwargs)
+
+    return wrapper
+
+
+_rebuild_timer = None
+_rebuild_lock = threading.Lock()
+
+
+def _rebuild():
+    global _rebuild_timer
+    with _rebuild_lock:
+        _rebuild_timer = None
+    close_old_connections()
+    try:
+        build_snapshot()
+    except Exception:
+        logger.exception("Catalogue snapshot rebuild failed")
+    finally:
+        close_old_connections()
+
+
+def flush_snapshot_rebuild():
+    """Run the rebuild a schedule function has queued, if any, right away"""
+    with _rebuild_lock:
+        if _rebuild_timer is None:
+            return
+        _rebuild_timer.cancel()
+    _rebuild()
+
+
+# A rebuild still waiting on the timer would be lost with the process.
+atexit.register(flush_snapshot_rebuild)
+
+
+def _start_rebuild_timer(delay):
+    global _rebuild_timer
+    _rebuild_timer = threading.Timer(delay, _rebuild)
+    _rebuild_timer.daemon = True
+    _rebuild_timer.start()
+
+
+def schedule_snapshot_rebuild():
+    """Rebuild the snapshot in the background once edits settle.
+
+    Edits within CATALOGUE_SNAPSHOT_DELAY seconds of each other share one
+    rebuild. Until it finishes the old snapshot no longer matches the
+    catalogue, so the API serves live data.
+    """
+    with _rebuild_lock:
+        if _rebuild_timer is not None:
+            _rebuild_timer.cancel()
+        _start_rebuild_timer(settings.CATALOGUE_SNAPSHOT_DELAY)
+
+
+def schedule_stock_snapshot_rebuild():
+    """Rebuild the snapshot to pick up stock changes, at most every
+    CATALOGUE_SNAPSHOT_STOCK_DELAY seconds.
+
+    Stock writes do not bump the catalogue version, so the snapshot keeps
+    being served meanwhile. A pending rebuild is never pushed back.
+    """
+    with _rebuild_lock:
+        if _rebuild_timer is None:
+            _start_rebuild_timer(settings.CATALOGUE_SNAPSHOT_STOCK_DELAY)
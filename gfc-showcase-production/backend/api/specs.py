@@ -0,0 +1,202 @@
+import re
+
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Product, ProductSpec
+
+# Unit spellings found in specifications, mapped to (unit code, factor to
+# that unit). The code becomes the attribute suffix, so "Power: 65W" is
+# stored as power_w = 65 and "Warranty: 2 Years" as warranty_months = 24.
+UNITS = {
+    "w": ("w", 1),
+    "watt": ("w", 1),
+    "watts": ("w", 1),
+    "kw": ("w", 1000),
+    "v": ("v", 1),
+    "volts": ("v", 1),
+    "in": ("in", 1),
+    "inch": ("in", 1),
+    "inches": ("in", 1),
+    '"': ("in", 1),
+    "mm": ("mm", 1),
+    "cm": ("cm", 1),
+    "kg": ("kg", 1),
+    "l": ("l", 1),
+    "litre": ("l", 1),
+    "litres": ("l", 1),
+    "liter": ("l", 1),
+    "liters": ("l", 1),
+    "rpm": ("rpm", 1),
+    "cfm": ("cfm", 1),
+    "m³/h": ("m3h", 1),
+    "m3/h": ("m3h", 1),
+    "sqm": ("sqm", 1),
+    "month": ("months", 1),
+    "months": ("months", 1),
+    "year": ("months", 12),
+    "years": ("months", 12),
+}
+NUMBER_RE = re.compile(r"^(-?\d+(?:\.\d+)?)\s*(.*)$")
+RANGE_LOOKUPS = ("lt", "lte", "gt", "gte")
+FILTER_RE = re.compile(r"^([a-z0-9_]+?)__(lt|lte|gt|gte|in)$")
+
+
+def spec_slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", str(text).lower()).strip("_")
+
+
+def parse_spec(key, value):
+    """Normalize one specifications entry to ``(attribute, number, text, unit)``.
+
+    Numbers with a known unit, or none, are stored as ``number`` in the
+    unit's base; anything else ("Large Room", "35-45 sqm") is kept as
+    ``text`` under the plain key slug.
+    """
+    attribute = spec_slug(key)
+    text = str(value).strip()
+    match = NUMBER_RE.match(text)
+    if match:
+        number = float(match.group(1))
+        unit_text = match.group(2).strip().lower()
+        if not unit_text:
+            return attribute, number, "", ""
+        if unit_text in UNITS:
+            unit, factor = UNITS[unit_text]
+            if attribute != unit and not attribute.endswith(f"_{unit}"):
+                attribute = f"{attribute}_{unit}"
+            return attribute, number * factor, "", unit
+    return attribute, None, text[:255], ""
+
+
+def spec_rows(product_id, specifications):
+    """Unsaved ProductSpec rows for one product's specifications"""
+    rows = {}
+    for key, value in (specifications or {}).items():
+        attribute, number, text, unit = parse_spec(key, value)
+        if not attribute:
+            continue
+        # The first spelling wins if two keys normalize to one attribute.
+        rows.setdefault(attribute, ProductSpec(
+            product_id=product_id,
+            attribute=attribute[:64],
+            label=str(key)[:100],
+            value_number=number,
+            value_text=text,
+            unit=unit,
+        ))
+    return list(rows.values())
+
+
+def index_product_specs(product, using="default"):
+    """Replace one product's rows with its current specifications"""
+    with transaction.atomic(using=using):
+        ProductSpec.objects.using(using).filter(product_id=product.pk).delete()
+        ProductSpec.objects.using(using).bulk_create(
+            spec_rows(product.pk, product.specifications)
+        )
+
+
+def rebuild_spec_index(using="default"):
+    """Repopulate the whole spec table, e.g. after bulk writes skip signals"""
+    with transaction.atomic(using=using):
+        ProductSpec.objects.using(using).all().delete()
+        rows = []
+        products = Product.objects.using(using).values_list("pk", "specifications")
+        for product_id, specifications in products.iterator(chunk_size=2000):
+            rows.extend(spec_rows(product_id, specifications))
+            if len(rows) >= 5000:
+                ProductSpec.objects.using(using).bulk_create(rows, batch_size=1000)
+                rows = []
+        ProductSpec.objects.using(using).bulk_create(rows, batch_size=1000)
+
+
+def _number(param, value):
+    try:
+        return float(value)
+    except ValueError:
+        raise ValidationError({param: [f"'{value}' is not a number"]})
+
+
+class ProductSpecFilter(BaseFilterBackend):
+    """Filter on normalized specifications, e.g. ``?power_w__lte=70``.
+
+    ``<attribute>__lt|lte|gt|gte`` compare numbers; ``<attribute>__in``
+    takes a comma separated list of numbers or text values. Parameters
+    naming a Product field are left to the other backends.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        product_fields = {field.name for field in Product._meta.get_fields()}
+        for param, value in request.query_params.items():
+            match = FILTER_RE.match(param)
+            if not match or match.group(1) in product_fields:
+                continue
+            attribute, lookup = match.groups()
+            if lookup in RANGE_LOOKUPS:
+                condition = Q(**{f"value_number__{lookup}": _number(param, value)})
+            else:
+                values = [item.strip() for item in value.split(",") if item.strip()]
+                if not values:
+                    raise ValidationError({param: ["Enter at least one value"]})
+                numbers = []
+                for item in values:
+                    try:
+                        numbers.append(float(item))
+                    except ValueError:
+                        pass
+                condition = Q(value_text__in=values) | Q(value_number__in=numbers)
+            # An IN subquery seeks the (attribute, value) index once instead
+            # of probing the spec table for every candidate product.
+            matching = ProductSpec.objects.filter(condition, attribute=attribute)
+            queryset = queryset.filter(pk__in=matching.values("product_id"))
+        return queryset
+
+
+def _plain(number):
+    return int(number) if number.is_integer() else number
+
+
+def facet_rows(queryset):
+    """The single aggregate behind facet_counts(), as a lazy queryset"""
+    return (
+        ProductSpec.objects.filter(product__in=queryset.order_by().values("pk"))
+        .values("attribute", "value_number", "value_text")
+        .annotate(label=Min("label"), unit=Min("unit"), count=Count("product_id"))
+        .order_by("attribute", "value_number", "value_text")
+    )
+
+
+def facet_counts(queryset):
+    """Product counts per spec value over ``queryset``, in one aggregate query.
+
+    Returns ``{attribute: {"label", "unit", "min", "max", "values"}}`` with
+    values in index order; ``min``/``max`` are None for text-only facets.
+    Counts reflect every active filter, including ones on the facet itself.
+    """
+    return build_facets(facet_rows(queryset))
+
+
+def build_facets(rows):
+    facets = {}
+    for row in rows:
+        facet = facets.setdefault(row["attribute"], {
+            "label": row["label"],
+            "unit": row["unit"],
+            "min": None,
+            "max": None,
+            "values": [],
+        })
+        number = row["value_number"]
+        if number is None:
+            value = row["value_text"]
+        else:
+            value = _plain(number)
+            facet["unit"] = facet["unit"] or row["unit"]
+            if facet["min"] is None:
+                facet["min"] = value
+            facet["max"] = value
+        facet["values"].append({"value": value, "count": row["count"]})
+    return facets
@@ -0,0 +1,122 @@
+import json
+import zlib
+
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .renderers import RawJSONEncoder
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+STREAM_CHUNK_SIZE = 2000
+BUFFER_BYTES = 64 * 1024
+
+
+def negotiate_encoding(request):
+    """Pick "br" or "gzip" from Accept-Encoding, or None for identity"""
+    accepted = {}
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+
+    def acceptable(coding):
+        return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and acceptable("br"):
+        return "br"
+    if acceptable("gzip"):
+        return "gzip"
+    return None
+
+
+class JSONArrayChunker:
+    """Encode items as one JSON array, emitting chunks of about BUFFER_BYTES"""
+
+    def __init__(self):
+        self.encoder = RawJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        self.buffer = ["["]
+        self.size = 1
+        self.empty = True
+
+    def add(self, item):
+        """Buffer ``item``; returns a chunk once the buffer is full, else None"""
+        text = self.encoder.encode(item)
+        if not self.empty:
+            text = "," + text
+        self.empty = False
+        self.buffer.append(text)
+        self.size += len(text)
+        if self.size < BUFFER_BYTES:
+            return None
+        chunk = "".join(self.buffer).encode("utf-8")
+        self.buffer = []
+        self.size = 0
+        return chunk
+
+    def close(self):
+        self.buffer.append("]")
+        return "".join(self.buffer).encode("utf-8")
+
+
+class ChunkCompressor:
+    """Compress a byte stream, flushing after every chunk so it is sent promptly"""
+
+    def __init__(self, encoding):
+        self.brotli = encoding == "br"
+        if self.brotli:
+            self.compressor = brotli.Compressor(quality=4)
+        else:
+            self.compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def process(self, chunk):
+        if self.brotli:
+            return self.compressor.process(chunk) + self.compressor.flush()
+        return self.compressor.compress(chunk) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.brotli:
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+def json_array_chunks(items):
+    """Encode ``items`` as one JSON array in chunks of about BUFFER_BYTES"""
+    chunker = JSONArrayChunker()
+    for item in items:
+        chunk = chunker.add(item)
+        if chunk:
+            yield chunk
+    yield chunker.close()
+
+
+def compress_chunks(chunks, encoding):
+    """Compress ``chunks`` with gzip or brotli as they are produced"""
+    compressor = ChunkCompressor(encoding)
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def streaming_json_response(request, items):
+    """Stream ``items`` as a JSON array, compressed as the client accepts"""
+    encoding = negotiate_encoding(request)
+    chunks = json_array_chunks(items)
+    if encoding is not None:
+        chunks = compress_chunks(chunks, encoding)
+    response = StreamingHttpResponse(chunks, content_type="application/json")
+    if encoding is not None:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
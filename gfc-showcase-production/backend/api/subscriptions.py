@@ -0,0 +1,73 @@
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connections
+from django.utils import timezone
+
+from .models import Newsletter
+
+# Three parameters per row keeps each statement under SQLite's 999 limit.
+INSERT_CHUNK_SIZE = 300
+
+
+def normalize_emails(emails):
+    """Return (unique normalized emails in input order, invalid inputs).
+
+    Addresses are stored lowercased, so case variants of a subscribed
+    address count as existing; addresses too long for the column are
+    invalid rather than a database error.
+    """
+    max_length = Newsletter._meta.get_field("email").max_length
+    seen = {}
+    invalid = []
+    for raw in emails:
+        email = str(raw).strip().lower() if raw is not None else ""
+        try:
+            if len(email) > max_length:
+                raise ValidationError("Email address is too long")
+            validate_email(email)
+        except ValidationError:
+            invalid.append(raw)
+            continue
+        seen.setdefault(email, None)
+    return list(seen), invalid
+
+
+def subscribe(emails, using="default"):
+    """Insert normalized ``emails`` and return the set that was new.
+
+    Each chunk is one ``INSERT ... ON CONFLICT DO NOTHING RETURNING``
+    statement (SQLite 3.35+ and Postgres), so there is no SELECT-then-INSERT
+    race and existing subscribers are left untouched. No conflict target:
+    the case-insensitive constraint counts as an existing subscriber too.
+    """
+    connection = connections[using]
+    if connection.vendor not in ("sqlite", "postgresql"):
+        existing = set(
+            Newsletter.objects.using(using)
+            .filter(email__in=emails)
+            .values_list("email", flat=True)
+        )
+        Newsletter.objects.using(using).bulk_create(
+            [Newsletter(email=email) for email in emails], ignore_conflicts=True
+        )
+        return set(emails) - existing
+
+    table = connection.ops.quote_name(Newsletter._meta.db_table)
+    subscribed_at = Newsletter._meta.get_field("subscribed_at").get_db_prep_value(
+        timezone.now(), connection
+    )
+    created = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(emails), INSERT_CHUNK_SIZE):
+            chunk = emails[start:start + INSERT_CHUNK_SIZE]
+            rows = ", ".join(["(%s, %s, %s)"] * len(chunk))
+            params = []
+            for email in chunk:
+                params.extend([email, subscribed_at, True])
+            cursor.execute(
+                f"INSERT INTO {table} (email, subscribed_at, is_active) VALUES {rows} "
+                "ON CONFLICT DO NOTHING RETURNING email",
+                params,
+            )
+            created.update(email for (email,) in cursor.fetchall())
+    return created
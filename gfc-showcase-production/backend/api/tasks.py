@@ -0,0 +1,16 @@
+from celery import shared_task
+
+from .images import refresh_product_image
+from .reservations import release_expired
+
+
+@shared_task
+def release_expired_reservations():
+    """Return lapsed reservation holds to stock; scheduled by Celery beat"""
+    return release_expired()
+
+
+@shared_task
+def render_product_image(product_id, using="default"):
+    """Render a product's image variants; queued by the Product post_save signal"""
+    refresh_product_image(product_id, using=using)
@@ -0,0 +1,34 @@
+import logging
+
+from django.test.utils import override_settings
+from rest_framework.test import APITestCase
+
+from api.benchmarks import build_products
+from api.models import Product
+
+
+@override_settings(
+    ALLOWED_HOSTS=["testserver"],
+    CATALOGUE_CACHE_ENABLED=False,
+    CATALOGUE_SNAPSHOT_SERVE=False,
+    THROTTLE_ENABLED=False,
+)
+class CatalogueTestCase(APITestCase):
+    """Synthetic products saved without signals; caching and throttling off"""
+
+    product_count = 30
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # One JSON log line per request would drown the test output.
+        logger = logging.getLogger("api.requests")
+        cls.addClassCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.WARNING)
+
+    @classmethod
+    def setUpTestData(cls):
+        products = build_products(cls.product_count)
+        for product in products:
+            product.is_active = True
+        cls.products = Product.objects.bulk_create(products)
@@ -0,0 +1,52 @@
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+
+from api.async_views import AsyncProductViewSet
+from api.related import rebuild_related_products
+
+from .base import CatalogueTestCase
+
+
+async def read_stream(response):
+    return b"".join([chunk async for chunk in response.streaming_content])
+
+
+class AsyncProductViewSetTests(CatalogueTestCase):
+    """Each coroutine action answers exactly like its ProductViewSet action"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        rebuild_related_products()
+
+    def get_async(self, action, url, detail=False):
+        view = AsyncProductViewSet.as_async_view({"get": action}, detail=detail)
+        kwargs = {"pk": url.split("/")[3]} if detail else {}
+        return async_to_sync(view)(AsyncRequestFactory().get(url), **kwargs)
+
+    def test_actions_match_sync(self):
+        pk = self.products[0].pk
+        for action, url, detail in [
+            ("list", "/api/products/?page=2", False),
+            ("list", "/api/products/?fields=id,name,specifications", False),
+            ("retrieve", f"/api/products/{pk}/", True),
+            ("related", f"/api/products/{pk}/related/", True),
+            ("featured", "/api/products/featured/", False),
+            ("by_category", "/api/products/by_category/", False),
+            ("batch", f"/api/products/batch/?ids={pk}", False),
+            ("facets", "/api/products/facets/", False),
+            ("categories", "/api/products/categories/", False),
+        ]:
+            with self.subTest(url=url):
+                response = self.get_async(action, url, detail)
+                expected = self.client.get(url)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.render().content, expected.content)
+                self.assertEqual(response.get("ETag"), expected.get("ETag"))
+
+    def test_stream_is_async(self):
+        url = "/api/products/?stream=true"
+        response = self.get_async("list", url)
+        self.assertTrue(response.is_async)
+        expected = b"".join(self.client.get(url).streaming_content)
+        self.assertEqual(async_to_sync(read_stream)(response), expected)
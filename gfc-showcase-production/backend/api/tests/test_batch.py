@@ -0,0 +1,57 @@
+from django.test.utils import override_settings
+
+from api.cache import bump_catalogue_version
+from api.models import Product
+from api.views import BATCH_MAX_PRODUCTS
+
+from .base import CatalogueTestCase
+
+
+class BatchTests(CatalogueTestCase):
+    product_count = 4
+
+    def batch(self, **params):
+        return self.client.get("/api/products/batch/", params)
+
+    def test_results_follow_request_order(self):
+        first, second, third, inactive = self.products
+        Product.objects.filter(pk=inactive.pk).update(is_active=False)
+        ids = [third.pk, 999999, first.pk, third.pk, inactive.pk, second.pk]
+        response = self.batch(ids=",".join(map(str, ids)))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([row["id"] for row in data["results"]], [third.pk, first.pk, second.pk])
+        self.assertEqual(data["missing"], [999999, inactive.pk])
+
+        codes = [second.model_code, "GFC-NONE", first.model_code]
+        data = self.batch(model_codes=",".join(codes)).json()
+        self.assertEqual([row["id"] for row in data["results"]], [second.pk, first.pk])
+        self.assertEqual(data["missing"], ["GFC-NONE"])
+
+    def test_bad_requests(self):
+        pk = str(self.products[0].pk)
+        for params in (
+            {},
+            {"ids": pk, "model_codes": self.products[0].model_code},
+            {"ids": "1,two"},
+            {"ids": ","},
+            {"ids": ",".join(map(str, range(1, BATCH_MAX_PRODUCTS + 2)))},
+        ):
+            with self.subTest(params=params):
+                with self.assertLogs("django.request", "WARNING"):
+                    response = self.batch(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+    @override_settings(CATALOGUE_CACHE_ENABLED=True)
+    def test_cached_fragments_keep_order_and_misses(self):
+        # The local-memory cache outlives each test's rollback.
+        bump_catalogue_version()
+        first, second, third, _ = self.products
+        self.batch(ids=f"{second.pk}")
+        with self.assertNumQueries(2):  # validators, the uncached products
+            data = self.batch(ids=f"{third.pk},{second.pk},999999,{first.pk}").json()
+        self.assertEqual([row["id"] for row in data["results"]], [third.pk, second.pk, first.pk])
+        self.assertEqual(data["missing"], [999999])
+        with self.assertNumQueries(2):  # validators, the miss again
+            self.assertEqual(self.batch(ids=f"{third.pk},{second.pk},999999,{first.pk}").json(), data)
@@ -0,0 +1,87 @@
+from django.db.models import F
+from django.test.utils import override_settings
+
+from api.cache import bump_catalogue_version, get_catalogue_version
+from api.categories import flush_summary_refresh
+from api.checks import check_shared_catalogue_cache
+from api.models import Product
+from api.reservations import stock_changed, stock_changes
+
+from .base import CatalogueTestCase
+
+
+@override_settings(CATALOGUE_SNAPSHOT_AUTO=False, RELATED_REFRESH_DELAY=0)
+class CatalogueVersionTests(CatalogueTestCase):
+    def test_save_bumps_after_commit(self):
+        product = self.products[0]
+        version = get_catalogue_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+            self.assertEqual(get_catalogue_version(), version)
+        self.assertGreater(get_catalogue_version(), version)
+
+    def test_uncommitted_delete_keeps_version(self):
+        product = self.products[0]
+        version = get_catalogue_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            product.delete()
+        self.assertTrue(callbacks)
+        self.assertEqual(get_catalogue_version(), version)
+
+    def test_local_memory_cache_warns(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+        with self.settings(CACHES=locmem, CATALOGUE_CACHE_ENABLED=True):
+            self.assertEqual([e.id for e in check_shared_catalogue_cache(None)], ["api.W001"])
+        with self.settings(CACHES=redis, CATALOGUE_CACHE_ENABLED=True):
+            self.assertEqual(check_shared_catalogue_cache(None), [])
+
+
+@override_settings(
+    CATALOGUE_CACHE_ENABLED=True,
+    CATALOGUE_SNAPSHOT_AUTO=False,
+    CATEGORY_SUMMARY_REFRESH_DELAY=3600,
+)
+class StockScopeTests(CatalogueTestCase):
+    def setUp(self):
+        # The local-memory cache outlives each test's rollback.
+        bump_catalogue_version()
+        # Run the batched summary refresh in the test database, not at exit.
+        self.addCleanup(flush_summary_refresh)
+        self.first = self.products[0]
+        self.other = next(p for p in self.products if p.category != self.first.category)
+
+    def stocks(self, path):
+        data = self.client.get(path).json()
+        results = data.get("results", [data])
+        return {row["id"]: row["stock"] for row in results}
+
+    def test_stock_write_retires_only_its_scopes(self):
+        first, other = self.first, self.other
+        paths = [
+            f"/api/products/{first.pk}/",
+            f"/api/products/{other.pk}/",
+            f"/api/products/?category={first.category}",
+            f"/api/products/?category={other.category}",
+            "/api/products/?page_size=100",
+        ]
+        before = [self.stocks(path) for path in paths]
+        Product.objects.filter(pk__in=[first.pk, other.pk]).update(stock=F("stock") + 5)
+        stock_changed(stock_changes({first.pk: 5}))
+        after = [self.stocks(path) for path in paths]
+
+        self.assertEqual(after[0][first.pk], before[0][first.pk] + 5)
+        self.assertEqual(after[2][first.pk], before[2][first.pk] + 5)
+        self.assertEqual(after[1], before[1])
+        self.assertEqual(after[3], before[3])
+        # Lists across categories wait for the batched summary refresh.
+        self.assertEqual(after[4], before[4])
+
+    def test_stock_write_retires_batch_fragments(self):
+        path = f"/api/products/batch/?ids={self.first.pk},{self.other.pk}"
+        before = self.stocks(path)
+        Product.objects.filter(pk__in=[self.first.pk, self.other.pk]).update(stock=F("stock") + 5)
+        stock_changed(stock_changes({self.first.pk: 5}))
+        after = self.stocks(path)
+        self.assertEqual(after[self.first.pk], before[self.first.pk] + 5)
+        self.assertEqual(after[self.other.pk], before[self.other.pk])
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from api.categories import apply_summary_changes, rebuild_category_summaries, summary_rows
+from api.models import CategorySummary, Product, Review
+from api.reservations import release_reservation, reserve_stock
+from api.reviews import recompute_review_rollups
+
+from .base import CatalogueTestCase
+
+
+def summaries():
+    return [
+        {**row, "id": None, "updated_at": None, "total_rating": round(row["total_rating"], 6)}
+        for row in CategorySummary.objects.order_by("category").values()
+    ]
+
+
+@override_settings(
+    CATALOGUE_SNAPSHOT_AUTO=False, CATEGORY_SUMMARY_REFRESH_DELAY=0, RELATED_REFRESH_DELAY=0
+)
+class CategorySummaryTests(CatalogueTestCase):
+    def setUp(self):
+        Product.objects.update(stock=3)
+        recompute_review_rollups()
+        rebuild_category_summaries()
+
+    def assertSummariesRebuilt(self):
+        maintained = summaries()
+        rebuild_category_summaries()
+        self.assertEqual(maintained, summaries())
+
+    def test_writes_keep_the_summaries_exact(self):
+        first, second, third = (Product.objects.get(pk=p.pk) for p in self.products[:3])
+        with self.captureOnCommitCallbacks(execute=True):
+            first.price_pkr = Decimal("1.00")
+            first.is_featured = not first.is_featured
+            first.save()
+            second.category = next(
+                key for key, _ in Product.CATEGORY_CHOICES if key != second.category
+            )
+            second.save()
+            third.is_active = False
+            third.save(update_fields=["is_active"])
+            Product.objects.get(pk=self.products[3].pk).delete()
+
+            held = reserve_stock([(first.pk, 3), (second.pk, 1)])
+            review = Review.objects.create(product=first, name="A", rating=5)
+            review.is_published = True
+            review.save()
+        self.assertSummariesRebuilt()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            release_reservation(held.token)
+            review.delete()
+        self.assertSummariesRebuilt()
+
+    def test_extremes_are_only_aggregated_when_they_move(self):
+        category = self.products[0].category
+        summary = CategorySummary.objects.get(category=category)
+        inside = Product.objects.filter(
+            category=category, is_active=True,
+            price_pkr__gt=summary.min_price_pkr, price_pkr__lt=summary.max_price_pkr,
+        ).first()
+        if inside is None:
+            self.skipTest("no product priced between the category's extremes")
+        old = summary_rows([inside.pk])[inside.pk]
+        Product.objects.filter(pk=inside.pk).update(stock=0)
+        with CaptureQueriesContext(connection) as queries:
+            apply_summary_changes([(old, {**old, "stock": 0})])
+        self.assertFalse(any("MIN(" in query["sql"] for query in queries))
+        self.assertSummariesRebuilt()
+
+        cheapest = Product.objects.filter(category=category, is_active=True).order_by("price_pkr")[0]
+        old = summary_rows([cheapest.pk])[cheapest.pk]
+        Product.objects.filter(pk=cheapest.pk).update(is_active=False)
+        with CaptureQueriesContext(connection) as queries:
+            apply_summary_changes([(old, {**old, "is_active": False})])
+        self.assertTrue(any("MIN(" in query["sql"] for query in queries))
+        self.assertSummariesRebuilt()
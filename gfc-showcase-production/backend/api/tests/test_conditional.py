@@ -0,0 +1,65 @@
+from django.db.models import F
+from django.test import AsyncRequestFactory
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from api.async_views import AsyncProductViewSet
+from api.cache import bump_catalogue_version
+from api.models import Product
+from api.reservations import stock_changed, stock_changes
+
+from .base import CatalogueTestCase
+
+
+class ConditionalResponseTests(CatalogueTestCase):
+    def test_list_not_modified(self):
+        response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):  # validators only
+            response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_retrieve_not_modified(self):
+        url = f"/api/products/{self.products[0].pk}/"
+        response = self.client.get(url)
+        self.assertIn("Last-Modified", response)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_invalid_pk_is_not_found(self):
+        for url in ("/api/products/abc/", "/api/products/abc/related/", "/api/products/999999/"):
+            with self.subTest(url=url), self.assertLogs("django.request", "WARNING"):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    async def test_invalid_pk_is_not_found_async(self):
+        factory = AsyncRequestFactory()
+        for action, url in (("retrieve", "/api/products/abc/"), ("related", "/api/products/abc/related/")):
+            view = AsyncProductViewSet.as_async_view({"get": action}, detail=True)
+            with self.subTest(action=action):
+                response = await view(factory.get(url), pk="abc")
+                self.assertEqual(response.status_code, 404)
+
+
+@override_settings(
+    CATALOGUE_CACHE_ENABLED=True,
+    CATALOGUE_SNAPSHOT_AUTO=False,
+    CATEGORY_SUMMARY_REFRESH_DELAY=0,
+)
+class CachedValidatorTests(CatalogueTestCase):
+    def setUp(self):
+        # The local-memory cache outlives each test's rollback.
+        bump_catalogue_version()
+
+    def test_validators_follow_the_cache_versions(self):
+        product = self.products[0]
+        url = f"/api/products/{product.pk}/"
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Product.objects.filter(pk=product.pk).update(stock=F("stock") - 1, updated_at=timezone.now())
+        stock_changed(stock_changes({product.pk: -1}))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
@@ -0,0 +1,86 @@
+import io
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test.utils import override_settings
+from PIL import Image
+
+from api.images import process_product_image, variant_files
+from api.models import Product
+
+from .base import CatalogueTestCase
+
+
+def png(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "teal").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class ProcessProductImageTests(CatalogueTestCase):
+    product_count = 1
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.product = Product.objects.get(pk=self.products[0].pk)
+
+    def upload(self, content):
+        name = default_storage.save("products/upload.png", ContentFile(content))
+        Product.objects.filter(pk=self.product.pk).update(image_local=name)
+        self.product.refresh_from_db()
+
+    def test_rerender_replaces_the_old_variants(self):
+        self.upload(png(400, 300))
+        process_product_image(self.product)
+        first = variant_files(self.product)
+        self.assertTrue(first)
+
+        self.upload(png(800, 600))
+        process_product_image(self.product)
+        self.product.refresh_from_db()
+        second = variant_files(self.product)
+        self.assertTrue(second)
+        self.assertFalse(set(first) & set(second))
+        self.assertEqual((self.product.image_width, self.product.image_height), (800, 600))
+
+    def test_failed_render_keeps_the_old_variants(self):
+        self.upload(png(400, 300))
+        process_product_image(self.product)
+        self.product.refresh_from_db()
+        srcset, files = self.product.image_srcset, variant_files(self.product)
+
+        self.upload(b"not an image")
+        with self.assertRaises(OSError):
+            process_product_image(self.product)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.image_srcset, srcset)
+        self.assertEqual(variant_files(self.product), files)
+        self.assertTrue(all(default_storage.exists(name) for name in files))
+
+    def test_removed_upload_drops_the_variants(self):
+        self.upload(png(400, 300))
+        process_product_image(self.product)
+        Product.objects.filter(pk=self.product.pk).update(image_local="")
+        self.product.refresh_from_db()
+        process_product_image(self.product)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.image_width, self.product.image_srcset), (None, {}))
+        self.assertEqual(variant_files(self.product), [])
+
+    @override_settings(IMAGE_PROCESSING_MODE="sync", CATALOGUE_SNAPSHOT_AUTO=False)
+    def test_save_renders_after_commit(self):
+        upload = ContentFile(png(400, 300))
+        self.product.image_local = default_storage.save("products/upload.png", upload)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.product.save()
+        self.assertEqual(variant_files(self.product), [])
+        for callback in callbacks:
+            callback()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.image_source, self.product.image_local.name)
+        self.assertTrue(variant_files(self.product))
@@ -0,0 +1,13 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class QueryPlanTests(TestCase):
+    def test_every_product_query_is_index_backed(self):
+        # explain_queries raises CommandError, listing the offending plans,
+        # on a table scan or an unexpected sort (SCAN / TEMP B-TREE).
+        output = StringIO()
+        call_command("explain_queries", count=500, stdout=output)
+        self.assertIn("Every query is index backed", output.getvalue())
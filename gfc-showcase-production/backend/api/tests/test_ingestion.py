@@ -0,0 +1,82 @@
+import json
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+
+from api.ingestion import ContactBatchWriter, LocalContactQueue, RedisContactQueue, encode_contact
+from api.models import Contact
+
+
+def contact_payload(i):
+    return encode_contact({
+        "name": f"Customer {i}",
+        "email": f"customer{i}@example.com",
+        "phone": "0300-0000000",
+        "subject": "Ingestion test",
+        "message": "Hello",
+    })
+
+
+class ContactBatchWriterTests(TestCase):
+    def setUp(self):
+        self.queue = LocalContactQueue()
+        self.writer = ContactBatchWriter(self.queue, interval=0.001, max_attempts=2)
+
+    def test_batch_is_written_in_one_flush(self):
+        for i in range(3):
+            self.queue.push(contact_payload(i))
+        self.assertEqual(self.writer.flush_once(), 3)
+        self.assertEqual(Contact.objects.count(), 3)
+
+    def test_bad_entry_is_dead_lettered_without_blocking_the_rest(self):
+        bad = json.dumps({"unknown_field": 1})
+        for payload in (contact_payload(0), bad, contact_payload(1)):
+            self.queue.push(payload)
+        with self.assertLogs("api.ingestion", "WARNING"):
+            self.assertEqual(self.writer.flush_once(), 2)
+        self.assertEqual(Contact.objects.count(), 2)
+        self.assertEqual(self.queue.size(), 1)  # one more attempt left
+        self.assertEqual(self.queue.dead, [])
+
+        self.queue.push(contact_payload(2))
+        with self.assertLogs("api.ingestion", "WARNING"):
+            self.assertEqual(self.writer.flush_once(), 1)
+        self.assertEqual(Contact.objects.count(), 3)
+        self.assertEqual(self.queue.size(), 0)
+        self.assertEqual(self.queue.dead, [bad])
+
+
+class TestRedisContactQueue(RedisContactQueue):
+    pending_key = "test:contacts:pending"
+    dead_key = "test:contacts:dead"
+    workers_key = "test:contacts:workers"
+    processing_prefix = "test:contacts:processing:"
+    heartbeat_prefix = "test:contacts:heartbeat:"
+    legacy_processing_key = "test:contacts:processing"
+
+
+@skipUnless(settings.REDIS_URL, "needs REDIS_URL")
+class RedisContactQueueTests(SimpleTestCase):
+    def setUp(self):
+        self.first = TestRedisContactQueue(settings.REDIS_URL)
+        self.second = TestRedisContactQueue(settings.REDIS_URL)
+
+    def tearDown(self):
+        keys = self.first.client.keys("test:contacts:*")
+        if keys:
+            self.first.client.delete(*keys)
+
+    def test_recover_skips_live_workers(self):
+        for i in range(3):
+            self.first.push(contact_payload(i))
+        self.assertEqual(len(self.first.claim(2, timeout=1)), 2)
+        self.assertEqual(self.second.recover(), 0)
+        self.assertEqual(self.second.size(), 1)
+
+        # The first worker stops heart-beating: its claimed entries come back once.
+        self.first.client.delete(self.first.heartbeat_prefix + self.first.worker_id)
+        with self.assertLogs("api.ingestion", "WARNING"):
+            self.assertEqual(self.second.recover(), 2)
+        self.assertEqual(self.second.recover(), 0)
+        self.assertEqual(self.second.size(), 3)
@@ -0,0 +1,61 @@
+import io
+import json
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+
+from api.models import Product
+
+from .base import CatalogueTestCase
+
+
+def row(model_code, **values):
+    return {
+        "name": f"Import {model_code}",
+        "model_code": model_code,
+        "category": "ceiling_fan",
+        "description": "Imported",
+        "price_pkr": 10000,
+        "features": ["Silent"],
+        "specifications": {"RPM": "350"},
+        **values,
+    }
+
+
+@override_settings(CATALOGUE_SNAPSHOT_AUTO=False)
+class LoadProductsTests(CatalogueTestCase):
+    product_count = 1
+
+    def load(self, *rows):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl") as file:
+            file.writelines(json.dumps(values) + "\n" for values in rows)
+            file.flush()
+            output = io.StringIO()
+            call_command("load_products", file.name, stdout=output)
+        return output.getvalue()
+
+    def test_second_run_changes_nothing(self):
+        rows = [row("IMP-1"), row("IMP-2", rating=4.5)]
+        self.assertIn("2 created, 0 updated, 0 unchanged", self.load(*rows))
+        self.assertIn("0 created, 0 updated, 2 unchanged", self.load(*rows))
+        self.assertIn("0 created, 1 updated, 1 unchanged", self.load(rows[0], row("IMP-2", stock=7)))
+        self.assertEqual(Product.objects.get(model_code="IMP-2").stock, 7)
+
+    def test_invalid_rows_are_rejected(self):
+        for values in ({"category": "toaster"}, {"rating": 5.5}):
+            with self.subTest(values=values):
+                with self.assertRaisesMessage(CommandError, "Row 2:"):
+                    self.load(row("IMP-1"), row("IMP-2", **values))
+                self.assertFalse(Product.objects.filter(model_code__startswith="IMP-").exists())
+
+    def test_invalid_update_is_rejected(self):
+        self.load(row("IMP-1"))
+        with self.assertRaisesMessage(CommandError, "Row 1: category"):
+            self.load(row("IMP-1", category="toaster"))
+        self.assertEqual(Product.objects.get(model_code="IMP-1").category, "ceiling_fan")
+
+    def test_image_fields_are_not_imported(self):
+        with self.assertRaisesMessage(CommandError, "unknown fields ['image_srcset']"):
+            self.load(row("IMP-1", image_srcset={"webp": "/media/evil.webp 1w"}))
@@ -0,0 +1,24 @@
+from .base import CatalogueTestCase
+
+
+class MetricsViewTests(CatalogueTestCase):
+    product_count = 1
+
+    def assertForbidden(self, **extra):
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.client.get("/metrics", **extra)
+        self.assertEqual(response.status_code, 403)
+
+    def test_closed_without_a_token(self):
+        with self.settings(METRICS_TOKEN="", DEBUG=False):
+            self.assertForbidden()
+        with self.settings(METRICS_TOKEN="", DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    def test_token_is_required_when_set(self):
+        with self.settings(METRICS_TOKEN="secret", DEBUG=True):
+            self.assertForbidden()
+            self.assertForbidden(HTTP_AUTHORIZATION="Bearer wrong")
+            response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4")
@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from api.models import Product
+
+from .base import CatalogueTestCase
+
+
+class KeysetPaginationTests(CatalogueTestCase):
+    def pages(self, **params):
+        """Every page's ids, following the next links to the end"""
+        params = {"pagination": "cursor", **params}
+        response = self.client.get("/api/products/", params)
+        pages = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([row["id"] for row in response.data["results"]])
+            if not response.data["next"]:
+                return pages, response
+            response = self.client.get(response.data["next"])
+
+    def test_pages_cover_ties_exactly_once(self):
+        # Only two prices, so every page boundary falls in a tie.
+        for index, product in enumerate(self.products):
+            Product.objects.filter(pk=product.pk).update(price_pkr=Decimal(1000 + index % 2))
+        for ordering in ("price_pkr", "-price_pkr"):
+            with self.subTest(ordering=ordering):
+                pages, last = self.pages(ordering=ordering)
+                ids = [pk for page in pages for pk in page]
+                expected = Product.objects.order_by(ordering, ordering.replace("price_pkr", "id"))
+                self.assertEqual(ids, list(expected.values_list("id", flat=True)))
+
+                previous = self.client.get(last.data["previous"])
+                self.assertEqual([row["id"] for row in previous.data["results"]], pages[-2])
+
+    def test_search_is_refused(self):
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.client.get(
+                "/api/products/", {"pagination": "cursor", "search": "synthetic"}
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pagination", response.data)
+        self.assertEqual(self.client.get("/api/products/", {"search": "synthetic"}).status_code, 200)
@@ -0,0 +1,34 @@
+from api.models import Product
+
+from .base import CatalogueTestCase
+
+
+class QueryCountTests(CatalogueTestCase):
+    """Catalogue reads run a fixed number of queries, whatever the data"""
+
+    def test_list(self):
+        with self.assertNumQueries(3):  # validators, COUNT, page
+            response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], self.product_count)
+
+    def test_retrieve(self):
+        product = self.products[0]
+        with self.assertNumQueries(2):  # validators, row
+            response = self.client.get(f"/api/products/{product.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["id"], product.pk)
+
+    def test_by_category_is_constant_as_categories_are_added(self):
+        categories = [key for key, _ in Product.CATEGORY_CHOICES]
+        ids = [product.pk for product in self.products]
+        Product.objects.update(category=categories[0])
+        for used in range(1, len(categories) + 1):
+            # Spread the products over the first ``used`` categories.
+            for index, category in enumerate(categories[:used]):
+                Product.objects.filter(pk__in=ids[index::used]).update(category=category)
+            with self.subTest(categories=used), self.assertNumQueries(2):  # validators, window
+                response = self.client.get("/api/products/by_category/", {"limit": 2})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(list(response.data), categories[:used])
+            self.assertTrue(all(len(rows) == 2 for rows in response.data.values()))
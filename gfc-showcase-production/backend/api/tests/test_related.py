@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.test.utils import override_settings
+
+from api.models import Product, RelatedProduct
+from api.related import (
+    CatalogueVectors,
+    rebuild_related_products,
+    refresh_related_batch,
+    refresh_related_products,
+)
+
+from .base import CatalogueTestCase
+
+
+def related_scores():
+    """Each list's scores in rank order; ties may swap ids, never scores"""
+    lists = {}
+    for product_id, score in RelatedProduct.objects.order_by("product_id", "rank").values_list(
+        "product_id", "score"
+    ):
+        lists.setdefault(product_id, []).append(round(score, 5))
+    return lists
+
+
+class RelatedRefreshTests(CatalogueTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Two large categories and, past index 28, two small ones.
+        categories = [key for key, _ in Product.CATEGORY_CHOICES]
+        for i, product in enumerate(cls.products):
+            product.category = categories[0 if i < 14 else 1 if i < 28 else i - 26]
+        Product.objects.bulk_update(cls.products, ["category"])
+        rebuild_related_products()
+
+    def assertMatchesRebuild(self):
+        refreshed = related_scores()
+        rebuild_related_products()
+        self.assertEqual(refreshed, related_scores())
+
+    def test_large_category_loads_only_its_own(self):
+        product = self.products[0]
+        Product.objects.filter(pk=product.pk).update(price_pkr=product.price_pkr * 3)
+        with mock.patch.object(CatalogueVectors, "load", wraps=CatalogueVectors.load) as load:
+            refresh_related_products(product.pk)
+        self.assertNotIn(self.products[14].category, load.call_args_list[0].args[0])
+        self.assertMatchesRebuild()
+
+    def test_small_category_falls_back_to_the_catalogue(self):
+        product = self.products[29]
+        Product.objects.filter(pk=product.pk).update(price_pkr=product.price_pkr * 3)
+        with mock.patch.object(CatalogueVectors, "load", wraps=CatalogueVectors.load) as load:
+            refresh_related_products(product.pk)
+        self.assertEqual(load.call_args_list[-1].args, ())
+        self.assertMatchesRebuild()
+
+    def test_category_change_and_delete(self):
+        product = self.products[3]
+        Product.objects.filter(pk=product.pk).update(category=self.products[20].category)
+        refresh_related_products(product.pk)
+        self.assertMatchesRebuild()
+
+        product = self.products[5]
+        owners = set(
+            RelatedProduct.objects.filter(related_id=product.pk).values_list("product_id", flat=True)
+        )
+        Product.objects.filter(pk=product.pk).delete()
+        refresh_related_products(product.pk, owners=owners)
+        self.assertMatchesRebuild()
+
+    @override_settings(RELATED_REFRESH_DELAY=0)
+    def test_save_refreshes_after_commit(self):
+        product = self.products[0]
+        product.price_pkr *= 3
+        with mock.patch("api.related.refresh_related_batch") as refresh:
+            with self.captureOnCommitCallbacks() as callbacks:
+                product.save()
+            refresh.assert_not_called()
+            for callback in callbacks:
+                callback()
+        refresh.assert_called_once_with({product.pk: set()})
+
+    def test_batch_loads_the_vectors_once_per_scope(self):
+        changed = [self.products[0], self.products[1], self.products[20]]
+        for product in changed:
+            Product.objects.filter(pk=product.pk).update(price_pkr=product.price_pkr * 3)
+        deleted = self.products[6]
+        owners = set(
+            RelatedProduct.objects.filter(related_id=deleted.pk).values_list("product_id", flat=True)
+        )
+        Product.objects.filter(pk=deleted.pk).delete()
+        changes = {product.pk: set() for product in changed}
+        changes[deleted.pk] = owners
+        with mock.patch.object(CatalogueVectors, "load", wraps=CatalogueVectors.load) as load:
+            refresh_related_batch(changes)
+        # The affected categories, then the whole catalogue for the small
+        # categories' lists; never once per product.
+        self.assertLessEqual(load.call_count, 2)
+        self.assertMatchesRebuild()
@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+
+from api.cache import bump_catalogue_scopes, bump_catalogue_version
+from api.db import PRIMARY_PIN_KEY, REPLICA_ALIAS, ReplicaRouter, replica_reads
+from api.models import Product
+
+from .base import CatalogueTestCase
+
+
+class ReplicaPinTests(CatalogueTestCase):
+    product_count = 1
+
+    def setUp(self):
+        # The router only looks the alias up; no connection is opened.
+        replica = mock.patch.dict(
+            settings.DATABASES, {REPLICA_ALIAS: settings.DATABASES["default"]}
+        )
+        replica.start()
+        self.addCleanup(replica.stop)
+        cache = caches[settings.CATALOGUE_CACHE_ALIAS]
+        cache.delete(PRIMARY_PIN_KEY)
+        self.addCleanup(cache.delete, PRIMARY_PIN_KEY)
+        self.router = ReplicaRouter()
+
+    def read_alias(self):
+        with replica_reads():
+            return self.router.db_for_read(Product), self.router.db_for_read(Product)
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.read_alias(), (REPLICA_ALIAS, REPLICA_ALIAS))
+        self.assertIsNone(self.router.db_for_read(Product))
+
+    def test_authentication_reads_stay_on_the_primary(self):
+        with replica_reads():
+            self.assertIsNone(self.router.db_for_read(Session))
+            bump_catalogue_version()
+            # Decided by the first catalogue read, after the bump.
+            self.assertIsNone(self.router.db_for_read(Product))
+
+    def test_bumps_pin_reads_to_the_primary(self):
+        for bump in (bump_catalogue_version, lambda: bump_catalogue_scopes(["stock"])):
+            with self.subTest(bump=bump):
+                caches[settings.CATALOGUE_CACHE_ALIAS].delete(PRIMARY_PIN_KEY)
+                bump()
+                self.assertEqual(self.read_alias(), (None, None))
+
+    def test_no_pin_without_a_window(self):
+        with self.settings(DB_REPLICA_PIN_SECONDS=0):
+            bump_catalogue_version()
+            self.assertEqual(self.read_alias(), (REPLICA_ALIAS, REPLICA_ALIAS))
@@ -0,0 +1,79 @@
+from django.test.utils import override_settings
+
+from api.models import Product, StockReservation
+from api.reservations import InsufficientStock, release_reservation, reserve_stock
+
+from .base import CatalogueTestCase
+
+
+class ReserveStockTests(CatalogueTestCase):
+    product_count = 3
+
+    def setUp(self):
+        Product.objects.filter(pk__in=[p.pk for p in self.products]).update(stock=4)
+
+    def stock(self):
+        return dict(Product.objects.values_list("pk", "stock"))
+
+    def test_shortfall_rolls_back_every_item(self):
+        first, second, _ = self.products
+        with self.assertRaises(InsufficientStock) as raised:
+            reserve_stock([(first.pk, 2), (second.pk, 5)])
+        self.assertEqual(
+            raised.exception.shortages,
+            [{"product": second.pk, "requested": 5, "available": 4}],
+        )
+        self.assertEqual(set(self.stock().values()), {4})
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_never_oversells(self):
+        product = self.products[0]
+        held = [reserve_stock([(product.pk, 1)]) for _ in range(4)]
+        with self.assertRaises(InsufficientStock):
+            reserve_stock([(product.pk, 1)])
+        self.assertEqual(self.stock()[product.pk], 0)
+
+        self.assertTrue(release_reservation(held[0].token))
+        self.assertFalse(release_reservation(held[0].token))
+        self.assertEqual(self.stock()[product.pk], 1)
+
+
+@override_settings(STOCK_RESERVATION_MAX_QUANTITY=3, STOCK_RESERVATION_MAX_OPEN=2)
+class ReservationLimitTests(CatalogueTestCase):
+    product_count = 2
+
+    def reserve(self, items, **extra):
+        return self.client.post("/api/reservations/", {"items": items, **extra}, format="json")
+
+    def test_quantity_is_capped_per_product(self):
+        product = self.products[0].pk
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.reserve(
+                [{"product": product, "quantity": 2}, {"product": product, "quantity": 2}]
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("items", response.data)
+
+    def test_ttl_is_capped(self):
+        items = [{"product": self.products[0].pk, "quantity": 1}]
+        with self.settings(STOCK_RESERVATION_MAX_TTL=600):
+            with self.assertLogs("django.request", "WARNING"):
+                response = self.reserve(items, ttl=601)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(self.reserve(items, ttl=600).status_code, 201)
+
+    def test_open_holds_are_capped_per_client(self):
+        items = [{"product": self.products[0].pk, "quantity": 1}]
+        held = [self.reserve(items).data["token"] for _ in range(2)]
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.reserve(items)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(StockReservation.objects.count(), 2)
+
+        other = self.client_class(REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(
+            other.post("/api/reservations/", {"items": items}, format="json").status_code, 201
+        )
+
+        self.client.delete(f"/api/reservations/{held[0]}/")
+        self.assertEqual(self.reserve(items).status_code, 201)
@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from api.admin import ReviewAdmin
+from api.models import Product, Review
+from api.reviews import recompute_review_rollups, weighted_rating
+
+from .base import CatalogueTestCase
+
+
+@override_settings(REVIEW_PRIOR_WEIGHT=0)
+class ZeroPriorWeightTests(CatalogueTestCase):
+    product_count = 2
+
+    def test_unrated_product_gets_zero(self):
+        product = self.products[0]
+        Product.objects.filter(pk=product.pk).update(imported_review_count=0)
+        recompute_review_rollups([product.pk])
+        product.refresh_from_db()
+        self.assertEqual((product.review_count, product.weighted_rating), (0, 0.0))
+        self.assertEqual(weighted_rating(0, 0), 0.0)
+
+    def test_weighted_rating_is_the_plain_average(self):
+        product = self.products[0]
+        Product.objects.filter(pk=product.pk).update(imported_review_count=0)
+        recompute_review_rollups([product.pk])
+        response = self.client.post(
+            "/api/reviews/", {"product": product.pk, "name": "A", "rating": 4}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        review = Review.objects.get(pk=response.data["id"])
+        review.is_published = True
+        review.save()
+        product.refresh_from_db()
+        self.assertEqual(product.weighted_rating, 4.0)
+        self.assertEqual(weighted_rating(1, 4), 4.0)
+
+
+class ModerationTests(CatalogueTestCase):
+    product_count = 1
+
+    def rollup(self):
+        product = Product.objects.get(pk=self.products[0].pk)
+        return product.review_count, product.rating
+
+    def test_posted_reviews_count_once_published(self):
+        before = self.rollup()
+        response = self.client.post(
+            "/api/reviews/", {"product": self.products[0].pk, "name": "A", "rating": 1}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.rollup(), before)
+        listed = self.client.get("/api/reviews/", {"product": self.products[0].pk}).data
+        self.assertEqual(listed["count"], 0)
+
+        admin = ReviewAdmin(Review, site)
+        request = RequestFactory().post("/admin/api/review/")
+        queryset = Review.objects.filter(pk=response.data["id"])
+        with mock.patch.object(admin, "message_user"):
+            admin.publish(request, queryset)
+            published = self.rollup()
+            self.assertEqual(published[0], before[0] + 1)
+            admin.publish(request, queryset)
+            self.assertEqual(self.rollup(), published)
+            admin.unpublish(request, queryset)
+        self.assertEqual(self.rollup(), before)
@@ -0,0 +1,45 @@
+from django.test.utils import override_settings
+
+from api.benchmarks import build_products
+from api.models import Product
+from api.search import rebuild_search_index
+
+from .base import CatalogueTestCase
+
+
+@override_settings(CATALOGUE_SNAPSHOT_AUTO=False, RELATED_REFRESH_DELAY=0)
+class SearchIndexTests(CatalogueTestCase):
+    product_count = 3
+
+    def setUp(self):
+        # The fixtures are bulk-created, past the indexing signals.
+        rebuild_search_index()
+
+    def search(self, text):
+        response = self.client.get("/api/products/", {"search": text})
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_saves_and_deletes_keep_the_index_in_sync(self):
+        product = Product.objects.get(pk=self.products[0].pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.name = "Zephyrine Deluxe"
+            product.save()
+        self.assertEqual(self.search("zephyr"), [product.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.name = "Mistral Deluxe"
+            product.save()
+        self.assertEqual(self.search("zephyr"), [])
+        self.assertEqual(self.search("mistral deluxe"), [product.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertEqual(self.search("mistral"), [])
+
+    def test_created_products_are_indexed(self):
+        [product] = build_products(1)
+        product.name, product.model_code = "Sirocco", "GFC-SIROCCO-9"
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        self.assertEqual(self.search("sirocco"), [product.pk])
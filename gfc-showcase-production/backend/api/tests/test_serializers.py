@@ -0,0 +1,111 @@
+import json
+import zlib
+from unittest import mock
+
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Product
+from api.renderers import RawJSON, RawJSONRenderer
+from api.serializers import ProductDetailSerializer, ProductRowSerializer, ProductSerializer
+
+from .base import CatalogueTestCase
+
+
+class ProductRowSerializerParityTests(CatalogueTestCase):
+    """The values_list() fast path renders the same JSON as ProductSerializer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Stored JSON text with escapes and non-ASCII is copied verbatim.
+        product = cls.products[0]
+        product.specifications = {"Max Temp": "45°C", "Note": 'say "hi"\n', "Ratio": [1.5, None]}
+        product.features = ["Dust, Rust & Heat Proof", "Ünïcode"]
+        product.save(update_fields=["specifications", "features"])
+
+    def setUp(self):
+        queryset = Product.objects.filter(is_active=True)
+        data = json.loads(JSONRenderer().render(ProductSerializer(queryset, many=True).data))
+        self.expected = {row["id"]: row for row in data}
+
+    def assertRowsMatch(self, rows, fields=ProductSerializer.Meta.fields):
+        self.assertTrue(rows)
+        for row in rows:
+            self.assertEqual(list(row), list(fields))
+            self.assertEqual(row, {name: self.expected[row["id"]][name] for name in fields})
+
+    def test_to_representation(self):
+        row_serializer = ProductRowSerializer()
+        rows = row_serializer.to_representation(
+            row_serializer.rows(Product.objects.filter(is_active=True))
+        )
+        for name in ("specifications", "features"):
+            self.assertIsInstance(rows[0][name], RawJSON)
+        rendered = json.loads(RawJSONRenderer().render(rows))
+        self.assertEqual(len(rendered), self.product_count)
+        self.assertRowsMatch(rendered)
+
+    def test_list(self):
+        response = self.client.get("/api/products/", {"page": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertRowsMatch(json.loads(response.content)["results"])
+
+    def test_list_fields(self):
+        fields = ["id", "specifications", "price_pkr", "features"]
+        response = self.client.get("/api/products/", {"fields": ",".join(fields)})
+        self.assertRowsMatch(json.loads(response.content)["results"], fields)
+
+    def test_list_omit(self):
+        response = self.client.get("/api/products/", {"omit": "description,features"})
+        fields = [
+            name for name in ProductSerializer.Meta.fields
+            if name not in ("description", "features")
+        ]
+        self.assertRowsMatch(json.loads(response.content)["results"], fields)
+
+    def test_stream(self):
+        response = self.client.get("/api/products/", {"stream": "true"})
+        self.assertEqual(response.status_code, 200)
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(rows), self.product_count)
+        self.assertRowsMatch(rows)
+
+    def test_stream_fields(self):
+        fields = ["id", "features", "specifications"]
+        response = self.client.get("/api/products/", {"stream": "true", "fields": ",".join(fields)})
+        self.assertRowsMatch(json.loads(b"".join(response.streaming_content)), fields)
+
+    @mock.patch("api.streaming.BUFFER_BYTES", 1024)
+    def test_stream_gzip(self):
+        response = self.client.get(
+            "/api/products/", {"stream": "true"}, HTTP_ACCEPT_ENCODING="br;q=0, gzip"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 2)
+        # Every chunk is flushed: the first one already decodes to JSON text.
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        self.assertTrue(decompressor.decompress(chunks[0]).startswith(b'[{"id":'))
+        body = zlib.decompress(b"".join(chunks), zlib.MAX_WBITS | 16)
+        self.assertRowsMatch(json.loads(body))
+
+        response = self.client.get(
+            "/api/products/", {"stream": "true"}, HTTP_ACCEPT_ENCODING="gzip;q=0"
+        )
+        self.assertNotIn("Content-Encoding", response)
+        self.assertRowsMatch(json.loads(b"".join(response.streaming_content)))
+
+
+class ProductDetailSerializerTests(CatalogueTestCase):
+    product_count = 2
+    internal_fields = {"rating_sum", "imported_rating", "imported_review_count", "image_source", "image_local"}
+
+    def test_retrieve_and_batch_hide_internal_fields(self):
+        product = self.products[0]
+        for url in (f"/api/products/{product.pk}/", f"/api/products/batch/?ids={product.pk}"):
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                row = data["results"][0] if "results" in data else data
+                self.assertEqual(list(row), ProductDetailSerializer.Meta.fields)
+                self.assertFalse(self.internal_fields & set(row))
@@ -0,0 +1,81 @@
+import os
+import tempfile
+from pathlib import Path
+
+from django.test.utils import override_settings
+
+from api.cache import bump_catalogue_version
+from api.snapshots import MANIFEST_NAME, build_snapshot
+
+from .base import CatalogueTestCase
+
+
+class SnapshotTests(CatalogueTestCase):
+    product_count = 3
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings = override_settings(
+            CATALOGUE_SNAPSHOT_DIR=directory.name,
+            CATALOGUE_SNAPSHOT_BASE_URL="http://testserver",
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.manifest = build_snapshot()
+
+    def get(self, path, **extra):
+        with self.settings(CATALOGUE_SNAPSHOT_SERVE=True):
+            return self.client.get(path, **extra)
+
+    def test_serves_snapshot_bytes(self):
+        path = f"/api/products/{self.products[0].pk}/"
+        entry = self.manifest["files"][path]
+        response = self.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, (self.directory / entry["path"]).read_bytes())
+        self.assertEqual(response.json(), self.client.get(path).json())
+
+        response = self.get(path, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response.content, (self.directory / entry["gzip"]).read_bytes())
+
+    def test_falls_back_to_live_data(self):
+        path = "/api/products/featured/"
+        self.assertEqual(self.get(path, HTTP_ACCEPT_ENCODING="gzip")["Content-Encoding"], "gzip")
+
+        # A query string with no snapshot of its own.
+        response = self.get("/api/products/?category=ceiling_fan", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Encoding", response)
+
+        # A file gone under its manifest, never read before.
+        (self.directory / self.manifest["files"][path]["path"]).unlink()
+        response = self.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.client.get(path).json())
+
+    def test_version_bump_retires_snapshot(self):
+        path = "/api/products/featured/"
+        bump_catalogue_version()
+        response = self.get(path, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
+        build_snapshot()
+        response = self.get(path, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def test_rebuild_keeps_files_newer_than_the_previous_manifest(self):
+        old = self.directory / "products.old.json"
+        new = self.directory / "products.new.json"
+        for path in (old, new):
+            path.write_bytes(b"{}")
+        manifest_mtime = (self.directory / MANIFEST_NAME).stat().st_mtime_ns
+        os.utime(old, ns=(manifest_mtime - 10**9, manifest_mtime - 10**9))
+        os.utime(new, ns=(manifest_mtime + 10**9, manifest_mtime + 10**9))
+
+        manifest = build_snapshot()
+        self.assertFalse(old.exists())
+        self.assertTrue(new.exists())
+        for entry in manifest["files"].values():
+            self.assertTrue((self.directory / entry["path"]).exists())
@@ -0,0 +1,34 @@
+from api.models import Newsletter
+
+from .base import CatalogueTestCase
+
+
+class NewsletterTests(CatalogueTestCase):
+    product_count = 0
+
+    def test_case_variants_are_one_subscriber(self):
+        response = self.client.post("/api/newsletter/", {"email": " Foo@Example.com "}, format="json")
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post("/api/newsletter/", {"email": "FOO@example.COM"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(Newsletter.objects.values_list("email", flat=True)), ["foo@example.com"])
+
+    def test_mixed_case_row_counts_as_existing(self):
+        # A row written around normalize_emails(), e.g. from the admin.
+        Newsletter.objects.create(email="Bar@Example.com")
+        response = self.client.post(
+            "/api/newsletter/bulk/", {"emails": ["bar@example.com", "new@example.com"]}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["existing"], 1)
+
+    def test_overlong_address_is_rejected(self):
+        max_length = Newsletter._meta.get_field("email").max_length
+        email = "a" * max_length + "@example.com"
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.client.post("/api/newsletter/", {"email": email}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/api/newsletter/bulk/", {"emails": [email]}, format="json")
+        self.assertEqual(response.data["invalid"], [email])
+        self.assertFalse(Newsletter.objects.exists())
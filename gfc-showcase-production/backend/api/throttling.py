@@ -0,0 +1,147 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+logger = logging.getLogger(__name__)
+
+# Refill, spend one token if there is one, and store the bucket, all in
+# one round trip. Returns {allowed, tokens as a string} because Lua
+# numbers are truncated to integers on the way out.
+TAKE_TOKEN = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {allowed, tostring(tokens)}
+"""
+
+
+class LocalTokenBuckets:
+    """In-process buckets; each worker process enforces the limit alone"""
+
+    max_keys = 100000
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, refill, duration):
+        now = time.monotonic()
+        with self.lock:
+            tokens, ts = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * refill)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.prune(now, duration)
+        return allowed, tokens
+
+    def prune(self, now, duration):
+        # A bucket idle for a whole period has refilled, which is the same
+        # as not having one.
+        self.buckets = {
+            key: (tokens, ts) for key, (tokens, ts) in self.buckets.items() if now - ts < duration
+        }
+
+
+class RedisTokenBuckets:
+    """Buckets shared by every worker, updated atomically by a Lua script"""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(TAKE_TOKEN)
+        self.fallback = LocalTokenBuckets()
+
+    def take(self, key, capacity, refill, duration):
+        import redis
+
+        try:
+            allowed, tokens = self.script(
+                keys=[key], args=[capacity, refill, time.time(), duration]
+            )
+        except redis.RedisError:
+            logger.warning("Redis throttle unavailable, using in-process buckets", exc_info=True)
+            return self.fallback.take(key, capacity, refill, duration)
+        return bool(allowed), float(tokens)
+
+
+_buckets = None
+_buckets_lock = threading.Lock()
+
+
+def get_token_buckets():
+    """Return the process-wide bucket store, shared through Redis if configured"""
+    global _buckets
+    with _buckets_lock:
+        if _buckets is None:
+            if settings.REDIS_URL:
+                _buckets = RedisTokenBuckets(settings.REDIS_URL)
+            else:
+                _buckets = LocalTokenBuckets()
+        return _buckets
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Anonymous-request throttle keeping O(1) state per client.
+
+    A rate of "N/period" allows bursts of N requests and refills N tokens
+    per period. Unlike AnonRateThrottle this never reads or rewrites a
+    per-client timestamp history.
+    """
+
+    scope = "anon"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return f"throttle:{self.scope}:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        if not settings.THROTTLE_ENABLED or self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        self.refill = self.num_requests / self.duration
+        allowed, self.tokens = get_token_buckets().take(
+            key, self.num_requests, self.refill, self.duration
+        )
+        return allowed
+
+    def wait(self):
+        return max(0.0, (1 - self.tokens) / self.refill)
+
+
+class ScopedTokenBucketThrottle(TokenBucketThrottle):
+    """Token bucket limited per ``view.throttle_scope``, defaulting to "anon"
+
+    Each scope has its own bucket and its own rate in
+    ``DEFAULT_THROTTLE_RATES``.
+    """
+
+    def __init__(self):
+        # The rate depends on the view, so it is resolved in allow_request.
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, "throttle_scope", None) or TokenBucketThrottle.scope
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -1,12 +1,45 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, ContactViewSet, NewsletterViewSet
+from .views import (
+    ProductViewSet,
+    ContactViewSet,
+    NewsletterViewSet,
+    ReviewViewSet,
+    StockReservationViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"products", ProductViewSet, basename="product")
 router.register(r"contact", ContactViewSet, basename="contact")
 router.register(r"newsletter", NewsletterViewSet, basename="newsletter")
+router.register(r"reviews", ReviewViewSet, basename="review")
+router.register(r"reservations", StockReservationViewSet, basename="reservation")
 
-urlpatterns = [
+urlpatterns = []
+
+if settings.ASYNC_CATALOGUE_VIEWS:
+    from .async_views import AsyncProductViewSet
+
+    def async_route(pattern, action, name, detail=False):
+        view = AsyncProductViewSet.as_async_view(
+            {"get": action}, basename="product", detail=detail
+        )
+        return re_path(pattern, view, name=name)
+
+    # Ahead of the router so these win for the same URLs and names; format
+    # suffix URLs such as products.json still reach ProductViewSet.
+    urlpatterns += [
+        async_route(r"^products/$", "list", "product-list"),
+        async_route(r"^products/featured/$", "featured", "product-featured"),
+        async_route(r"^products/by_category/$", "by_category", "product-by-category"),
+        async_route(r"^products/facets/$", "facets", "product-facets"),
+        async_route(r"^products/categories/$", "categories", "product-categories"),
+        async_route(r"^products/batch/$", "batch", "product-batch"),
+        async_route(r"^products/(?P<pk>[^/.]+)/$", "retrieve", "product-detail", detail=True),
+        async_route(r"^products/(?P<pk>[^/.]+)/related/$", "related", "product-related", detail=True),
+    ]
+
+urlpatterns += [
     path("", include(router.urls)),
 ]
@@ -1,67 +1,356 @@
-from rest_framework import viewsets, status, filters
+import hashlib
+
+from rest_framework import mixins, viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Product, Contact, Newsletter
+from .cache import (
+    STOCK_SCOPE,
+    cache_catalogue_response,
+    category_scope,
+    get_product_fragments,
+    product_scope,
+    set_product_fragments,
+)
+from .categories import summaries_by_choice
+from .conditional import conditional_catalogue_response
+from .db import replica_reads
+from .ingestion import enqueue_contact
+from .models import Product, Contact, Newsletter, CategorySummary, Review, StockReservation
+from .pagination import KeysetPagination
+from .renderers import RawJSON, RawJSONRenderer
+from .reservations import (
+    InsufficientStock,
+    TooManyReservations,
+    confirm_reservation,
+    release_reservation,
+    reserve_stock,
+)
+from .search import ProductSearchFilter
 from .serializers import (
     ProductSerializer,
     ProductDetailSerializer,
+    ProductRowSerializer,
+    CategorySummarySerializer,
     ContactSerializer,
     NewsletterSerializer,
+    ReservationRequestSerializer,
+    ReviewSerializer,
+    StockReservationSerializer,
 )
+from .snapshots import serve_catalogue_snapshot
+from .specs import ProductSpecFilter, facet_counts
+from .streaming import STREAM_CHUNK_SIZE, streaming_json_response
+from .subscriptions import normalize_emails, subscribe
+
+BY_CATEGORY_DEFAULT_LIMIT = 3
+BY_CATEGORY_MAX_LIMIT = 12
+BATCH_MAX_PRODUCTS = 50
+NEWSLETTER_BULK_MAX_EMAILS = 10000
+
+
+def _field_names(value, param):
+    names = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in names if name not in ProductSerializer.Meta.fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if not names:
+        raise ValueError(f"{param} must name at least one field")
+    return names
+
+
+def sparse_fields(value, omit=None):
+    """Parse ``?fields=a,b`` and ``?omit=c`` into ProductSerializer field names, None for all"""
+    if not value and not omit:
+        return None
+    names = _field_names(value, "fields") if value else list(ProductSerializer.Meta.fields)
+    if omit:
+        omitted = set(_field_names(omit, "omit"))
+        names = [name for name in names if name not in omitted]
+        if not names:
+            raise ValueError("omit must leave at least one field")
+    return names
+
+
+def by_category_limit(request):
+    """Parse ``?limit=`` for by_category, capped at BY_CATEGORY_MAX_LIMIT"""
+    limit = request.query_params.get("limit", BY_CATEGORY_DEFAULT_LIMIT)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        limit = 0
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, BY_CATEGORY_MAX_LIMIT)
+
+
+def batch_lookup(request):
+    """Parse ``?ids=`` or ``?model_codes=`` into (field, distinct values in request order)"""
+    given = [param for param in ("ids", "model_codes") if request.query_params.get(param)]
+    if len(given) != 1:
+        raise ValueError("Pass either ids or model_codes")
+    param = given[0]
+    values = [value.strip() for value in request.query_params[param].split(",") if value.strip()]
+    if param == "ids":
+        try:
+            values = [int(value) for value in values]
+        except ValueError:
+            raise ValueError("ids must be integers")
+    values = list(dict.fromkeys(values))
+    if not values:
+        raise ValueError(f"{param} must name at least one product")
+    if len(values) > BATCH_MAX_PRODUCTS:
+        raise ValueError(f"At most {BATCH_MAX_PRODUCTS} products per request")
+    return ("pk" if param == "ids" else "model_code"), values
+
+
+def batch_results(values, fragments):
+    """Products found in request order, plus the values that matched none"""
+    return {
+        "results": [RawJSON(fragments[value]) for value in values if value in fragments],
+        "missing": [value for value in values if value not in fragments],
+    }
+
+
+def group_by_category(products):
+    """Serialize ranked products into ``{category: [...]}`` in choice order"""
+    # Ordering in Python avoids a sort over the window subquery.
+    grouped = {}
+    ordered = sorted(products, key=lambda product: (product.category, product.category_rank))
+    for product in ordered:
+        grouped.setdefault(product.category, []).append(product)
+
+    result = {}
+    for category_key, category_name in Product.CATEGORY_CHOICES:
+        if category_key in grouped:
+            result[category_key] = ProductSerializer(
+                grouped[category_key], many=True
+            ).data
+    return result
+
 
 class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Product.objects.filter(is_active=True)
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    throttle_scope = "catalogue"
+    filter_backends = [
+        DjangoFilterBackend,
+        filters.OrderingFilter,
+        ProductSearchFilter,
+        ProductSpecFilter,
+    ]
     filterset_fields = ["category", "is_featured"]
-    search_fields = ["name", "model_code", "description"]
-    ordering_fields = ["price_pkr", "rating", "created_at"]
+    ordering_fields = ["price_pkr", "rating", "weighted_rating", "created_at"]
     ordering = ["-is_featured", "-created_at"]
-    
+
+    def dispatch(self, request, *args, **kwargs):
+        # Every action is a read, so all of them may use the replica.
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+    @property
+    def paginator(self):
+        """Page-number pagination by default, keyset with ?pagination=cursor"""
+        if not hasattr(self, "_paginator"):
+            if self.request.query_params.get("pagination") == "cursor":
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_serializer_class(self):
-        if self.action == "retrieve":
+        if self.action in ("retrieve", "batch"):
             return ProductDetailSerializer
         return ProductSerializer
+
+    def get_related_queryset(self):
+        """Precomputed related products of the requested product, best first"""
+        queryset = self.get_queryset().only(*ProductSerializer.Meta.fields)
+        try:
+            queryset = queryset.filter(related_from__product_id=self.kwargs["pk"])
+        except (TypeError, ValueError):
+            # Not a pk at all; the action's get_object() answers 404.
+            return queryset.none()
+        return queryset.order_by("related_from__rank")
+
+    def get_cache_scope(self):
+        """The part of the catalogue the current action's response shows.
+
+        Stock writes only bump the scopes of the products and categories
+        they touch (see reservations.stock_changed), so a product page or
+        a one-category list outlives stock changes elsewhere.
+        """
+        if self.action == "retrieve" and str(self.kwargs["pk"]).isdigit():
+            return product_scope(int(self.kwargs["pk"]))
+        categories = self.request.query_params.getlist("category")
+        if (
+            self.action in ("list", "facets")
+            and len(categories) == 1
+            and categories[0] in dict(Product.CATEGORY_CHOICES)
+        ):
+            return category_scope(categories[0])
+        return STOCK_SCOPE
+
+    def get_conditional_queryset(self):
+        """Rows whose timestamps validate the current action's response"""
+        queryset = self.get_queryset()
+        if self.action in ("list", "facets"):
+            return self.filter_queryset(queryset)
+        if self.action == "retrieve":
+            try:
+                return queryset.filter(pk=self.kwargs["pk"])
+            except (TypeError, ValueError):
+                # No validators; get_object() turns the bad pk into a 404.
+                return queryset.none()
+        if self.action == "featured":
+            return queryset.filter(is_featured=True)
+        if self.action == "related":
+            return self.get_related_queryset()
+        if self.action == "batch":
+            try:
+                field, values = batch_lookup(self.request)
+            except ValueError:
+                # Nothing to validate; the action answers with a 400.
+                return queryset.none()
+            return queryset.filter(**{f"{field}__in": values})
+        return queryset
+
+    @conditional_catalogue_response()
+    @cache_catalogue_response
+    @serve_catalogue_snapshot
+    def list(self, request, *args, **kwargs):
+        """Product rows; ``?fields=``/``?omit=`` select columns, ``?stream=true`` streams them all"""
+        try:
+            fields = sparse_fields(
+                request.query_params.get("fields"), request.query_params.get("omit")
+            )
+        except ValueError as error:
+            return Response(
+                {"error": str(error)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        row_serializer = ProductRowSerializer(fields)
+        rows = row_serializer.rows(self.filter_queryset(self.get_queryset()))
+        if request.query_params.get("stream") in ("1", "true"):
+            # The body is read after dispatch returns, outside replica_reads().
+            rows = rows.using(rows.db).iterator(chunk_size=STREAM_CHUNK_SIZE)
+            return streaming_json_response(request, row_serializer.iter_representation(rows))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.to_representation(page))
+        return Response(row_serializer.to_representation(rows))
+
+    @conditional_catalogue_response(use_last_modified=True)
+    @cache_catalogue_response
+    @serve_catalogue_snapshot
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
     
     @action(detail=False, methods=["get"])
+    @conditional_catalogue_response()
+    @cache_catalogue_response
+    @serve_catalogue_snapshot
     def featured(self, request):
         """Get featured products only"""
+        row_serializer = ProductRowSerializer()
         featured_products = self.get_queryset().filter(is_featured=True)[:6]
-        serializer = self.get_serializer(featured_products, many=True)
-        return Response(serializer.data)
+        rows = row_serializer.rows(featured_products)
+        return Response(row_serializer.to_representation(rows))
     
+    def get_by_category_queryset(self, limit):
+        """The first ``limit`` products of every category, unordered"""
+        return (
+            Product.objects.filter(is_active=True)
+            .annotate(
+                category_rank=Window(
+                    expression=RowNumber(),
+                    partition_by=[F("category")],
+                    order_by=[F("is_featured").desc(), F("created_at").desc()],
+                )
+            )
+            .filter(category_rank__lte=limit)
+            .order_by()
+            .only(*ProductSerializer.Meta.fields)
+        )
+
     @action(detail=False, methods=["get"])
+    @conditional_catalogue_response()
+    @cache_catalogue_response
+    @serve_catalogue_snapshot
     def by_category(self, request):
-        """Get products grouped by category"""
-        categories = Product.CATEGORY_CHOICES
-        result = {}
-        for category_key, category_name in categories:
-            products = Product.objects.filter(
-                category=category_key, 
-                is_active=True
-            )[:3]
-            if products.exists():
-                result[category_key] = ProductSerializer(products, many=True).data
-        return Response(result)
+        """Get the first N products of every category in a single query"""
+        try:
+            limit = by_category_limit(request)
+        except ValueError as error:
+            return Response(
+                {"error": str(error)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(group_by_category(self.get_by_category_queryset(limit)))
     
+    def product_fragments(self, products):
+        """``{value: (pk, JSON text)}`` for an in_bulk() result, serialized as retrieve does"""
+        renderer = RawJSONRenderer()
+        # One list serializer builds the fields once for every product.
+        data = self.get_serializer(list(products.values()), many=True).data
+        return {
+            value: (product.pk, renderer.render(item).decode("utf-8"))
+            for (value, product), item in zip(products.items(), data)
+        }
+
+    @action(detail=False, methods=["get"])
+    # Any product may be asked for, so no one cache scope covers the rows.
+    @conditional_catalogue_response(cached=False)
+    def batch(self, request):
+        """Up to BATCH_MAX_PRODUCTS products by ``?ids=`` or ``?model_codes=``.
+
+        Cached products are served from their serialized fragments; the rest
+        are fetched with one in_bulk() query.
+        """
+        try:
+            field, values = batch_lookup(request)
+        except ValueError as error:
+            return Response(
+                {"error": str(error)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        fragments = get_product_fragments(request, field, values)
+        missing = [value for value in values if value not in fragments]
+        if missing:
+            found = self.product_fragments(self.get_queryset().in_bulk(missing, field_name=field))
+            set_product_fragments(request, field, found)
+            fragments.update((value, text) for value, (_, text) in found.items())
+        return Response(batch_results(values, fragments))
+
+    @action(detail=False, methods=["get"])
+    @conditional_catalogue_response()
+    @cache_catalogue_response
+    def facets(self, request):
+        """Spec value counts for the filtered products, in one aggregate query"""
+        return Response(facet_counts(self.filter_queryset(self.get_queryset())))
+
     @action(detail=False, methods=["get"])
+    @cache_catalogue_response
+    @serve_catalogue_snapshot
     def categories(self, request):
-        """Get all available categories"""
-        categories = [
-            {"id": k, "name": v} 
-            for k, v in Product.CATEGORY_CHOICES
-        ]
-        return Response(categories)
+        """Get all categories with their maintained product summaries"""
+        categories = summaries_by_choice(CategorySummary.objects.all())
+        return Response(CategorySummarySerializer(categories, many=True).data)
     
     @action(detail=True, methods=["get"])
+    @conditional_catalogue_response()
+    @cache_catalogue_response
     def related(self, request, pk=None):
-        """Get related products from same category"""
-        product = self.get_object()
-        related = Product.objects.filter(
-            category=product.category,
-            is_active=True
-        ).exclude(id=product.id)[:4]
+        """Get the precomputed most similar products"""
+        related = list(self.get_related_queryset())
+        if not related:
+            # Only an empty result needs to tell "no matches" from a 404.
+            self.get_object()
         serializer = self.get_serializer(related, many=True)
         return Response(serializer.data)
 
@@ -69,11 +358,18 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
 class ContactViewSet(viewsets.ModelViewSet):
     queryset = Contact.objects.all()
     serializer_class = ContactSerializer
+    throttle_scope = "contact"
     http_method_names = ["post", "get"]
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        if settings.CONTACT_INGESTION_MODE == "queue":
+            enqueue_contact(serializer.validated_data)
+            return Response(
+                {"detail": "Message received"},
+                status=status.HTTP_202_ACCEPTED
+            )
         self.perform_create(serializer)
         return Response(
             {"detail": "Message sent successfully"},
@@ -84,6 +380,7 @@ class ContactViewSet(viewsets.ModelViewSet):
 class NewsletterViewSet(viewsets.ModelViewSet):
     queryset = Newsletter.objects.filter(is_active=True)
     serializer_class = NewsletterSerializer
+    throttle_scope = "newsletter"
     http_method_names = ["post"]
     
     def create(self, request, *args, **kwargs):
@@ -93,9 +390,15 @@ class NewsletterViewSet(viewsets.ModelViewSet):
                 {"error": "Email is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        newsletter, created = Newsletter.objects.get_or_create(email=email)
-        if not created:
+
+        emails, invalid = normalize_emails([email])
+        if invalid:
+            return Response(
+                {"error": "Enter a valid email address"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not subscribe(emails):
             return Response(
                 {"detail": "Already subscribed"},
                 status=status.HTTP_200_OK
@@ -105,3 +408,129 @@ class NewsletterViewSet(viewsets.ModelViewSet):
             {"detail": "Subscribed successfully"},
             status=status.HTTP_201_CREATED
         )
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Subscribe a list of emails in as few statements as possible"""
+        emails = request.data.get("emails")
+        if not isinstance(emails, list) or not emails:
+            return Response(
+                {"error": "emails must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(emails) > NEWSLETTER_BULK_MAX_EMAILS:
+            return Response(
+                {"error": f"At most {NEWSLETTER_BULK_MAX_EMAILS} emails per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        emails, invalid = normalize_emails(emails)
+        created = subscribe(emails)
+        return Response(
+            {
+                "created": len(created),
+                "existing": len(emails) - len(created),
+                "invalid": invalid,
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class ReviewViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Published reviews of one product (``?product=``), newest first.
+
+    Posted reviews wait for moderation; publishing one in the admin
+    updates the product's rating rollups (see api.reviews).
+    """
+    queryset = Review.objects.filter(is_published=True)
+    serializer_class = ReviewSerializer
+    throttle_scope = "review"
+    filterset_fields = ["product", "rating"]
+    http_method_names = ["get", "post"]
+
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get("product"):
+            return Response(
+                {"error": "product is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return super().list(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+
+class StockReservationViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Hold stock for a checkout, then confirm or release it.
+
+    Holds that are neither confirmed nor released expire after their ttl
+    and are returned to stock by the periodic sweep.
+    """
+    queryset = StockReservation.objects.prefetch_related("items")
+    serializer_class = StockReservationSerializer
+    throttle_scope = "reservation"
+    lookup_field = "token"
+    lookup_value_regex = "[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+    http_method_names = ["get", "post", "delete"]
+
+    def not_held(self):
+        """404 for unknown tokens, 409 with the status for closed ones"""
+        reservation = self.get_object()
+        state = reservation.status
+        if state == StockReservation.HELD:
+            state = StockReservation.EXPIRED
+        return Response(
+            {"error": f"Reservation is {state}"},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    def get_client(self):
+        """Who is asking, hashed: the user, or the IP address when anonymous"""
+        if self.request.user and self.request.user.is_authenticated:
+            ident = f"user:{self.request.user.pk}"
+        else:
+            ident = f"ip:{BaseThrottle().get_ident(self.request)}"
+        return hashlib.md5(ident.encode()).hexdigest()
+
+    def create(self, request, *args, **kwargs):
+        serializer = ReservationRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = [
+            (item["product"], item["quantity"])
+            for item in serializer.validated_data["items"]
+        ]
+        try:
+            reservation = reserve_stock(
+                items, ttl=serializer.validated_data.get("ttl"), client=self.get_client()
+            )
+        except InsufficientStock as error:
+            return Response(
+                {"error": str(error), "shortages": error.shortages},
+                status=status.HTTP_409_CONFLICT
+            )
+        except TooManyReservations:
+            return Response(
+                {"error": (
+                    f"At most {settings.STOCK_RESERVATION_MAX_OPEN} open reservations; "
+                    "confirm or release one first"
+                )},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+        return Response(
+            self.get_serializer(reservation).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    def destroy(self, request, *args, **kwargs):
+        """Release the held stock before the reservation expires"""
+        if not release_reservation(self.kwargs["token"]):
+            return self.not_held()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=["post"])
+    def confirm(self, request, token=None):
+        """Keep the held stock for good, e.g. once payment succeeds"""
+        if not confirm_reservation(token):
+            return self.not_held()
+        return Response(self.get_serializer(self.get_object()).data)
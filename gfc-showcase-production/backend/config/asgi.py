@@ -0,0 +1,9 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Each ASGI request runs its sync code in a fresh thread, and connections
+# are per thread, so persistent connections would never be reused. Pool
+# outside Django (e.g. PgBouncer) instead.
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
+application = get_asgi_application()
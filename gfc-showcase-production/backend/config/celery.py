@@ -0,0 +1,10 @@
+import os
+from celery import Celery
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# `celery -A config worker` and `celery -A config beat`; the schedule is
+# CELERY_BEAT_SCHEDULE in settings. django-celery-beat's DatabaseScheduler
+# (--scheduler django_celery_beat.schedulers:DatabaseScheduler) picks it up too.
+app = Celery("config")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
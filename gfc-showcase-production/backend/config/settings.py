@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -23,6 +24,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.instrumentation.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -52,14 +54,187 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Route the product read endpoints to AsyncProductViewSet, coroutine
+# versions of ProductViewSet's actions. Opt-in under ASGI only: the sync
+# views served more requests per second in the SQLite benchmark, so leave
+# it off unless a benchmark on your database shows a gain. Under WSGI each
+# async view would need its own event loop.
+ASYNC_CATALOGUE_VIEWS = config("ASYNC_CATALOGUE_VIEWS", default=False, cast=bool)
+
+# DB_ENGINE=postgresql for production; the default SQLite profile suits
+# development and small single-host deployments. Connections are kept
+# for DB_CONN_MAX_AGE seconds and health checked before reuse.
+DB_ENGINE = config("DB_ENGINE", default="sqlite")
+DB_CONN_MAX_AGE = config("DB_CONN_MAX_AGE", default=60, cast=int)
+
+if DB_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": config("DB_NAME", default="gfc_showcase"),
+            "USER": config("DB_USER", default="postgres"),
+            "PASSWORD": config("DB_PASSWORD", default=""),
+            "HOST": config("DB_HOST", default="localhost"),
+            "PORT": config("DB_PORT", default="5432"),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "connect_timeout": config("DB_CONNECT_TIMEOUT", default=5, cast=int),
+            },
+        }
     }
+    # ProductViewSet reads go to the replica when DB_REPLICA_HOST is set,
+    # except for DB_REPLICA_PIN_SECONDS after each catalogue write, when
+    # they stay on the primary so that no replica-lagged rows get cached
+    # under the new catalogue version. Keep it above the replication lag.
+    DB_REPLICA_HOST = config("DB_REPLICA_HOST", default="")
+    if DB_REPLICA_HOST:
+        DATABASES["replica"] = {
+            **DATABASES["default"],
+            "HOST": DB_REPLICA_HOST,
+            "PORT": config("DB_REPLICA_PORT", default=DATABASES["default"]["PORT"]),
+            "TEST": {"MIRROR": "default"},
+        }
+elif DB_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": config("DB_NAME", default=str(BASE_DIR / "db.sqlite3")),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "OPTIONS": {
+                # Seconds a writer waits for the database lock.
+                "timeout": config("DB_LOCK_TIMEOUT", default=20, cast=int),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unsupported DB_ENGINE: {DB_ENGINE}")
+
+# WAL lets SQLite readers run alongside the single writer.
+SQLITE_WAL = config("SQLITE_WAL", default=True, cast=bool)
+
+DATABASE_ROUTERS = ["api.db.ReplicaRouter"]
+DB_REPLICA_PIN_SECONDS = config("DB_REPLICA_PIN_SECONDS", default=5.0, cast=float)
+
+REDIS_URL = config("REDIS_URL", default="")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "gfc-showcase",
+        }
+    }
+
+# Read-only catalogue responses are cached per catalogue version, which
+# Product signals bump when each change commits; stock reservations only
+# bump the scopes of the products and categories they touch. The versions
+# live in the CATALOGUE_CACHE_ALIAS cache, so it must be shared (REDIS_URL)
+# whenever more than one worker process serves the API: with the local-memory
+# fallback every process keeps its own version and misses the others'
+# bumps. `manage.py check --deploy` warns about that fallback.
+CATALOGUE_CACHE_ENABLED = config("CATALOGUE_CACHE_ENABLED", default=True, cast=bool)
+CATALOGUE_CACHE_ALIAS = "default"
+CATALOGUE_CACHE_TIMEOUT = config("CATALOGUE_CACHE_TIMEOUT", default=300, cast=int)
+
+# `manage.py export_catalogue_snapshot` writes every catalogue GET output
+# as content-hashed, pre-compressed files plus manifest.json, for disk or
+# CDN serving. Links inside them use CATALOGUE_SNAPSHOT_BASE_URL. With
+# CATALOGUE_SNAPSHOT_SERVE the API answers from the snapshot while it
+# matches the catalogue; CATALOGUE_SNAPSHOT_AUTO rebuilds it in the
+# background after product edits.
+CATALOGUE_SNAPSHOT_DIR = config("CATALOGUE_SNAPSHOT_DIR", default=str(BASE_DIR / "snapshots"))
+CATALOGUE_SNAPSHOT_BASE_URL = config("CATALOGUE_SNAPSHOT_BASE_URL", default="http://localhost:8000")
+CATALOGUE_SNAPSHOT_SERVE = config("CATALOGUE_SNAPSHOT_SERVE", default=False, cast=bool)
+CATALOGUE_SNAPSHOT_AUTO = config("CATALOGUE_SNAPSHOT_AUTO", default=False, cast=bool)
+CATALOGUE_SNAPSHOT_DELAY = config("CATALOGUE_SNAPSHOT_DELAY", default=5.0, cast=float)
+# Stock reservations leave the snapshot in place; it is rebuilt at most
+# every CATALOGUE_SNAPSHOT_STOCK_DELAY seconds, showing stock that much
+# older until then.
+CATALOGUE_SNAPSHOT_STOCK_DELAY = config("CATALOGUE_SNAPSHOT_STOCK_DELAY", default=60.0, cast=float)
+
+# A new product image upload is rendered into variants by a Celery worker
+# ("celery", the default with REDIS_URL), or after the saving request's
+# commit, in that request ("sync").
+IMAGE_PROCESSING_MODE = config("IMAGE_PROCESSING_MODE", default="celery" if REDIS_URL else "sync")
+
+# "sync" writes each contact submission in the request; "queue" validates,
+# answers 202 and lets a background writer bulk_create them in batches.
+# The "redis" backend gives at-least-once delivery across restarts; the
+# writer runs in-process unless CONTACT_INGESTION_START_WORKER is off and
+# `manage.py contact_worker` runs it separately. A failed batch is retried
+# row by row; rows failing CONTACT_INGESTION_MAX_ATTEMPTS times in a row
+# go to the "contacts:dead" Redis list (in memory for the local backend).
+# Redis workers claim into their own processing lists; one whose heartbeat
+# is older than CONTACT_INGESTION_HEARTBEAT_TTL seconds counts as crashed,
+# and the other workers re-queue its entries (they check as often).
+CONTACT_INGESTION_MODE = config("CONTACT_INGESTION_MODE", default="sync")
+CONTACT_INGESTION_BACKEND = config("CONTACT_INGESTION_BACKEND", default="local")
+CONTACT_INGESTION_BATCH_SIZE = config("CONTACT_INGESTION_BATCH_SIZE", default=500, cast=int)
+CONTACT_INGESTION_FLUSH_INTERVAL = config("CONTACT_INGESTION_FLUSH_INTERVAL", default=0.5, cast=float)
+CONTACT_INGESTION_START_WORKER = config("CONTACT_INGESTION_START_WORKER", default=True, cast=bool)
+CONTACT_INGESTION_MAX_ATTEMPTS = config("CONTACT_INGESTION_MAX_ATTEMPTS", default=5, cast=int)
+CONTACT_INGESTION_HEARTBEAT_TTL = config("CONTACT_INGESTION_HEARTBEAT_TTL", default=30.0, cast=float)
+
+# POST /api/reservations/ holds stock for a checkout with conditional
+# decrements that cannot oversell. Holds not confirmed within
+# STOCK_RESERVATION_TTL seconds go back to stock when the expiry sweep
+# runs: every STOCK_RESERVATION_SWEEP_INTERVAL seconds under Celery beat,
+# or from cron with `manage.py release_expired_reservations`.
+STOCK_RESERVATION_TTL = config("STOCK_RESERVATION_TTL", default=900, cast=int)
+STOCK_RESERVATION_SWEEP_INTERVAL = config("STOCK_RESERVATION_SWEEP_INTERVAL", default=60.0, cast=float)
+# So that one anonymous caller cannot hold a product's whole stock: at most
+# STOCK_RESERVATION_MAX_QUANTITY units of each product per hold, a ttl of
+# at most STOCK_RESERVATION_MAX_TTL seconds, and STOCK_RESERVATION_MAX_OPEN
+# unexpired holds per client (user, or IP address when anonymous; 0 lifts
+# the limit).
+STOCK_RESERVATION_MAX_QUANTITY = config("STOCK_RESERVATION_MAX_QUANTITY", default=5, cast=int)
+STOCK_RESERVATION_MAX_TTL = config("STOCK_RESERVATION_MAX_TTL", default=900, cast=int)
+STOCK_RESERVATION_MAX_OPEN = config("STOCK_RESERVATION_MAX_OPEN", default=3, cast=int)
+# Category summaries follow reservation and review writes within this
+# many seconds, one refresh for all writes in between; 0 refreshes them
+# after every write.
+CATEGORY_SUMMARY_REFRESH_DELAY = config("CATEGORY_SUMMARY_REFRESH_DELAY", default=1.0, cast=float)
+# Related-product lists follow product saves and deletes within this many
+# seconds of the commit, one refresh for all changes in between; 0
+# refreshes them as each transaction commits.
+RELATED_REFRESH_DELAY = config("RELATED_REFRESH_DELAY", default=2.0, cast=float)
+
+# Product.weighted_rating, the ?ordering=weighted_rating sort key, adds
+# REVIEW_PRIOR_WEIGHT virtual ratings of REVIEW_PRIOR_RATING to each
+# product's real ones. It is computed when reviews are written; run
+# `manage.py recompute_review_rollups` after changing either setting.
+# A weight of 0 sorts by the plain average rating.
+REVIEW_PRIOR_RATING = config("REVIEW_PRIOR_RATING", default=3.5, cast=float)
+REVIEW_PRIOR_WEIGHT = config("REVIEW_PRIOR_WEIGHT", default=10, cast=int)
+
+# Celery runs periodic maintenance and image rendering (config/celery.py,
+# api/tasks.py).
+CELERY_BROKER_URL = config("CELERY_BROKER_URL", default=REDIS_URL or "redis://localhost:6379/0")
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_BEAT_SCHEDULE = {
+    "release-expired-reservations": {
+        "task": "api.tasks.release_expired_reservations",
+        "schedule": STOCK_RESERVATION_SWEEP_INTERVAL,
+    },
 }
 
+# Per-request wall, SQL and serializer time, reported as Server-Timing
+# headers, "api.requests" log lines and per-route histograms at /metrics.
+# /metrics answers 403 unless METRICS_TOKEN is set, and then requires
+# "Authorization: Bearer <token>"; with DEBUG on and no token it is open.
+REQUEST_METRICS_ENABLED = config("REQUEST_METRICS_ENABLED", default=True, cast=bool)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -83,15 +258,31 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 12,
+    # Product rows carry their JSON columns as undecoded text (api.renderers).
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.RawJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
+        "api.throttling.ScopedTokenBucketThrottle",
     ],
+    # One token bucket per client and view throttle_scope; "anon" covers
+    # views without a scope.
     "DEFAULT_THROTTLE_RATES": {
-        "anon": "100/hour",
+        "anon": config("THROTTLE_ANON_RATE", default="100/hour"),
+        "catalogue": config("THROTTLE_CATALOGUE_RATE", default="1000/hour"),
+        "contact": config("THROTTLE_CONTACT_RATE", default="20/hour"),
+        "newsletter": config("THROTTLE_NEWSLETTER_RATE", default="20/hour"),
+        "reservation": config("THROTTLE_RESERVATION_RATE", default="120/hour"),
+        "review": config("THROTTLE_REVIEW_RATE", default="10/hour"),
     },
 }
 
+# Buckets live in Redis when REDIS_URL is set, so limits hold across
+# workers, and in process memory otherwise.
+THROTTLE_ENABLED = config("THROTTLE_ENABLED", default=True, cast=bool)
+
 CORS_ALLOWED_ORIGINS = config("CORS_ALLOWED_ORIGINS", default="http://localhost:3000").split(",")
 CORS_ALLOW_CREDENTIALS = True
 
@@ -104,13 +295,30 @@ SPECTACULAR_SETTINGS = {
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "formatters": {
+        # api.requests messages are already JSON objects, one per line.
+        "message": {
+            "format": "%(message)s",
+        },
+    },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
         },
+        "requests": {
+            "class": "logging.StreamHandler",
+            "formatter": "message",
+        },
     },
     "root": {
         "handlers": ["console"],
         "level": "INFO",
     },
+    "loggers": {
+        "api.requests": {
+            "handlers": ["requests"],
+            "level": config("REQUEST_LOG_LEVEL", default="INFO"),
+            "propagate": False,
+        },
+    },
 }
@@ -138,6 +138,24 @@ app.get("/api/products/by-category", cacheMiddleware, async (req: Request, res:
   }
 });
 
+// Several Products in one request (?ids= or ?model_codes=)
+app.get("/api/products/batch", cacheMiddleware, async (req: Request, res: Response) => {
+  try {
+    const cacheKey = `GET:${req.originalUrl}`;
+    const queryString = new URLSearchParams(req.query as Record<string, string>).toString();
+    const url = `${djangoUrl}/api/products/batch/?${queryString}`;
+
+    console.log(`Fetching: ${url}`);
+    const response = await axios.get(url);
+
+    cache.set(cacheKey, response.data);
+    res.json(response.data);
+  } catch (error) {
+    console.error("Error fetching product batch:", error);
+    res.status(500).json({ error: "Failed to fetch products" });
+  }
+});
+
 // Product Detail
 app.get("/api/products/:id", cacheMiddleware, async (req: Request, res: Response) => {
   try {